@@ -0,0 +1,326 @@
+"""
+An asyncio front-end for :class:`sqlite_utils.db.Database`.
+
+Every call runs the regular synchronous API on a single worker thread that
+owns the SQLite connection, so awaiting it never blocks the event loop.
+See :ref:`python_api_async`.
+"""
+
+import asyncio
+import contextlib
+import functools
+import itertools
+from collections.abc import AsyncGenerator, Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from .db import Database, Table
+
+T = TypeVar("T")
+
+# Rows fetched from the worker thread at a time by async iterators
+FETCH_BLOCK_SIZE = 1000
+
+
+class AsyncDatabase:
+    """
+    Open a database for use from asyncio code. Takes the same arguments as
+    :class:`sqlite_utils.db.Database`::
+
+        db = AsyncDatabase("data.db")
+        await db.table("dogs").insert({"name": "Cleo"})
+        async for row in db.query("select * from dogs"):
+            print(row)
+        await db.close()
+
+    The connection is opened, used and closed by a dedicated worker thread, so
+    operations are executed one at a time in the order they were awaited.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite-utils"
+        )
+        # The connection must be created by the thread that will use it
+        self.db: Database = self._executor.submit(
+            functools.partial(Database, *args, **kwargs)
+        ).result()
+        self._lock = asyncio.Lock()
+        self._transaction_task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "AsyncDatabase":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def _run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # Operations from other tasks wait until an open transaction finishes
+        current = asyncio.current_task()
+        if current is not None and current is self._transaction_task:
+            return await self._call(fn, *args, **kwargs)
+        async with self._lock:
+            return await self._call(fn, *args, **kwargs)
+
+    async def run(self, fn: Callable[[Database], T]) -> T:
+        """
+        Call ``fn(db)`` on the worker thread with the underlying
+        :class:`~sqlite_utils.db.Database`, for anything not covered by the
+        other methods::
+
+            names = await db.run(lambda db: db.table_names())
+
+        :param fn: Function to call with the ``Database``
+        """
+        return await self._run(fn, self.db)
+
+    async def _iterate(
+        self, start: Callable[[], Iterable[T]], block_size: int | None
+    ) -> AsyncGenerator[T, None]:
+        # Start iterating on the worker thread, then fetch blocks of results
+        # from it - rows are never fetched outside of that thread
+        size = block_size or FETCH_BLOCK_SIZE
+        iterator: Iterator[T] = await self._run(lambda: iter(start()))
+        while True:
+            block = await self._run(lambda: list(itertools.islice(iterator, size)))
+            for item in block:
+                yield item
+            if len(block) < size:
+                return
+
+    def query(
+        self,
+        sql: str,
+        params: Any = None,
+        row_factory: Any = None,
+        block_size: int | None = None,
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Execute ``sql`` and return an async iterator over the resulting rows -
+        see :meth:`Database.query() <sqlite_utils.db.Database.query>`::
+
+            async for row in db.query("select * from dogs where age > ?", [1]):
+                print(row)
+
+        :param sql: SQL query to execute
+        :param params: Parameters to use in that query
+        :param row_factory: Return rows as this type - see :ref:`python_api_row_factory`
+        :param block_size: Number of rows to fetch from the worker thread at a
+          time, defaults to ``FETCH_BLOCK_SIZE``
+        """
+        return self._iterate(
+            lambda: self.db.query(sql, params, row_factory=row_factory), block_size
+        )
+
+    async def query_columns(self, sql: str, params: Any = None, **kwargs: Any) -> dict:
+        "Like :meth:`Database.query_columns() <sqlite_utils.db.Database.query_columns>`."
+        return await self._run(self.db.query_columns, sql, params, **kwargs)
+
+    async def execute(self, sql: str, params: Any = None) -> int:
+        """
+        Execute a SQL statement that does not return rows, such as an ``UPDATE``,
+        and return the number of rows it affected.
+
+        :param sql: SQL statement to execute
+        :param params: Parameters to use in that statement
+        """
+        return await self._run(lambda: self.db.execute(sql, params).rowcount)
+
+    async def executescript(self, sql: str) -> None:
+        "Execute multiple SQL statements separated by ``;``."
+        await self._run(self.db.executescript, sql)
+
+    async def table_names(self, **kwargs: Any) -> list[str]:
+        "Like :meth:`Database.table_names() <sqlite_utils.db.Database.table_names>`."
+        return await self._run(self.db.table_names, **kwargs)
+
+    def table(self, table_name: str, **kwargs: Any) -> "AsyncTable":
+        """
+        Return an :class:`AsyncTable` for the specified table. Accepts the same
+        arguments as :meth:`Database.table() <sqlite_utils.db.Database.table>`.
+
+        :param table_name: Name of the table
+        """
+        # Database.table() checks for a view with a query, which cannot run on
+        # this thread - so the Table is constructed directly
+        kwargs.setdefault("strict", self.db.strict)
+        return AsyncTable(self, Table(self.db, table_name, **kwargs))
+
+    def __getitem__(self, table_name: str) -> "AsyncTable":
+        return self.table(table_name)
+
+    @contextlib.asynccontextmanager
+    async def atomic(self) -> AsyncGenerator["AsyncDatabase", None]:
+        """
+        Async context manager that runs the operations awaited inside it in a
+        transaction, using :meth:`Database.atomic() <sqlite_utils.db.Database.atomic>`::
+
+            async with db.atomic():
+                await db.table("dogs").insert({"name": "Cleo"})
+                await db.table("dogs").insert({"name": "Pancakes"})
+
+        Operations from other tasks wait until the transaction has finished.
+        Nested blocks use savepoints.
+        """
+        current = asyncio.current_task()
+        if current is not None and current is self._transaction_task:
+            async with self._atomic():
+                yield self
+            return
+        async with self._lock:
+            self._transaction_task = current
+            try:
+                async with self._atomic():
+                    yield self
+            finally:
+                self._transaction_task = None
+
+    @contextlib.asynccontextmanager
+    async def _atomic(self) -> AsyncGenerator[None, None]:
+        # Enter and exit Database.atomic() on the worker thread
+        manager = self.db.atomic()
+        await self._call(manager.__enter__)
+        try:
+            yield
+        except BaseException as ex:
+            if not await self._call(manager.__exit__, type(ex), ex, ex.__traceback__):
+                raise
+        else:
+            await self._call(manager.__exit__, None, None, None)
+
+    async def close(self) -> None:
+        "Close the connection and stop the worker thread."
+        await self._run(self.db.close)
+        self._executor.shutdown(wait=False)
+
+
+class AsyncTable:
+    """
+    Asynchronous version of :class:`sqlite_utils.db.Table`, returned by
+    :meth:`AsyncDatabase.table`.
+
+    Methods take the same arguments as the equivalent ``Table`` methods.
+    """
+
+    def __init__(self, db: AsyncDatabase, table: Table):
+        self.db = db
+        self.table = table
+
+    def __repr__(self) -> str:
+        return f"<AsyncTable {self.name}>"
+
+    @property
+    def name(self) -> str:
+        return self.table.name
+
+    @property
+    def last_rowid(self) -> int | None:
+        "The ``rowid`` of the last row inserted into this table."
+        return self.table.last_rowid
+
+    @property
+    def last_pk(self) -> Any:
+        "The primary key of the last row inserted or updated in this table."
+        return self.table.last_pk
+
+    async def run(self, fn: Callable[[Table], T]) -> T:
+        """
+        Call ``fn(table)`` on the worker thread with the underlying
+        :class:`~sqlite_utils.db.Table`::
+
+            await db.table("dogs").run(lambda table: table.transform(drop={"age"}))
+
+        :param fn: Function to call with the ``Table``
+        """
+        return await self.db._run(fn, self.table)
+
+    async def _write(self, method: Callable[..., Any], *args, **kwargs) -> "AsyncTable":
+        await self.db._run(method, *args, **kwargs)
+        return self
+
+    async def exists(self) -> bool:
+        "Does this table exist?"
+        return await self.db._run(self.table.exists)
+
+    async def count(self) -> int:
+        "Count of the rows in this table."
+        return await self.db._run(lambda: self.table.count)
+
+    async def count_where(self, *args: Any, **kwargs: Any) -> int:
+        "See :meth:`Table.count_where() <sqlite_utils.db.Queryable.count_where>`."
+        return await self.db._run(self.table.count_where, *args, **kwargs)
+
+    async def create(self, *args: Any, **kwargs: Any) -> "AsyncTable":
+        "See :meth:`Table.create() <sqlite_utils.db.Table.create>`."
+        return await self._write(self.table.create, *args, **kwargs)
+
+    async def get(self, *args: Any, **kwargs: Any) -> dict:
+        "See :meth:`Table.get() <sqlite_utils.db.Table.get>`."
+        return await self.db._run(self.table.get, *args, **kwargs)
+
+    async def insert(self, *args: Any, **kwargs: Any) -> "AsyncTable":
+        "See :meth:`Table.insert() <sqlite_utils.db.Table.insert>`."
+        return await self._write(self.table.insert, *args, **kwargs)
+
+    async def insert_all(self, records: Iterable, **kwargs: Any) -> "AsyncTable":
+        """
+        See :meth:`Table.insert_all() <sqlite_utils.db.Table.insert_all>`.
+
+        ``records`` is iterated on the worker thread - pass a list rather than
+        a generator that needs to await anything.
+        """
+        return await self._write(self.table.insert_all, records, **kwargs)
+
+    async def upsert(self, *args: Any, **kwargs: Any) -> "AsyncTable":
+        "See :meth:`Table.upsert() <sqlite_utils.db.Table.upsert>`."
+        return await self._write(self.table.upsert, *args, **kwargs)
+
+    async def upsert_all(self, records: Iterable, **kwargs: Any) -> "AsyncTable":
+        "See :meth:`Table.upsert_all() <sqlite_utils.db.Table.upsert_all>`."
+        return await self._write(self.table.upsert_all, records, **kwargs)
+
+    async def update(self, *args: Any, **kwargs: Any) -> "AsyncTable":
+        "See :meth:`Table.update() <sqlite_utils.db.Table.update>`."
+        return await self._write(self.table.update, *args, **kwargs)
+
+    async def delete(self, *args: Any, **kwargs: Any) -> "AsyncTable":
+        "See :meth:`Table.delete() <sqlite_utils.db.Table.delete>`."
+        return await self._write(self.table.delete, *args, **kwargs)
+
+    async def delete_where(self, *args: Any, **kwargs: Any) -> "AsyncTable":
+        "See :meth:`Table.delete_where() <sqlite_utils.db.Table.delete_where>`."
+        return await self._write(self.table.delete_where, *args, **kwargs)
+
+    async def lookup(self, *args: Any, **kwargs: Any) -> Any:
+        "See :meth:`Table.lookup() <sqlite_utils.db.Table.lookup>`."
+        return await self.db._run(self.table.lookup, *args, **kwargs)
+
+    def rows_where(
+        self, *args: Any, block_size: int | None = None, **kwargs: Any
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Async iterator version of :meth:`Table.rows_where() <sqlite_utils.db.Queryable.rows_where>`.
+
+        :param block_size: Number of rows to fetch from the worker thread at a
+          time, defaults to ``FETCH_BLOCK_SIZE``
+        """
+        return self.db._iterate(
+            lambda: self.table.rows_where(*args, **kwargs), block_size
+        )
+
+    def search(
+        self, *args: Any, block_size: int | None = None, **kwargs: Any
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Async iterator version of :meth:`Table.search() <sqlite_utils.db.Table.search>`.
+
+        :param block_size: Number of rows to fetch from the worker thread at a
+          time, defaults to ``FETCH_BLOCK_SIZE``
+        """
+        return self.db._iterate(lambda: self.table.search(*args, **kwargs), block_size)
@@ -1,16 +1,24 @@
 import base64
+import bz2
+import contextlib
 import csv as csv_std
 import difflib
+import gzip
 import hashlib
 import inspect
 import io
 import itertools
 import json
+import lzma
+import multiprocessing
 import os
 import pathlib
 import pdb  # noqa: T100
+import queue
 import sys
 import textwrap
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from runpy import run_module
 from typing import Any
@@ -38,10 +46,15 @@ from sqlite_utils.utils import maximize_csv_field_size_limit
 from .utils import (
     Format,
     OperationalError,
+    RowsFromFileBadJSON,
     TypeTracker,
     _compile_code,
+    _SpooledRows,
+    _read_ahead,
+    _stream_json,
     chunks,
     decode_base64_values,
+    decompress,
     dedupe_keys,
     file_progress,
     find_spatialite,
@@ -170,6 +183,13 @@ def functions_option(fn):
     )(fn)
 
 
+busy_timeout_option = click.option(
+    "--busy-timeout",
+    type=float,
+    help="Seconds to keep retrying if another process has the database locked",
+)
+
+
 @click.group(
     cls=DefaultGroup,
     default="query",
@@ -364,7 +384,8 @@ def views(
 @click.argument("tables", nargs=-1)
 @click.option("--no-vacuum", help="Don't run VACUUM", default=False, is_flag=True)
 @load_extension_option
-def optimize(path, tables, no_vacuum, load_extension):
+@busy_timeout_option
+def optimize(path, tables, no_vacuum, load_extension, busy_timeout):
     """Optimize all full-text search tables and then run VACUUM - should shrink the database file
 
     Example:
@@ -372,7 +393,7 @@ def optimize(path, tables, no_vacuum, load_extension):
     \b
         sqlite-utils optimize chickens.db
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     if not tables:
@@ -392,7 +413,8 @@ def optimize(path, tables, no_vacuum, load_extension):
 )
 @click.argument("tables", nargs=-1)
 @load_extension_option
-def rebuild_fts(path, tables, load_extension):
+@busy_timeout_option
+def rebuild_fts(path, tables, load_extension, busy_timeout):
     """Rebuild all or specific full-text search tables
 
     Example:
@@ -400,7 +422,7 @@ def rebuild_fts(path, tables, load_extension):
     \b
         sqlite-utils rebuild-fts chickens.db chickens
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     if not tables:
@@ -417,7 +439,8 @@ def rebuild_fts(path, tables, load_extension):
     required=True,
 )
 @click.argument("names", nargs=-1)
-def analyze(path, names):
+@busy_timeout_option
+def analyze(path, names, busy_timeout):
     """Run ANALYZE against the whole database, or against specific named indexes and tables
 
     Example:
@@ -425,7 +448,7 @@ def analyze(path, names):
     \b
         sqlite-utils analyze chickens.db
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     try:
         if names:
@@ -443,7 +466,8 @@ def analyze(path, names):
     type=click.Path(exists=True, file_okay=True, dir_okay=False, allow_dash=False),
     required=True,
 )
-def vacuum(path):
+@busy_timeout_option
+def vacuum(path, busy_timeout):
     """Run VACUUM against the database
 
     Example:
@@ -451,7 +475,7 @@ def vacuum(path):
     \b
         sqlite-utils vacuum chickens.db
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     db.vacuum()
 
@@ -525,6 +549,7 @@ def dump(path, load_extension):
     help="If column already exists, do nothing",
 )
 @load_extension_option
+@busy_timeout_option
 def add_column(
     path,
     table,
@@ -535,6 +560,7 @@ def add_column(
     not_null_default,
     ignore,
     load_extension,
+    busy_timeout,
 ):
     """Add a column to the specified table
 
@@ -543,7 +569,7 @@ def add_column(
     \b
         sqlite-utils add-column chickens.db chickens weight float
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     try:
@@ -571,8 +597,16 @@ def add_column(
     help="If foreign key already exists, do nothing",
 )
 @load_extension_option
+@busy_timeout_option
 def add_foreign_key(
-    path, table, column, other_table, other_column, ignore, load_extension
+    path,
+    table,
+    column,
+    other_table,
+    other_column,
+    ignore,
+    load_extension,
+    busy_timeout,
 ):
     """
     Add a new foreign key constraint to an existing table
@@ -581,7 +615,7 @@ def add_foreign_key(
 
         sqlite-utils add-foreign-key my.db books author_id authors id
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     try:
@@ -600,7 +634,8 @@ def add_foreign_key(
 )
 @click.argument("foreign_key", nargs=-1)
 @load_extension_option
-def add_foreign_keys(path, foreign_key, load_extension):
+@busy_timeout_option
+def add_foreign_keys(path, foreign_key, load_extension, busy_timeout):
     """
     Add multiple new foreign key constraints to a database
 
@@ -611,7 +646,7 @@ def add_foreign_keys(path, foreign_key, load_extension):
             books author_id authors id \\
             authors country_id countries id
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     if len(foreign_key) % 4 != 0:
@@ -634,7 +669,8 @@ def add_foreign_keys(path, foreign_key, load_extension):
     required=True,
 )
 @load_extension_option
-def index_foreign_keys(path, load_extension):
+@busy_timeout_option
+def index_foreign_keys(path, load_extension, busy_timeout):
     """
     Ensure every foreign key column has an index on it
 
@@ -643,7 +679,7 @@ def index_foreign_keys(path, load_extension):
     \b
         sqlite-utils index-foreign-keys chickens.db
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     db.index_foreign_keys()
@@ -672,8 +708,17 @@ def index_foreign_keys(path, load_extension):
     is_flag=True,
 )
 @load_extension_option
+@busy_timeout_option
 def create_index(
-    path, table, column, name, unique, if_not_exists, analyze, load_extension
+    path,
+    table,
+    column,
+    name,
+    unique,
+    if_not_exists,
+    analyze,
+    load_extension,
+    busy_timeout,
 ):
     """
     Add an index to the specified table for the specified columns
@@ -688,7 +733,7 @@ def create_index(
     \b
         sqlite-utils create-index chickens.db chickens -- -name
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     # Treat -prefix as descending for columns
@@ -716,7 +761,8 @@ def create_index(
 @click.argument("index")
 @click.option("--ignore", help="Ignore if index does not exist", is_flag=True)
 @load_extension_option
-def drop_index(path, table, index, ignore, load_extension):
+@busy_timeout_option
+def drop_index(path, table, index, ignore, load_extension, busy_timeout):
     """
     Drop an index by index name from the specified table
 
@@ -725,7 +771,7 @@ def drop_index(path, table, index, ignore, load_extension):
     \b
         sqlite-utils drop-index chickens.db chickens idx_chickens_name
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     try:
@@ -757,8 +803,18 @@ def drop_index(path, table, index, ignore, load_extension):
     help="Replace existing FTS configuration if it exists",
 )
 @load_extension_option
+@busy_timeout_option
 def enable_fts(
-    path, table, column, fts4, fts5, tokenize, create_triggers, replace, load_extension
+    path,
+    table,
+    column,
+    fts4,
+    fts5,
+    tokenize,
+    create_triggers,
+    replace,
+    load_extension,
+    busy_timeout,
 ):
     """Enable full-text search for specific table and columns
 
@@ -774,7 +830,7 @@ def enable_fts(
     elif fts4:
         fts_version = "FTS4"
 
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     try:
@@ -798,7 +854,8 @@ def enable_fts(
 @click.argument("table")
 @click.argument("column", nargs=-1, required=True)
 @load_extension_option
-def populate_fts(path, table, column, load_extension):
+@busy_timeout_option
+def populate_fts(path, table, column, load_extension, busy_timeout):
     """Re-populate full-text search for specific table and columns
 
     Example:
@@ -806,7 +863,7 @@ def populate_fts(path, table, column, load_extension):
     \b
         sqlite-utils populate-fts chickens.db chickens name
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     db.table(table).populate_fts(column)
@@ -820,7 +877,8 @@ def populate_fts(path, table, column, load_extension):
 )
 @click.argument("table")
 @load_extension_option
-def disable_fts(path, table, load_extension):
+@busy_timeout_option
+def disable_fts(path, table, load_extension, busy_timeout):
     """Disable full-text search for specific table
 
     Example:
@@ -828,7 +886,7 @@ def disable_fts(path, table, load_extension):
     \b
         sqlite-utils disable-fts chickens.db chickens
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     db.table(table).disable_fts()
@@ -842,7 +900,8 @@ def disable_fts(path, table, load_extension):
     required=True,
 )
 @load_extension_option
-def enable_wal(path, load_extension):
+@busy_timeout_option
+def enable_wal(path, load_extension, busy_timeout):
     """Enable WAL for database files
 
     Example:
@@ -851,7 +910,7 @@ def enable_wal(path, load_extension):
         sqlite-utils enable-wal chickens.db
     """
     for path_ in path:
-        db = sqlite_utils.Database(path_)
+        db = sqlite_utils.Database(path_, busy_timeout=busy_timeout)
         _register_db_for_cleanup(db)
         _load_extensions(db, load_extension)
         db.enable_wal()
@@ -865,7 +924,8 @@ def enable_wal(path, load_extension):
     required=True,
 )
 @load_extension_option
-def disable_wal(path, load_extension):
+@busy_timeout_option
+def disable_wal(path, load_extension, busy_timeout):
     """Disable WAL for database files
 
     Example:
@@ -874,7 +934,7 @@ def disable_wal(path, load_extension):
         sqlite-utils disable-wal chickens.db
     """
     for path_ in path:
-        db = sqlite_utils.Database(path_)
+        db = sqlite_utils.Database(path_, busy_timeout=busy_timeout)
         _register_db_for_cleanup(db)
         _load_extensions(db, load_extension)
         db.disable_wal()
@@ -888,7 +948,8 @@ def disable_wal(path, load_extension):
 )
 @click.argument("tables", nargs=-1)
 @load_extension_option
-def enable_counts(path, tables, load_extension):
+@busy_timeout_option
+def enable_counts(path, tables, load_extension, busy_timeout):
     """Configure triggers to update a _counts table with row counts
 
     Example:
@@ -896,7 +957,7 @@ def enable_counts(path, tables, load_extension):
     \b
         sqlite-utils enable-counts chickens.db
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     if not tables:
@@ -917,7 +978,8 @@ def enable_counts(path, tables, load_extension):
     required=True,
 )
 @load_extension_option
-def reset_counts(path, load_extension):
+@busy_timeout_option
+def reset_counts(path, load_extension, busy_timeout):
     """Reset calculated counts in the _counts table
 
     Example:
@@ -925,7 +987,7 @@ def reset_counts(path, load_extension):
     \b
         sqlite-utils reset-counts chickens.db
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     db.reset_counts()
@@ -976,6 +1038,20 @@ def import_options(fn):
     return fn
 
 
+bulk_load_option = click.option(
+    "--bulk-load",
+    is_flag=True,
+    help="Use faster but less crash-safe PRAGMA settings while loading",
+)
+
+detect_types_sample_option = click.option(
+    "--detect-types-sample",
+    type=click.IntRange(min=1),
+    help="Detect CSV/TSV column types from just this many rows, then stream "
+    "the rest - faster, but a later value may not fit the detected type",
+)
+
+
 def insert_upsert_options(*, require_pk=False):
     def inner(fn):
         for decorator in reversed(
@@ -1037,6 +1113,7 @@ def insert_upsert_options(*, require_pk=False):
                     is_flag=True,
                     help="Treat all CSV/TSV columns as TEXT",
                 ),
+                detect_types_sample_option,
                 click.option(
                     "--analyze",
                     is_flag=True,
@@ -1050,6 +1127,14 @@ def insert_upsert_options(*, require_pk=False):
                     default=False,
                     help="Apply STRICT mode to created table",
                 ),
+                bulk_load_option,
+                busy_timeout_option,
+                click.option(
+                    "--workers",
+                    type=click.IntRange(min=1),
+                    help="Parse input on a separate thread and run --convert "
+                    "using this many worker processes",
+                ),
             )
         ):
             fn = decorator(fn)
@@ -1088,6 +1173,7 @@ def insert_upsert_implementation(
     default=None,
     types=None,
     no_detect_types=False,
+    detect_types_sample=None,
     analyze=False,
     load_extension=None,
     silent=False,
@@ -1095,14 +1181,18 @@ def insert_upsert_implementation(
     functions=None,
     strict=False,
     code=None,
+    bulk_load=False,
+    busy_timeout=None,
+    workers=None,
 ):
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     _maybe_register_functions(db, functions)
+    bulk_load_context = db.bulk_load() if bulk_load else contextlib.nullcontext()
     column_type_overrides = {column: ctype.upper() for column, ctype in (types or [])}
 
-    def _insert_docs(docs, tracker=None):
+    def _insert_docs(docs, tracker=None, prepare=None):
         extra_kwargs: dict[str, Any] = {
             "ignore": ignore,
             "replace": replace,
@@ -1119,11 +1209,34 @@ def insert_upsert_implementation(
         if upsert:
             extra_kwargs["upsert"] = upsert
 
-        # docs should all be dictionaries
-        docs = (verify_is_dict(doc) for doc in docs)
+        if prepare is None:
+            prepare = _DocPreparer()
 
-        # Apply {"$base64": true, ...} decoding, if needed
-        docs = (decode_base64_values(doc) for doc in docs)
+        # table_names() rather than db.table(), which raises NoTable for
+        # views before the error handling below can deal with them
+        table_existed_before_insert = table in db.table_names()
+        create_with_types = (
+            tracker is not None
+            and prepare.convert is None
+            and not bulk_sql
+            and not table_existed_before_insert
+        )
+        if create_with_types:
+            # Detect the types before the table is created, instead of
+            # transforming it after the insert. STRICT tables reject values
+            # that do not fit their column types, so those use every row
+            docs = _detect_types_ahead(
+                docs, tracker, None if strict else detect_types_sample
+            )
+            extra_kwargs["columns"] = dict(tracker.types, **column_type_overrides)
+            docs = _empty_to_null(docs, extra_kwargs["columns"])
+
+        if workers:
+            # Parse on another thread and --convert in worker processes, so
+            # this one only writes
+            docs = _pipelined_docs(docs, prepare, workers, batch_size or 100)
+        else:
+            docs = (prepare(doc) for doc in docs)
 
         # For bulk_sql= we use cursor.executemany() instead
         if bulk_sql:
@@ -1136,9 +1249,6 @@ def insert_upsert_implementation(
                     db.conn.cursor().executemany(bulk_sql, doc_chunk)
             return
 
-        # table_names() rather than db.table(), which raises NoTable for
-        # views before the error handling below can deal with them
-        table_existed_before_insert = table in db.table_names()
         try:
             db.table(table).insert_all(
                 docs, pk=pk, batch_size=batch_size, alter=alter, **extra_kwargs
@@ -1168,9 +1278,11 @@ def insert_upsert_implementation(
                 raise
         # Apply detected types only to a table this command created -
         # transforming a pre-existing table would rewrite its column types
-        # and corrupt values such as TEXT zip codes with leading zeros
+        # and corrupt values such as TEXT zip codes with leading zeros.
+        # --convert can change the columns, so that still uses transform()
         if (
             tracker is not None
+            and not create_with_types
             and not table_existed_before_insert
             and db.table(table).exists()
         ):
@@ -1201,7 +1313,8 @@ def insert_upsert_implementation(
             raise click.ClickException(
                 "--code cannot be used with input format options"
             )
-        _insert_docs(_rows_from_code(code))
+        with bulk_load_context:
+            _insert_docs(_rows_from_code(code))
         return
 
     if file is None:
@@ -1223,6 +1336,10 @@ def insert_upsert_implementation(
         pk = pk[0]
     encoding = encoding or "utf-8-sig"
 
+    # Compressed input is decompressed as it is read
+    file = decompress(file)
+    compressed = isinstance(file, (gzip.GzipFile, bz2.BZ2File, lzma.LZMAFile))
+
     # The --sniff option needs us to buffer the file to peek ahead
     sniff_buffer = None
     decoded_buffer = None
@@ -1233,7 +1350,8 @@ def insert_upsert_implementation(
         decoded_buffer = io.TextIOWrapper(file, encoding=encoding)
 
     tracker = None
-    with file_progress(decoded_buffer, silent=silent) as decoded:
+    list_mode = False
+    with file_progress(decoded_buffer, silent=silent, compressed=compressed) as decoded:
         if csv or tsv:
             if sniff:
                 # Read first 2048 bytes and use that to detect
@@ -1256,7 +1374,18 @@ def insert_upsert_implementation(
                 reader = itertools.chain([first_row], reader)
             else:
                 headers = first_row
-            if empty_null:
+            # Unless --convert or bulk SQL need dictionaries, rows are inserted
+            # as lists of values after a list of the column names
+            list_mode = (
+                not convert and not bulk_sql and len(set(headers)) == len(headers)
+            )
+            if list_mode:
+                if stop_after:
+                    reader = itertools.islice(reader, stop_after)
+                docs = itertools.chain(
+                    [headers], _csv_value_lists(reader, len(headers), empty_null)
+                )
+            elif empty_null:
                 docs = (
                     dict(zip(headers, [None if cell == "" else cell for cell in row]))
                     for row in reader
@@ -1276,45 +1405,37 @@ def insert_upsert_implementation(
                 if nl:
                     docs = (json.loads(line) for line in decoded if line.strip())
                 else:
-                    docs = json.load(decoded)
-                    if isinstance(docs, dict):
-                        docs = [docs]
+                    docs = _invalid_json_errors(_stream_json(decoded))
             except json.decoder.JSONDecodeError as ex:
-                raise click.ClickException(
-                    f"Invalid JSON - use --csv for CSV or --tsv for TSV files\n\nJSON error: {ex}"
-                )
+                raise _invalid_json_error(ex)
+            except RowsFromFileBadJSON as ex:
+                raise click.ClickException(str(ex))
             if flatten:
                 docs = (_flatten(doc) for doc in docs)
 
-        if stop_after:
+        if stop_after and not list_mode:
             docs = itertools.islice(docs, stop_after)
 
-        if convert:
-            variable = "row"
-            if lines:
-                variable = "line"
-            elif text:
-                variable = "text"
-            fn = _compile_code(convert, imports, variable=variable)
-            if lines:
-                docs = (fn(doc["line"]) for doc in docs)
-            elif text:
-                # Special case: this is allowed to be an iterable
-                text_value = next(iter(docs))["text"]
-                fn_return = fn(text_value)
-                if isinstance(fn_return, dict):
-                    docs = [fn_return]
-                else:
-                    try:
-                        docs = iter(fn_return)
-                    except TypeError:
-                        raise click.ClickException(
-                            "--convert must return dict or iterator"
-                        )
+        prepare = _DocPreparer(list_mode=list_mode)
+        if convert and text:
+            fn = _compile_code(convert, imports, variable="text")
+            # Special case: this is allowed to be an iterable
+            text_value = next(iter(docs))["text"]
+            fn_return = fn(text_value)
+            if isinstance(fn_return, dict):
+                docs = [fn_return]
             else:
-                docs = (fn(doc) or doc for doc in docs)
+                try:
+                    docs = iter(fn_return)
+                except TypeError:
+                    raise click.ClickException("--convert must return dict or iterator")
+        elif convert:
+            prepare = _DocPreparer(
+                convert, imports, variable="line" if lines else "row"
+            )
 
-        _insert_docs(docs, tracker=tracker)
+        with bulk_load_context:
+            _insert_docs(docs, tracker=tracker, prepare=prepare)
 
         # Clean up open file-like objects
         if sniff_buffer:
@@ -1376,6 +1497,7 @@ def insert(
     stop_after,
     alter,
     no_detect_types,
+    detect_types_sample,
     analyze,
     load_extension,
     silent,
@@ -1386,6 +1508,9 @@ def insert(
     default,
     types,
     strict,
+    bulk_load,
+    busy_timeout,
+    workers,
 ):
     """
     Insert records from FILE into a table, creating the table if it
@@ -1473,6 +1598,7 @@ def insert(
             replace=replace,
             truncate=truncate,
             no_detect_types=no_detect_types,
+            detect_types_sample=detect_types_sample,
             analyze=analyze,
             load_extension=load_extension,
             silent=silent,
@@ -1481,6 +1607,9 @@ def insert(
             types=types,
             strict=strict,
             code=code,
+            bulk_load=bulk_load,
+            busy_timeout=busy_timeout,
+            workers=workers,
         )
     except UnicodeDecodeError as ex:
         raise click.ClickException(UNICODE_ERROR.format(ex))
@@ -1515,10 +1644,14 @@ def upsert(
     default,
     types,
     no_detect_types,
+    detect_types_sample,
     analyze,
     load_extension,
     silent,
     strict,
+    bulk_load,
+    busy_timeout,
+    workers,
 ):
     """
     Upsert records based on their primary key. Works like 'insert' but if
@@ -1566,11 +1699,15 @@ def upsert(
             default=default,
             types=types,
             no_detect_types=no_detect_types,
+            detect_types_sample=detect_types_sample,
             analyze=analyze,
             load_extension=load_extension,
             silent=silent,
             strict=strict,
             code=code,
+            bulk_load=bulk_load,
+            busy_timeout=busy_timeout,
+            workers=workers,
         )
     except UnicodeDecodeError as ex:
         raise click.ClickException(UNICODE_ERROR.format(ex))
@@ -1588,6 +1725,8 @@ def upsert(
 @functions_option
 @import_options
 @load_extension_option
+@bulk_load_option
+@busy_timeout_option
 def bulk(
     path,
     sql,
@@ -1609,6 +1748,8 @@ def bulk(
     no_headers,
     encoding,
     load_extension,
+    bulk_load,
+    busy_timeout,
 ):
     """
     Execute parameterized SQL against the provided list of documents.
@@ -1654,6 +1795,8 @@ def bulk(
             silent=False,
             bulk_sql=sql,
             functions=functions,
+            bulk_load=bulk_load,
+            busy_timeout=busy_timeout,
         )
     except (OperationalError, sqlite3.IntegrityError) as e:
         raise click.ClickException(str(e))
@@ -1672,7 +1815,8 @@ def bulk(
     "--init-spatialite", is_flag=True, help="Enable SpatiaLite on the created database"
 )
 @load_extension_option
-def create_database(path, enable_wal, init_spatialite, load_extension):
+@busy_timeout_option
+def create_database(path, enable_wal, init_spatialite, load_extension, busy_timeout):
     """Create a new empty database file
 
     Example:
@@ -1680,7 +1824,7 @@ def create_database(path, enable_wal, init_spatialite, load_extension):
     \b
         sqlite-utils create-database trees.db
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     if enable_wal:
         db.enable_wal()
@@ -1743,6 +1887,7 @@ def create_database(path, enable_wal, init_spatialite, load_extension):
     is_flag=True,
     help="Apply STRICT mode to created table",
 )
+@busy_timeout_option
 def create_table(
     path,
     table,
@@ -1756,6 +1901,7 @@ def create_table(
     transform,
     load_extension,
     strict,
+    busy_timeout,
 ):
     """
     Add a table with the specified columns. Columns should be specified using
@@ -1770,7 +1916,7 @@ def create_table(
 
     Valid column types are text, integer, real, float, blob and any.
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     if len(columns) % 2 == 1:
@@ -1815,11 +1961,12 @@ def create_table(
 @click.argument("new_table")
 @click.option("--ignore", is_flag=True, help="If table does not exist, do nothing")
 @load_extension_option
-def duplicate(path, table, new_table, ignore, load_extension):
+@busy_timeout_option
+def duplicate(path, table, new_table, ignore, load_extension, busy_timeout):
     """
     Create a duplicate of this table, copying across the schema and all row data.
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     try:
@@ -1839,11 +1986,12 @@ def duplicate(path, table, new_table, ignore, load_extension):
 @click.argument("new_name")
 @click.option("--ignore", is_flag=True, help="If table does not exist, do nothing")
 @load_extension_option
-def rename_table(path, table, new_name, ignore, load_extension):
+@busy_timeout_option
+def rename_table(path, table, new_name, ignore, load_extension, busy_timeout):
     """
     Rename this table.
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     try:
@@ -1862,7 +2010,8 @@ def rename_table(path, table, new_name, ignore, load_extension):
 @click.argument("table")
 @click.option("--ignore", is_flag=True, help="If table does not exist, do nothing")
 @load_extension_option
-def drop_table(path, table, ignore, load_extension):
+@busy_timeout_option
+def drop_table(path, table, ignore, load_extension, busy_timeout):
     """Drop the specified table
 
     Example:
@@ -1870,7 +2019,7 @@ def drop_table(path, table, ignore, load_extension):
     \b
         sqlite-utils drop-table chickens.db chickens
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     try:
@@ -1904,7 +2053,8 @@ def drop_table(path, table, ignore, load_extension):
     help="If view already exists, replace it",
 )
 @load_extension_option
-def create_view(path, view, select, ignore, replace, load_extension):
+@busy_timeout_option
+def create_view(path, view, select, ignore, replace, load_extension, busy_timeout):
     """Create a view for the provided SELECT query
 
     Example:
@@ -1913,7 +2063,7 @@ def create_view(path, view, select, ignore, replace, load_extension):
         sqlite-utils create-view chickens.db heavy_chickens \\
           'select * from chickens where weight > 3'
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     # Does view already exist?
@@ -1938,7 +2088,8 @@ def create_view(path, view, select, ignore, replace, load_extension):
 @click.argument("view")
 @click.option("--ignore", is_flag=True, help="If view does not exist, do nothing")
 @load_extension_option
-def drop_view(path, view, ignore, load_extension):
+@busy_timeout_option
+def drop_view(path, view, ignore, load_extension, busy_timeout):
     """Drop the specified view
 
     Example:
@@ -1946,7 +2097,7 @@ def drop_view(path, view, ignore, load_extension):
     \b
         sqlite-utils drop-view chickens.db heavy_chickens
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     try:
@@ -1986,6 +2137,7 @@ def drop_view(path, view, ignore, load_extension):
 )
 @functions_option
 @load_extension_option
+@busy_timeout_option
 def query(
     path,
     sql,
@@ -2004,6 +2156,7 @@ def query(
     param,
     load_extension,
     functions,
+    busy_timeout,
 ):
     """Execute SQL query and return the results as JSON
 
@@ -2022,7 +2175,7 @@ def query(
     if sql == "-":
         # Read SQL from standard input
         sql = sys.stdin.read()
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     for alias, attach_path in attach:
         db.attach(alias, attach_path)
@@ -2089,6 +2242,7 @@ def query(
     is_flag=True,
     help="Treat all CSV/TSV columns as TEXT",
 )
+@detect_types_sample_option
 @click.option("--schema", is_flag=True, help="Show SQL schema for in-memory database")
 @click.option("--dump", is_flag=True, help="Dump SQL for in-memory database")
 @click.option(
@@ -2122,6 +2276,7 @@ def memory(
     param,
     encoding,
     no_detect_types,
+    detect_types_sample,
     schema,
     dump,
     save,
@@ -2179,6 +2334,9 @@ def memory(
         else:
             file_path = pathlib.Path(path)
             stem = file_path.stem
+            if file_path.suffix.lower() in (".gz", ".bz2", ".xz"):
+                # data.csv.gz should be loaded into a table called data
+                stem = pathlib.Path(stem).stem
             if stem_counts.get(stem):
                 file_table = f"{stem}_{stem_counts[stem]}"
             else:
@@ -2188,16 +2346,20 @@ def memory(
             should_close_fp = True
         try:
             rows, format_used = rows_from_file(fp, format=format, encoding=encoding)
-            tracker = None
+            columns = None
             if format_used in (Format.CSV, Format.TSV) and not no_detect_types:
+                # Detect the types first so the table can be created with
+                # them, instead of transforming it afterwards
                 tracker = TypeTracker()
-                rows = tracker.wrap(rows)
+                rows = _detect_types_ahead(
+                    tracker.wrap(rows), tracker, detect_types_sample
+                )
+                columns = tracker.types
+                rows = _empty_to_null(rows, columns)
             if flatten:
                 rows = (_flatten(row) for row in rows)
 
-            db.table(file_table).insert_all(rows, alter=True)
-            if tracker is not None and db.table(file_table).exists():
-                db.table(file_table).transform(types=tracker.types)
+            db.table(file_table).insert_all(rows, alter=True, columns=columns)
             # Add convenient t / t1 / t2 views
             view_names = [f"t{i + 1}"]
             if i == 0:
@@ -2726,6 +2888,7 @@ def schema(
 )
 @click.option("--sql", is_flag=True, help="Output SQL without executing it")
 @load_extension_option
+@busy_timeout_option
 def transform(
     path,
     table,
@@ -2744,6 +2907,7 @@ def transform(
     strict,
     sql,
     load_extension,
+    busy_timeout,
 ):
     """Transform a table beyond the capabilities of ALTER TABLE
 
@@ -2754,7 +2918,7 @@ def transform(
             --drop column1 \\
             --rename column2 column_renamed
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     types = {}
@@ -2840,6 +3004,7 @@ def transform(
     help="Rename this column in extracted table",
 )
 @load_extension_option
+@busy_timeout_option
 def extract(
     path,
     table,
@@ -2848,6 +3013,7 @@ def extract(
     fk_column,
     rename,
     load_extension,
+    busy_timeout,
 ):
     """Extract one or more columns into a separate table
 
@@ -2856,7 +3022,7 @@ def extract(
     \b
         sqlite-utils extract trees.db Street_Trees species
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     kwargs: dict[str, Any] = {
@@ -2903,6 +3069,8 @@ def extract(
 )
 @click.option("-s", "--silent", is_flag=True, help="Don't show a progress bar")
 @load_extension_option
+@bulk_load_option
+@busy_timeout_option
 def insert_files(
     path,
     table,
@@ -2917,6 +3085,8 @@ def insert_files(
     encoding,
     silent,
     load_extension,
+    bulk_load,
+    busy_timeout,
 ):
     """
     Insert one or more files using BLOB columns in the specified table
@@ -3006,18 +3176,19 @@ def insert_files(
                         row[colname] = name
                 yield row
 
-        db = sqlite_utils.Database(path)
+        db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
         _register_db_for_cleanup(db)
         _load_extensions(db, load_extension)
         try:
-            with db.conn:
-                db.table(table).insert_all(
-                    to_insert(),
-                    pk=pks[0] if len(pks) == 1 else pks,
-                    alter=alter,
-                    replace=replace,
-                    upsert=upsert,
-                )
+            with db.bulk_load() if bulk_load else contextlib.nullcontext():
+                with db.conn:
+                    db.table(table).insert_all(
+                        to_insert(),
+                        pk=pks[0] if len(pks) == 1 else pks,
+                        alter=alter,
+                        replace=replace,
+                        upsert=upsert,
+                    )
         except UnicodeDecodeErrorForPath as e:
             raise click.ClickException(
                 UNICODE_ERROR.format(
@@ -3048,6 +3219,7 @@ def insert_files(
     "--no-least", is_flag=True, default=False, help="Skip least common values"
 )
 @load_extension_option
+@busy_timeout_option
 def analyze_tables(
     path,
     tables,
@@ -3057,6 +3229,7 @@ def analyze_tables(
     no_most,
     no_least,
     load_extension,
+    busy_timeout,
 ):
     """Analyze the columns in one or more tables
 
@@ -3065,7 +3238,7 @@ def analyze_tables(
     \b
         sqlite-utils analyze-tables data.db trees
     """
-    db = sqlite_utils.Database(path)
+    db = sqlite_utils.Database(path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     _load_extensions(db, load_extension)
     _analyze(db, tables, columns, save, common_limit, no_most, no_least)
@@ -3247,6 +3420,7 @@ def _generate_convert_help():
 @click.option("--drop", is_flag=True, help="Drop original column afterwards")
 @click.option("-s", "--silent", is_flag=True, help="Don't show a progress bar")
 @click.option("pdb_", "--pdb", is_flag=True, help="Open pdb debugger on first error")
+@busy_timeout_option
 def convert(
     db_path,
     table,
@@ -3262,9 +3436,10 @@ def convert(
     drop,
     silent,
     pdb_,
+    busy_timeout,
 ):
     sqlite3.enable_callback_tracebacks(True)
-    db = sqlite_utils.Database(db_path)
+    db = sqlite_utils.Database(db_path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     if output is not None and len(columns) > 1:
         raise click.ClickException("Cannot use --output with more than one column")
@@ -3386,6 +3561,7 @@ def convert(
 )
 @click.option("--not-null", "not_null", is_flag=True, help="Add a NOT NULL constraint.")
 @load_extension_option
+@busy_timeout_option
 def add_geometry_column(
     db_path,
     table,
@@ -3395,12 +3571,13 @@ def add_geometry_column(
     coord_dimension,
     not_null,
     load_extension,
+    busy_timeout,
 ):
     """Add a SpatiaLite geometry column to an existing table. Requires SpatiaLite extension.
     \n\n
     By default, this command will try to load the SpatiaLite extension from usual paths.
     To load it from a specific path, use --load-extension."""
-    db = sqlite_utils.Database(db_path)
+    db = sqlite_utils.Database(db_path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     if not db[table].exists():
         raise click.ClickException(
@@ -3427,13 +3604,14 @@ def add_geometry_column(
 @click.argument("table", type=str)
 @click.argument("column_name", type=str)
 @load_extension_option
-def create_spatial_index(db_path, table, column_name, load_extension):
+@busy_timeout_option
+def create_spatial_index(db_path, table, column_name, load_extension, busy_timeout):
     """Create a spatial index on a SpatiaLite geometry column.
     The table and geometry column must already exist before trying to add a spatial index.
     \n\n
     By default, this command will try to load the SpatiaLite extension from usual paths.
     To load it from a specific path, use --load-extension."""
-    db = sqlite_utils.Database(db_path)
+    db = sqlite_utils.Database(db_path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
     if not db[table].exists():
         raise click.ClickException(
@@ -3531,7 +3709,8 @@ def _stop_before_for_migration_set(stop_before, migration_set_name):
     "list_", "--list", is_flag=True, help="List migrations without running them"
 )
 @click.option("-v", "--verbose", is_flag=True, help="Show verbose output")
-def migrate(db_path, migrations, stop_before, list_, verbose):
+@busy_timeout_option
+def migrate(db_path, migrations, stop_before, list_, verbose, busy_timeout):
     """
     Apply pending database migrations.
 
@@ -3559,7 +3738,7 @@ def migrate(db_path, migrations, stop_before, list_, verbose):
 
     if list_:
         if pathlib.Path(db_path).exists():
-            db = sqlite_utils.Database(db_path)
+            db = sqlite_utils.Database(db_path, busy_timeout=busy_timeout)
         else:
             # Listing is read-only - don't create the database file
             db = sqlite_utils.Database(memory=True)
@@ -3574,7 +3753,7 @@ def migrate(db_path, migrations, stop_before, list_, verbose):
             db.rollback()
         return
 
-    db = sqlite_utils.Database(db_path)
+    db = sqlite_utils.Database(db_path, busy_timeout=busy_timeout)
     _register_db_for_cleanup(db)
 
     prev_schema = db.schema
@@ -3739,6 +3918,194 @@ def verify_is_dict(doc):
     return doc
 
 
+class _DocPreparer:
+    """
+    Turns a parsed input doc into a row ready to insert: runs the --convert
+    code, checks the result is a dictionary and decodes base64 values.
+
+    Instances can be pickled, so ``--workers`` can run them in separate
+    processes - each process compiles the --convert code again.
+    """
+
+    def __init__(self, convert=None, imports=(), variable="row", list_mode=False):
+        self.convert = convert
+        self.imports = tuple(imports)
+        self.variable = variable
+        self.list_mode = list_mode
+        self.fn = None
+        # Compile here too, so mistakes in the code are reported up front
+        self.compile()
+
+    def compile(self):
+        if self.convert is not None and self.fn is None:
+            self.fn = _compile_code(self.convert, self.imports, variable=self.variable)
+
+    def __getstate__(self):
+        # Compiled functions cannot be pickled
+        return dict(self.__dict__, fn=None)
+
+    def __call__(self, doc):
+        if self.list_mode:
+            # Lists of CSV values need no conversion or decoding
+            return doc
+        if self.fn is not None:
+            if self.variable == "line":
+                doc = self.fn(doc["line"])
+            else:
+                doc = self.fn(doc) or doc
+        # docs should all be dictionaries
+        doc = verify_is_dict(doc)
+        # Apply {"$base64": true, ...} decoding, if needed
+        return decode_base64_values(doc)
+
+
+def _csv_value_lists(reader, width, empty_null):
+    for row in reader:
+        if len(row) != width:
+            # As with dict(zip(headers, row)) extra values are ignored and
+            # missing values are null
+            row = (row + [None] * width)[:width]
+        if empty_null:
+            row = [None if cell == "" else cell for cell in row]
+        yield row
+
+
+def _detect_types_ahead(docs, tracker, sample=None):
+    # docs has been wrapped by tracker - read enough of it that tracker.types
+    # can be used to create the table, then return every doc. By default every
+    # doc is read first, holding them in a temporary file, so that no value can
+    # contradict the detected types; with sample= only the first sample docs
+    # decide the types and the rest are streamed
+    if sample is None:
+        return _SpooledRows(docs)
+    tracker.sample = sample
+    return _read_ahead(docs, sample)
+
+
+def _empty_to_null(docs, types):
+    # transform() turns empty strings into null when it converts a column to
+    # a numeric type, so do the same for tables created with those types
+    numeric = [
+        column
+        for column, ctype in types.items()
+        if ctype.upper() in ("INTEGER", "FLOAT", "REAL", "NUMERIC")
+    ]
+    docs = iter(docs)
+    first = next(docs, None)
+    if first is None:
+        return
+    if isinstance(first, list):
+        # List mode: column names followed by lists of values
+        yield first
+        indexes = [i for i, column in enumerate(first) if column in numeric]
+        for row in docs:
+            for i in indexes:
+                if row[i] == "":
+                    row[i] = None
+            yield row
+        return
+    for doc in itertools.chain([first], docs):
+        for column in numeric:
+            if doc.get(column) == "":
+                doc[column] = None
+        yield doc
+
+
+def _invalid_json_error(ex):
+    return click.ClickException(
+        f"Invalid JSON - use --csv for CSV or --tsv for TSV files\n\nJSON error: {ex}"
+    )
+
+
+def _invalid_json_errors(docs):
+    # JSON arrays are parsed as they are consumed, so errors later in the file
+    # surface part way through the insert
+    try:
+        yield from docs
+    except json.decoder.JSONDecodeError as ex:
+        raise _invalid_json_error(ex)
+
+
+_worker_prepare = None
+
+
+def _init_prepare_worker(prepare):
+    # Runs once in each --workers process
+    global _worker_prepare
+    prepare.compile()
+    _worker_prepare = prepare
+
+
+def _prepare_batch_in_worker(batch):
+    return [_worker_prepare(doc) for doc in batch]
+
+
+def _pipelined_docs(docs, prepare, workers, batch_size):
+    """
+    Yield ``prepare(doc)`` for every doc, in order. A reader thread pulls
+    batches from ``docs`` - parsing the input file - leaving the calling
+    thread free to write the results to the database.
+
+    If there is --convert code to run, batches are handed to a pool of
+    ``workers`` processes that run ``prepare()``, so the conversion is not
+    held back by the GIL. Otherwise ``prepare()`` is cheap enough to run on
+    the reader thread.
+    """
+    # Bounded, so the reader cannot get arbitrarily far ahead of the writer
+    prepared = queue.Queue(maxsize=workers * 2)
+    stop = threading.Event()
+    finished = object()
+    executor = None
+    if prepare.convert is not None:
+        # "spawn" rather than "fork", as the reader thread may be running
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_prepare_worker,
+            initargs=(prepare,),
+        )
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                prepared.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read():
+        try:
+            for batch in chunks(docs, batch_size):
+                if executor is None:
+                    item = [prepare(doc) for doc in batch]
+                else:
+                    item = executor.submit(_prepare_batch_in_worker, list(batch))
+                if not put(item):
+                    return
+            put(finished)
+        except BaseException as ex:
+            put(ex)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = prepared.get()
+            if item is finished:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            if executor is None:
+                yield from item
+            else:
+                yield from item.result()
+    finally:
+        stop.set()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
 def _load_extensions(db, load_extension):
     if load_extension:
         db.conn.enable_load_extension(True)
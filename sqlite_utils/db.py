@@ -1,23 +1,32 @@
+import array
 import binascii
 import contextlib
 import datetime
 import decimal
+import functools
 import importlib
 import inspect
 import itertools
 import json
 import os
 import pathlib
+import queue
+import random
 import re
 import secrets
 import textwrap
+import threading
+import time
 import uuid
-from collections import namedtuple
+import weakref
+from collections import OrderedDict, namedtuple
 from collections.abc import Callable, Generator, Iterable, Mapping, Sequence
-from dataclasses import dataclass, field
+from concurrent.futures import Future
+from dataclasses import dataclass, field, make_dataclass
 from types import TracebackType
 from typing import (
     Any,
+    Literal,
     TypeVar,
     Union,
     cast,
@@ -62,6 +71,36 @@ except ImportError:
 
 SQLITE_MAX_VARS = 999
 
+# Default number of extracted values remembered by insert_all(extracts=...)
+LOOKUP_CACHE_SIZE = 10000
+
+# insert_all(batch_size="auto") aims for each batch to take this many seconds
+# to write, while binding no more than AUTO_BATCH_MAX_VALUES values
+AUTO_BATCH_TARGET_SECONDS = 0.2
+AUTO_BATCH_MAX_VALUES = 100000
+
+# Rows fetched at a time by query_columns() and columns_of()
+QUERY_COLUMNS_BLOCK_SIZE = 10000
+
+# With busy_timeout= set, a locked database is retried after a random delay
+# of up to this many seconds, doubling after each attempt up to the maximum.
+# SQLite's own busy timeout is set to the maximum too, so each attempt waits
+# at most that long before the retry loop - which enforces busy_timeout - takes
+# over again
+BUSY_RETRY_INITIAL_DELAY = 0.01
+BUSY_RETRY_MAX_DELAY = 0.5
+
+# PRAGMA settings applied by Database.bulk_load()
+BULK_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "journal_mode": "MEMORY",
+    # Negative values are in KiB, so this is 256MB
+    "cache_size": -262144,
+    "temp_store": "MEMORY",
+    "locking_mode": "EXCLUSIVE",
+    "mmap_size": 268435456,
+}
+
 # Names that refer to a rowid table's implicit integer primary key. These are
 # valid primary key targets even though they are not listed among a table's
 # columns. See https://www.sqlite.org/lang_createtable.html#rowid
@@ -320,6 +359,56 @@ XIndexColumn = namedtuple(
     "XIndexColumn", ("seqno", "cid", "name", "desc", "coll", "key")
 )
 Trigger = namedtuple("Trigger", ("name", "table", "sql"))
+UpsertCounts = namedtuple("UpsertCounts", ("inserted", "updated"))
+UpsertCounts.__doc__ = """
+Number of rows inserted and updated by an upsert, see :ref:`python_api_upsert_staging`
+and :ref:`python_api_upsert_only_changed`.
+
+``inserted``
+    Number of new rows that were inserted
+
+``updated``
+    Number of existing rows that were updated
+"""
+SchemaCacheInfo = namedtuple("SchemaCacheInfo", ("hits", "misses", "currsize"))
+SchemaCacheInfo.__doc__ = """
+Statistics for the schema introspection cache, returned by
+:meth:`.Database.schema_cache_info`. See :ref:`python_api_schema_cache`.
+
+``hits``
+    Number of introspection queries answered from the cache
+
+``misses``
+    Number of introspection queries that had to be executed
+
+``currsize``
+    Number of query results currently held in the cache
+"""
+
+Page = namedtuple("Page", ("rows", "token"))
+Page.__doc__ = """
+A page of rows returned by :meth:`.Table.iter_pages`. See :ref:`python_api_iter_pages`.
+
+``rows``
+    List of rows in this page
+
+``token``
+    String that can be passed to ``iter_pages(token=)`` to continue from the
+    row after this page, or ``None`` if this is the last page
+"""
+
+BusyInfo = namedtuple("BusyInfo", ("retries", "wait_seconds"))
+BusyInfo.__doc__ = """
+Statistics for retries of locked database operations, returned by
+:meth:`.Database.busy_info`. See :ref:`python_api_busy_timeout`.
+
+``retries``
+    Number of times an operation was retried because the database was locked
+
+``wait_seconds``
+    Total time spent on operations that had to be retried, including the
+    attempts that failed and the delays between them
+"""
 
 
 class TransformError(Exception):
@@ -355,6 +444,10 @@ T = TypeVar("T")
 
 Tracer = Callable[[str, Sequence[Any] | dict[str, Any] | None], None]
 
+# Names accepted by row_factory=, in addition to the sqlite3.Row class
+ROW_FACTORIES = ("dict", "tuple", "namedtuple", "slots")
+RowFactory = Union[str, type[sqlite3.Row]]
+
 
 def _iter_complete_sql_statements(sql: str) -> Generator[str, None, None]:
     statement = []
@@ -432,6 +525,158 @@ if pd:
     COLUMN_TYPE_MAPPING.update({pd.Timestamp: "TEXT"})  # type: ignore
 
 
+def _column_sequence_type(values: Sequence[Any]) -> type:
+    # The column type for a sequence of values passed to insert_columns()
+    if isinstance(values, array.array):
+        if values.typecode in "fd":
+            return float
+        if values.typecode in "uw":
+            return str
+        return int
+    if np is not None and isinstance(values, np.ndarray):
+        if values.dtype.kind in "biu":
+            return int
+        if values.dtype.kind == "f":
+            return float
+        if values.dtype.kind == "S":
+            return bytes
+        return str
+    return types_for_column_types({"values": {type(value) for value in values}})[
+        "values"
+    ]
+
+
+def _fetch_columns(
+    keys: list[str], rows: Iterable[tuple], arrays: bool, numpy: bool
+) -> dict[str, Any]:
+    # Read row tuples in blocks, transposing each block into the columns
+    if numpy and np is None:
+        raise ImportError("numpy=True requires NumPy to be installed")
+    fetchmany: Callable[[int], list]
+    if isinstance(rows, sqlite3.Cursor):
+        fetchmany = rows.fetchmany
+    else:
+        iterator = iter(rows)
+
+        def fetchmany(size: int) -> list:
+            return list(itertools.islice(iterator, size))
+
+    columns: list[list[Any]] = [[] for _ in keys]
+    while True:
+        block = fetchmany(QUERY_COLUMNS_BLOCK_SIZE)
+        if not block:
+            break
+        for column, values in zip(columns, zip(*block)):
+            column.extend(values)
+    if numpy:
+        return {key: np.array(column) for key, column in zip(keys, columns)}
+    if arrays:
+        return {key: _column_array(column) for key, column in zip(keys, columns)}
+    return dict(zip(keys, columns))
+
+
+def _column_array(values: list[Any]) -> Union[array.array, list[Any]]:
+    types = {type(value) for value in values}
+    if types == {int}:
+        return array.array("q", values)
+    if types and types <= {int, float}:
+        return array.array("d", values)
+    return values
+
+
+def _encode_page_token(values: list[Any]) -> str:
+    return json.dumps(
+        [
+            (
+                {
+                    "$base64": True,
+                    "encoded": binascii.b2a_base64(value, newline=False).decode(),
+                }
+                if isinstance(value, bytes)
+                else value
+            )
+            for value in values
+        ]
+    )
+
+
+def _decode_page_token(token: str) -> list[Any]:
+    try:
+        values = json.loads(token)
+    except ValueError:
+        values = None
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid page token: {token!r}")
+    return [
+        (
+            binascii.a2b_base64(value["encoded"])
+            if isinstance(value, dict) and value.get("$base64") is True
+            else value
+        )
+        for value in values
+    ]
+
+
+def _is_busy_error(ex: sqlite3.OperationalError) -> bool:
+    # sqlite_errorcode is only available on Python 3.11 and later
+    errorcode = getattr(ex, "sqlite_errorcode", None)
+    if errorcode is not None:
+        # Extended codes such as SQLITE_BUSY_SNAPSHOT share the low byte
+        return errorcode & 0xFF == 5
+    return str(ex).startswith("database is locked")
+
+
+def _validate_row_factory(row_factory: RowFactory) -> None:
+    if row_factory is not sqlite3.Row and row_factory not in ROW_FACTORIES:
+        raise ValueError(
+            "row_factory must be one of {} or sqlite3.Row, got {!r}".format(
+                ", ".join(repr(name) for name in ROW_FACTORIES), row_factory
+            )
+        )
+
+
+@functools.lru_cache(maxsize=128)
+def _namedtuple_row(keys: tuple[str, ...]) -> Any:
+    # rename=True replaces column names that are not valid identifiers, or
+    # that start with an underscore, with positional names such as _1
+    return namedtuple("Row", keys, rename=True)
+
+
+@functools.lru_cache(maxsize=128)
+def _slots_row(keys: tuple[str, ...]) -> type:
+    return make_dataclass("Row", _namedtuple_row(keys)._fields, slots=True)
+
+
+def _row_converter(
+    row_factory: RowFactory, cursor: sqlite3.Cursor, keys: list[str]
+) -> Callable[[tuple], Any]:
+    # Returns a function turning a row tuple into the type chosen by row_factory
+    if row_factory == "dict":
+        return lambda row: dict(zip(keys, row))
+    elif row_factory == "tuple":
+        return tuple
+    elif row_factory == "namedtuple":
+        return _namedtuple_row(tuple(keys))._make
+    elif row_factory == "slots":
+        row_class = _slots_row(tuple(keys))
+        return lambda row: row_class(*row)
+    return functools.partial(sqlite3.Row, cursor)
+
+
+def _convert_rows(
+    row_factory: RowFactory,
+    cursor: sqlite3.Cursor,
+    keys: list[str],
+    rows: Iterable[tuple],
+) -> Generator[Any, None, None]:
+    if row_factory == "dict":
+        # The default, so skip the extra function call for every row
+        for row in rows:
+            yield dict(zip(keys, row))
+    else:
+        yield from map(_row_converter(row_factory, cursor, keys), rows)
+
+
 class AlterError(Exception):
     "Error altering table"
 
@@ -505,6 +750,7 @@ _QUERY_REJECTED_KEYWORDS = _TRANSACTION_CONTROL_KEYWORDS | {
 }
 
 
+@functools.lru_cache(maxsize=1024)
 def _first_keyword(sql: str) -> str:
     """
     Return the first keyword of a SQL statement, uppercased, skipping
@@ -535,6 +781,48 @@ def _first_keyword(sql: str) -> str:
     return sql[i:j].upper()
 
 
+_WRITE_KEYWORD_RE = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=1024)
+def _is_plain_read(sql: str) -> bool:
+    """
+    Is this SQL statement certain not to write to the database?
+
+    ``SELECT`` and ``VALUES`` statements cannot write. A ``WITH`` statement
+    counts only if it contains no ``INSERT``, ``UPDATE``, ``DELETE`` or
+    ``REPLACE`` word anywhere - a match inside a string literal or an
+    identifier just means the statement is treated as a possible write.
+    """
+    keyword = _first_keyword(sql)
+    if keyword in ("SELECT", "VALUES"):
+        return True
+    if keyword == "WITH":
+        return _WRITE_KEYWORD_RE.search(sql) is None
+    return False
+
+
+# Identifies the current schema with a single statement: the main schema
+# version, plus the temp schema itself - that is private to the connection,
+# usually empty, and has no version that can be read without a second PRAGMA
+_SCHEMA_VERSION_SQL = (
+    "select (select schema_version from pragma_schema_version), "
+    "(select group_concat(name || ':' || coalesce(sql, ''), ';') "
+    "from temp.sqlite_master)"
+)
+
+
+def _schema_operation(method: Callable) -> Callable:
+    # Decorator for Queryable methods that introspect the schema: the schema
+    # version is read once for the whole operation - see _schema_fetch()
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.db._schema_snapshot():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class Database:
     """
     Wrapper for a SQLite database connection that adds a variety of useful utility methods.
@@ -560,6 +848,17 @@ class Database:
     :param use_old_upsert: set to ``True`` to force the older upsert implementation. See
       :ref:`python_api_old_upsert`
     :param strict: Apply STRICT mode to all created tables (unless overridden)
+    :param lookup_cache_size: share a cache of up to this many extracted values
+      between every ``insert_all(extracts=...)`` call on this database. See
+      :ref:`python_api_extracts_cache`
+    :param schema_cache: set to ``False`` to disable the cache of schema
+      introspection queries. See :ref:`python_api_schema_cache`
+    :param row_factory: the type of row returned by ``.query()``, ``.rows_where()``
+      and ``.search()`` - one of ``"dict"`` (the default), ``"tuple"``,
+      ``"namedtuple"``, ``"slots"`` or ``sqlite3.Row``. See :ref:`python_api_row_factory`
+    :param busy_timeout: seconds to keep waiting for, and retrying, operations
+      that fail because another connection has the database locked. See
+      :ref:`python_api_busy_timeout`
     """
 
     _counts_table_name = "_counts"
@@ -578,7 +877,13 @@ class Database:
         execute_plugins: bool = True,
         use_old_upsert: bool = False,
         strict: bool = False,
+        lookup_cache_size: int | None = None,
+        schema_cache: bool = True,
+        row_factory: RowFactory = "dict",
+        busy_timeout: float | None = None,
     ):
+        _validate_row_factory(row_factory)
+        self.row_factory = row_factory
         self.memory_name = None
         self.memory = False
         self.use_old_upsert = use_old_upsert
@@ -626,14 +931,33 @@ class Database:
                     "autocommit=True or autocommit=False are not supported"
                 )
         self._tracer: Tracer | None = tracer
+        self._recursive_triggers = recursive_triggers
+        self._execute_plugins = execute_plugins
+        self._schema_cache_enabled = schema_cache
+        self._schema_cache: dict[tuple, tuple] = {}
+        self._schema_cache_hits = 0
+        self._schema_cache_misses = 0
+        self._schema_version: tuple | None = None
+        self._schema_snapshot_depth = 0
+        self.busy_timeout = busy_timeout
+        self._busy_retries = 0
+        self._busy_wait_seconds = 0.0
+        if busy_timeout is not None:
+            attempt_timeout = min(busy_timeout, BUSY_RETRY_MAX_DELAY)
+            self.execute(f"PRAGMA busy_timeout = {int(attempt_timeout * 1000)};")
         if recursive_triggers:
             self.execute("PRAGMA recursive_triggers=on;")
-        self._registered_functions: set = set()
+        # (name, arity) => (fn, deterministic), so pool() can register them again
+        self._registered_functions: dict[tuple[str, int], tuple[Callable, bool]] = {}
         self.use_counts_table = use_counts_table
         if execute_plugins:
             ensure_plugins_loaded()
             pm.hook.prepare_connection(conn=self.conn)
         self.strict = strict
+        self._lookup_cache: _LookupCache | None = (
+            _LookupCache(lookup_cache_size) if lookup_cache_size else None
+        )
+        self._variable_limit_value: int | None = None
 
     def __enter__(self):
         return self
@@ -657,6 +981,7 @@ class Database:
 
         Nested blocks use SQLite savepoints.
         """
+        self._schema_version = None
         if self.conn.in_transaction:
             savepoint = f"sqlite_utils_{secrets.token_hex(16)}"
             self.conn.execute(f"SAVEPOINT {savepoint};")
@@ -670,11 +995,18 @@ class Database:
                 if self.conn.in_transaction:
                     self.conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint};")
                     self.conn.execute(f"RELEASE SAVEPOINT {savepoint};")
+                self._clear_lookup_cache()
                 raise
             else:
                 self.conn.execute(f"RELEASE SAVEPOINT {savepoint};")
+            finally:
+                self._schema_version = None
         else:
-            self.conn.execute("BEGIN")
+            # With busy_timeout set, take the write lock straight away: SQLite
+            # cannot wait for a lock when a deferred transaction that has
+            # already read from the database tries to start writing
+            begin = "BEGIN" if self.busy_timeout is None else "BEGIN IMMEDIATE"
+            self._retry_busy(lambda: self.conn.execute(begin))
             try:
                 yield self
             except BaseException:
@@ -684,10 +1016,12 @@ class Database:
                 raise
             else:
                 try:
-                    self.conn.execute("COMMIT")
+                    self._retry_busy(lambda: self.conn.execute("COMMIT"))
                 except BaseException:
                     self.rollback()
                     raise
+            finally:
+                self._schema_version = None
 
     def begin(self) -> None:
         """
@@ -705,6 +1039,7 @@ class Database:
         """
         Commit the current transaction. Does nothing if no transaction is open.
         """
+        self._schema_version = None
         if self.conn.in_transaction:
             self.conn.execute("COMMIT")
 
@@ -713,8 +1048,26 @@ class Database:
         Roll back the current transaction, discarding its changes. Does nothing
         if no transaction is open.
         """
+        self._schema_version = None
         if self.conn.in_transaction:
             self.conn.execute("ROLLBACK")
+        self._clear_lookup_cache()
+
+    def _clear_lookup_cache(self) -> None:
+        # Rows may have been rolled back or deleted since they were cached, so
+        # the cache can't be trusted
+        if self._lookup_cache is not None:
+            self._lookup_cache.clear()
+
+    def _lookup_cache_version(self) -> tuple:
+        # data_version changes when another connection commits, schema_version
+        # when any table is created, dropped or altered - including by this one
+        return tuple(
+            self.conn.execute(
+                "select (select data_version from pragma_data_version), "
+                "(select schema_version from pragma_schema_version)"
+            ).fetchone()
+        )
 
     @contextlib.contextmanager
     def ensure_autocommit_on(self) -> Generator[None, None, None]:
@@ -837,7 +1190,7 @@ class Database:
                     pass
             if not registered:
                 self.conn.create_function(fn_name, arity, fn, **kwargs)
-            self._registered_functions.add((fn_name, arity))
+            self._registered_functions[(fn_name, arity)] = (fn, deterministic)
             return fn
 
         if fn is None:
@@ -846,6 +1199,62 @@ class Database:
             register(fn)
             return None
 
+    def pool(self) -> "DatabasePool":
+        """
+        Create a :ref:`DatabasePool <reference_db_database_pool>` for using this
+        database file from multiple threads, with a read connection for each thread
+        and a single shared write connection. Enables WAL mode.
+
+        See :ref:`python_api_pool`.
+
+        :raises ValueError: for an in-memory database
+        """
+        return DatabasePool(self)
+
+    def write_queue(
+        self, max_delay: float = 0.01, max_operations: int = 1000
+    ) -> "WriteQueue":
+        """
+        Start a :ref:`WriteQueue <reference_db_write_queue>`: a background thread
+        that makes writes submitted from any thread, committing them in groups.
+
+        See :ref:`python_api_write_queue`.
+
+        :param max_delay: Maximum time in seconds to wait for more operations
+          before committing the operations already received
+        :param max_operations: Maximum number of operations in a single transaction
+        :raises ValueError: for an in-memory database
+        """
+        return WriteQueue(self, max_delay=max_delay, max_operations=max_operations)
+
+    def _filename(self, method: str) -> str:
+        # Path to the database file, for methods that open more connections to it
+        files = [
+            row[2] for row in self.execute("PRAGMA database_list") if row[1] == "main"
+        ]
+        if self.memory or not files or not files[0]:
+            raise ValueError(f"{method} can only be used with a database file")
+        return files[0]
+
+    def _connect_again(self, conn: sqlite3.Connection) -> "Database":
+        # A Database for another connection to the same file, with the same
+        # options and registered functions as this one
+        db = Database(
+            conn,
+            recursive_triggers=self._recursive_triggers,
+            tracer=self._tracer,
+            use_counts_table=self.use_counts_table,
+            execute_plugins=self._execute_plugins,
+            use_old_upsert=self.use_old_upsert,
+            strict=self.strict,
+            schema_cache=self._schema_cache_enabled,
+            row_factory=self.row_factory,
+            busy_timeout=self.busy_timeout,
+        )
+        for (name, _), (fn, deterministic) in self._registered_functions.items():
+            db.register_function(fn, deterministic=deterministic, name=name)
+        return db
+
     def register_fts4_bm25(self) -> None:
         "Register the ``rank_bm25(match_info)`` function used for calculating relevance with SQLite FTS4."
         self.register_function(rank_bm25, deterministic=True, replace=True)
@@ -863,10 +1272,15 @@ class Database:
             ATTACH DATABASE '{pathlib.Path(filepath).resolve()!s}' AS {quote_identifier(alias)};
         """.strip()
         self.execute(attach_sql)
+        # Unqualified table names can now resolve to the attached database
+        self.clear_schema_cache()
 
     def query(
-        self, sql: str, params: Sequence | dict[str, Any] | None = None
-    ) -> Generator[dict, None, None]:
+        self,
+        sql: str,
+        params: Sequence | dict[str, Any] | None = None,
+        row_factory: RowFactory | None = None,
+    ) -> Generator[Any, None, None]:
         """
         Execute ``sql`` and return an iterable of dictionaries representing each row.
 
@@ -878,6 +1292,8 @@ class Database:
         :param sql: SQL query to execute
         :param params: Parameters to use in that query - an iterable for ``where id = ?``
           parameters, or a dictionary for ``where id = :id``
+        :param row_factory: Return rows as this type instead of the database's
+          ``row_factory`` - see :ref:`python_api_row_factory`
         :raises ValueError: if the SQL statement does not return rows - use
           :meth:`execute` for those statements instead. The rejected statement
           is rolled back, so it has no effect on the database. One exception:
@@ -885,8 +1301,43 @@ class Database:
           ``ValueError``, because PRAGMAs run outside the savepoint guard -
           some of them refuse to run inside a transaction
         """
+        row_factory = self._resolve_row_factory(row_factory)
+        cursor, keys, rows = self._query_rows(sql, params, "query()")
+        return _convert_rows(row_factory, cursor, keys, rows)
+
+    def query_columns(
+        self,
+        sql: str,
+        params: Sequence | dict[str, Any] | None = None,
+        arrays: bool = False,
+        numpy: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Execute ``sql`` and return a dictionary mapping each column name to a list
+        of the values in that column, instead of a dictionary for every row.
+
+        Rows are fetched in blocks of ``QUERY_COLUMNS_BLOCK_SIZE`` and split into
+        columns without creating an object for each row.
+        See :ref:`python_api_query_columns`.
+
+        :param sql: SQL query to execute
+        :param params: Parameters to use in that query - an iterable for ``where id = ?``
+          parameters, or a dictionary for ``where id = :id``
+        :param arrays: Return columns that only contain integers or floats as
+          ``array.array`` objects instead of lists
+        :param numpy: Return every column as a NumPy array - requires NumPy
+        :raises ValueError: if the SQL statement does not return rows
+        """
+        _, keys, rows = self._query_rows(sql, params, "query_columns()")
+        return _fetch_columns(keys, rows, arrays, numpy)
+
+    def _query_rows(
+        self, sql: str, params: Sequence | dict[str, Any] | None, method: str
+    ) -> tuple[sqlite3.Cursor, list[str], Iterable[tuple]]:
+        # Execute SQL for query() and query_columns(), returning the cursor,
+        # the column names and the cursor (or list) to read row tuples from
         message = (
-            "query() can only be used with SQL that returns rows - "
+            f"{method} can only be used with SQL that returns rows - "
             "use execute() for other statements"
         )
         keyword = _first_keyword(sql)
@@ -895,6 +1346,7 @@ class Database:
             raise ValueError(message)
         if self._tracer:
             self._tracer(sql, params)
+        self._schema_version = None
         args: tuple = (params,) if params is not None else ()
         if keyword == "PRAGMA":
             # Some PRAGMA statements refuse to run inside a transaction, so
@@ -908,8 +1360,12 @@ class Database:
                     cursor = self.conn.execute(sql, *args)
             if cursor.description is None:
                 raise ValueError(message)
-            keys = dedupe_keys(d[0] for d in cursor.description)
-            return (dict(zip(keys, row)) for row in cursor)
+            return cursor, dedupe_keys(d[0] for d in cursor.description), cursor
+        if _is_plain_read(sql):
+            # Nothing to roll back and no write to complete, so the savepoint
+            # guard below would just cost two extra statements
+            cursor = self.conn.execute(sql, *args)
+            return cursor, dedupe_keys(d[0] for d in cursor.description), cursor
         # Execute inside a savepoint, so a statement that turns out not to
         # return rows can be rolled back before the ValueError is raised
         self.conn.execute('SAVEPOINT "sqlite_utils_query"')
@@ -931,8 +1387,8 @@ class Database:
                 fetched = cursor.fetchall()
                 self.conn.execute('RELEASE "sqlite_utils_query"')
                 released = True
-                return (dict(zip(keys, row)) for row in fetched)
-            return (dict(zip(keys, row)) for row in cursor)
+                return cursor, keys, fetched
+            return cursor, keys, cursor
         finally:
             if not released and self.conn.in_transaction:
                 # An error occurred - undo anything the statement changed.
@@ -942,6 +1398,12 @@ class Database:
                 self.conn.execute('ROLLBACK TO "sqlite_utils_query"')
                 self.conn.execute('RELEASE "sqlite_utils_query"')
 
+    def _resolve_row_factory(self, row_factory: RowFactory | None) -> RowFactory:
+        if row_factory is None:
+            return self.row_factory
+        _validate_row_factory(row_factory)
+        return row_factory
+
     def execute(
         self, sql: str, parameters: Sequence | dict[str, Any] | None = None
     ) -> sqlite3.Cursor:
@@ -959,19 +1421,27 @@ class Database:
         """
         if self._tracer:
             self._tracer(sql, parameters)
+        self._schema_version = None
+        if self._schema_cache and _first_keyword(sql) in ("ATTACH", "DETACH"):
+            self.clear_schema_cache()
         was_in_transaction = self.conn.in_transaction
-        try:
-            if parameters is not None:
-                cursor = self.conn.execute(sql, parameters)
-            else:
-                cursor = self.conn.execute(sql)
-        except Exception:
-            if not was_in_transaction and self.conn.in_transaction:
-                # The failed statement opened an implicit transaction that
-                # nothing would ever commit - roll it back, otherwise it
-                # would capture every subsequent write
-                self.conn.execute("ROLLBACK")
-            raise
+
+        def run() -> sqlite3.Cursor:
+            try:
+                if parameters is not None:
+                    return self.conn.execute(sql, parameters)
+                return self.conn.execute(sql)
+            except Exception:
+                if not was_in_transaction and self.conn.in_transaction:
+                    # The failed statement opened an implicit transaction that
+                    # nothing would ever commit - roll it back, otherwise it
+                    # would capture every subsequent write
+                    self.conn.execute("ROLLBACK")
+                raise
+
+        # A statement can only be retried safely if it is not part of a
+        # transaction - a retry cannot bring back an earlier statement's locks
+        cursor = run() if was_in_transaction else self._retry_busy(run)
         if (
             not was_in_transaction
             and self.conn.in_transaction
@@ -981,6 +1451,72 @@ class Database:
             # The statement opened an implicit transaction - commit it, so
             # that execute() behaves consistently with the rest of the
             # library and identically across connection modes
+            self._retry_busy(lambda: self.conn.execute("COMMIT"))
+        return cursor
+
+    def _retry_busy(self, fn: Callable[[], T]) -> T:
+        # Call fn(), retrying with a randomized exponential backoff for up to
+        # busy_timeout seconds for as long as it fails with SQLITE_BUSY
+        if self.busy_timeout is None:
+            return fn()
+        start = time.monotonic()
+        delay = BUSY_RETRY_INITIAL_DELAY
+        retried = False
+        try:
+            while True:
+                try:
+                    return fn()
+                except sqlite3.OperationalError as ex:
+                    remaining = start + self.busy_timeout - time.monotonic()
+                    if not _is_busy_error(ex) or remaining <= 0:
+                        raise
+                    time.sleep(min(remaining, random.uniform(delay / 2, delay)))
+                    delay = min(delay * 2, BUSY_RETRY_MAX_DELAY)
+                    self._busy_retries += 1
+                    retried = True
+        finally:
+            if retried:
+                self._busy_wait_seconds += time.monotonic() - start
+
+    def busy_info(self) -> BusyInfo:
+        """
+        How many operations have been retried because the database was locked,
+        and the time spent on them, as a :class:`BusyInfo` named tuple. See
+        :ref:`python_api_busy_timeout`.
+        """
+        return BusyInfo(self._busy_retries, self._busy_wait_seconds)
+
+    def executemany(
+        self,
+        sql: str,
+        seq_of_parameters: Iterable[Sequence | dict[str, Any]],
+    ) -> sqlite3.Cursor:
+        """
+        Execute a single SQL statement once for each set of parameters in
+        ``seq_of_parameters`` and return the ``sqlite3.Cursor``.
+
+        The statement is prepared once and reused for every set of parameters.
+        Writes are committed automatically in the same way as :ref:`execute()
+        <python_api_execute>`.
+
+        :param sql: SQL statement to execute
+        :param seq_of_parameters: Iterable of parameters to use for each execution -
+          each item can be a sequence for ``?`` parameters or a dictionary for
+          ``:name`` parameters
+        """
+        if self._tracer:
+            # The tracer must not consume a generator before it is executed
+            seq_of_parameters = list(seq_of_parameters)
+            self._tracer(sql, seq_of_parameters)
+        self._schema_version = None
+        was_in_transaction = self.conn.in_transaction
+        try:
+            cursor = self.conn.executemany(sql, seq_of_parameters)
+        except Exception:
+            if not was_in_transaction and self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+        if not was_in_transaction and self.conn.in_transaction:
             self.conn.execute("COMMIT")
         return cursor
 
@@ -995,6 +1531,7 @@ class Database:
         return self._executescript(sql)
 
     def _executescript(self, sql: str) -> sqlite3.Cursor:
+        self._schema_version = None
         if self.conn.in_transaction:
             cursor = self.conn.cursor()
             # avoid sqlite3.executescript()'s implicit commit:
@@ -1088,6 +1625,73 @@ class Database:
 
         return self.quote(value)
 
+    def schema_cache_info(self) -> SchemaCacheInfo:
+        """
+        Hit and miss statistics for the schema introspection cache, as a
+        :class:`SchemaCacheInfo` named tuple. See :ref:`python_api_schema_cache`.
+        """
+        return SchemaCacheInfo(
+            self._schema_cache_hits,
+            self._schema_cache_misses,
+            len(self._schema_cache),
+        )
+
+    def clear_schema_cache(self) -> None:
+        "Discard all cached schema introspection results and reset the statistics."
+        self._schema_cache.clear()
+        self._schema_cache_hits = 0
+        self._schema_cache_misses = 0
+        self._schema_version = None
+
+    @contextlib.contextmanager
+    def _schema_snapshot(self) -> Generator[None, None, None]:
+        # Within this block the schema version is read at most once, and read
+        # again only after this library executes another statement - execute()
+        # and friends reset _schema_version. Nothing outside the library runs
+        # during an operation, so nothing else can change the schema
+        if not self._schema_snapshot_depth:
+            self._schema_version = None
+        self._schema_snapshot_depth += 1
+        try:
+            yield
+        finally:
+            self._schema_snapshot_depth -= 1
+            if not self._schema_snapshot_depth:
+                self._schema_version = None
+
+    def _current_schema_version(self) -> tuple:
+        if self._schema_snapshot_depth and self._schema_version is not None:
+            return self._schema_version
+        # Not passed to the tracer, this runs before introspection queries
+        version = tuple(self.conn.execute(_SCHEMA_VERSION_SQL).fetchone())
+        if self._schema_snapshot_depth:
+            self._schema_version = version
+        return version
+
+    def _schema_fetch(
+        self, sql: str, params: Sequence | None = None
+    ) -> tuple[tuple[str, ...], list[tuple]]:
+        # Run an introspection query, returning (column_names, rows) - cached
+        # until PRAGMA schema_version shows that the schema has changed
+        if not self._schema_cache_enabled:
+            cursor = self.execute(sql, params)
+            return tuple(d[0] for d in cursor.description), cursor.fetchall()
+        version = self._current_schema_version()
+        key = (sql, tuple(params) if params is not None else None)
+        cached = self._schema_cache.get(key)
+        if cached is not None and cached[0] == version:
+            self._schema_cache_hits += 1
+            return cached[1], cached[2]
+        self._schema_cache_misses += 1
+        cursor = self.execute(sql, params)
+        names = tuple(d[0] for d in cursor.description)
+        rows = cursor.fetchall()
+        self._schema_cache[key] = (version, names, rows)
+        if self._schema_snapshot_depth:
+            # Introspection queries do not change the schema
+            self._schema_version = version
+        return names, rows
+
     def table_names(self, fts4: bool = False, fts5: bool = False) -> list[str]:
         """
         List of string table names in this database.
@@ -1101,15 +1705,15 @@ class Database:
         if fts5:
             where.append("sql like '%USING FTS5%'")
         sql = "select name from sqlite_master where {}".format(" AND ".join(where))
-        return [r[0] for r in self.execute(sql).fetchall()]
+        return [r[0] for r in self._schema_fetch(sql)[1]]
 
     def view_names(self) -> list[str]:
         "List of string view names in this database."
         return [
             r[0]
-            for r in self.execute(
+            for r in self._schema_fetch(
                 "select name from sqlite_master where type = 'view'"
-            ).fetchall()
+            )[1]
         ]
 
     @property
@@ -1127,9 +1731,9 @@ class Database:
         "List of ``(name, table_name, sql)`` tuples representing triggers in this database."
         return [
             Trigger(*r)
-            for r in self.execute(
+            for r in self._schema_fetch(
                 "select name, tbl_name, sql from sqlite_master where type = 'trigger'"
-            ).fetchall()
+            )[1]
         ]
 
     @property
@@ -1227,6 +1831,85 @@ class Database:
             with self.ensure_autocommit_on():
                 self.execute("PRAGMA journal_mode=delete;")
 
+    def _variable_limit(self) -> int:
+        # Maximum number of ? parameters in a single SQL statement
+        if self._variable_limit_value is None:
+            try:
+                self._variable_limit_value = self.conn.getlimit(  # type: ignore
+                    sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER  # type: ignore
+                )
+            except AttributeError:
+                # Connection.getlimit() was added in Python 3.11
+                self._variable_limit_value = SQLITE_MAX_VARS
+        return self._variable_limit_value
+
+    @contextlib.contextmanager
+    def bulk_load(self, **pragmas: Any) -> Generator["Database", None, None]:
+        """
+        Context manager that applies PRAGMA settings tuned for loading large
+        amounts of data, then restores the previous settings when the block
+        exits - including if it raises an exception.
+
+        Usage::
+
+            with db.bulk_load():
+                db.table("big").insert_all(rows)
+
+        Pass keyword arguments to override the settings in
+        ``BULK_LOAD_PRAGMAS``, for example ``db.bulk_load(cache_size=-64000)``,
+        or pass ``None`` to leave a setting unchanged. See
+        :ref:`python_api_bulk_load`.
+
+        :param pragmas: PRAGMA names and the values to use for them
+        :raises TransactionError: if called while a transaction is open
+        """
+        for name in pragmas:
+            if not re.match(r"^[a-z_]+$", name):
+                raise ValueError(f"Invalid PRAGMA name: {name!r}")
+        self._ensure_no_open_transaction("bulk_load()")
+        settings = {
+            name: value
+            for name, value in dict(BULK_LOAD_PRAGMAS, **pragmas).items()
+            if value is not None
+        }
+        if "journal_mode" not in pragmas and self.journal_mode in (
+            "wal",
+            "memory",
+            "off",
+        ):
+            # Leaving WAL mode needs exclusive access to the database, and
+            # in-memory databases cannot switch to an on-disk journal
+            settings.pop("journal_mode", None)
+        previous = {}
+        for name in settings:
+            row = self.execute(f"PRAGMA {name};").fetchone()
+            if row is not None:
+                previous[name] = row[0]
+        applied = []
+        try:
+            for name, value in settings.items():
+                self._set_pragma(name, value)
+                applied.append(name)
+            yield self
+        finally:
+            for name in reversed(applied):
+                if name in previous:
+                    self._set_pragma(name, previous[name])
+            if "locking_mode" in applied:
+                # Dropping out of EXCLUSIVE mode only releases the lock the
+                # next time the database file is read
+                self.conn.execute("select count(*) from sqlite_master").fetchone()
+
+    def _set_pragma(self, name: str, value: Any) -> None:
+        if isinstance(value, str) and not re.match(r"^[A-Za-z_]+$", value):
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+        sql = f"PRAGMA {name}={value};"
+        if name == "journal_mode":
+            with self.ensure_autocommit_on():
+                self.execute(sql)
+        else:
+            self.execute(sql)
+
     def _ensure_no_open_transaction(self, operation: str) -> None:
         # Changing journal mode assigns conn.isolation_level, which commits
         # any open transaction as a side effect - breaking the rollback
@@ -1285,7 +1968,7 @@ class Database:
     def execute_returning_dicts(
         self, sql: str, params: Sequence | dict[str, Any] | None = None
     ) -> list[dict]:
-        return list(self.query(sql, params))
+        return list(self.query(sql, params, row_factory="dict"))
 
     def resolve_foreign_keys(
         self, name: str, foreign_keys: ForeignKeysType
@@ -2094,6 +2777,291 @@ class Database:
         return result and bool(result[0])
 
 
+class DatabasePool:
+    """
+    Connections to a single database file that can be shared between threads.
+
+    Each thread reading from the pool gets its own read-only connection, created
+    the first time that thread calls :meth:`reader` and closed when that thread
+    exits. Writes are made using a
+    single write connection, one thread at a time. Create a pool using
+    :meth:`Database.pool`::
+
+        pool = db.pool()
+        rows = list(pool.reader().query("select * from dogs"))
+        with pool.write() as writer:
+            writer.table("dogs").insert({"name": "Cleo"})
+
+    :param db: ``Database`` for the file - its options, and any functions
+      registered using :meth:`Database.register_function`, are copied to
+      every connection the pool creates
+    """
+
+    def __init__(self, db: Database):
+        self._db = db
+        self._path = db._filename("pool()")
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._connections_lock = threading.Lock()
+        self._connections: list[Database] = []
+        self.writer = self._connect(
+            sqlite3.connect(self._path, check_same_thread=False)
+        )
+        self.writer.enable_wal()
+
+    def _connect(self, conn: sqlite3.Connection) -> Database:
+        db = self._db._connect_again(conn)
+        with self._connections_lock:
+            self._connections.append(db)
+        return db
+
+    def reader(self) -> Database:
+        """
+        The read-only ``Database`` for the current thread, created the first time
+        this is called from that thread.
+        """
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            uri = pathlib.Path(self._path).as_uri() + "?mode=ro"
+            db = self._connect(sqlite3.connect(uri, uri=True, check_same_thread=False))
+            holder = self._local.holder = _ThreadReader(db)
+            # Thread-local values are discarded when their thread exits, so
+            # short-lived threads do not leave their connections open
+            weakref.finalize(holder, self._release, db)
+        return holder.db
+
+    def _release(self, db: Database) -> None:
+        with self._connections_lock:
+            if db not in self._connections:
+                # Already closed by close()
+                return
+            self._connections.remove(db)
+        db.close()
+
+    @contextlib.contextmanager
+    def write(self) -> Generator[Database, None, None]:
+        """
+        Context manager that waits for any other thread to finish writing, then
+        yields the write ``Database`` inside a transaction. The transaction is
+        committed when the block exits, or rolled back if it raises an exception.
+        """
+        with self._write_lock:
+            with self.writer.atomic():
+                yield self.writer
+
+    def query(
+        self,
+        sql: str,
+        params: Sequence | dict[str, Any] | None = None,
+        row_factory: RowFactory | None = None,
+    ) -> Generator[Any, None, None]:
+        """
+        Execute ``sql`` using this thread's read connection - see :meth:`Database.query`.
+
+        :param sql: SQL query to execute
+        :param params: Parameters to use in that query
+        :param row_factory: Return rows as this type - see :ref:`python_api_row_factory`
+        """
+        return self.reader().query(sql, params, row_factory=row_factory)
+
+    def close(self) -> None:
+        "Close every connection created by this pool."
+        with self._connections_lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+        # Forget the read connections that were assigned to each thread
+        self._local = threading.local()
+
+    def __enter__(self) -> "DatabasePool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class _ThreadReader:
+    # Holds a thread's read connection in DatabasePool._local
+    __slots__ = ("db", "__weakref__")
+
+    def __init__(self, db: Database):
+        self.db = db
+
+
+class WriteQueue:
+    """
+    Makes writes submitted from any number of threads using a single background
+    thread with its own connection, committing them in groups - one transaction
+    for every ``max_operations`` operations or ``max_delay`` seconds, whichever
+    comes first. Create one using :meth:`Database.write_queue`::
+
+        with db.write_queue() as writes:
+            future = writes.insert("dogs", {"name": "Cleo"})
+            print(future.result())  # The last_pk of the inserted row
+
+    Each method returns a ``concurrent.futures.Future`` that resolves to the
+    ``last_pk`` of that write once its transaction has been committed. An
+    operation that raises an exception only fails its own future - it is rolled
+    back to a savepoint, and the rest of its group is still committed.
+
+    ``transactions`` is the number of transactions committed so far.
+
+    :param db: ``Database`` for the file - its options and registered functions
+      are copied to the background thread's connection
+    :param max_delay: Maximum time in seconds to wait for more operations
+    :param max_operations: Maximum number of operations in a single transaction
+    """
+
+    def __init__(
+        self, db: Database, max_delay: float = 0.01, max_operations: int = 1000
+    ):
+        self._db = db
+        self._path = db._filename("write_queue()")
+        self.max_delay = max_delay
+        self.max_operations = max_operations
+        self.transactions = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        # Connect here so connection errors are raised to the caller, but only
+        # ever use this connection from the background thread
+        self._writer = db._connect_again(
+            sqlite3.connect(self._path, check_same_thread=False)
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="sqlite-utils-write-queue", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "WriteQueue":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _submit(self, method: str, table: str, args: tuple, kwargs: dict) -> Future:
+        future: Future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("Cannot submit writes to a closed write queue")
+            self._queue.put((future, method, table, args, kwargs))
+        return future
+
+    def insert(self, table: str, record: dict[str, Any], **kwargs: Any) -> Future:
+        """
+        Insert a record, see :meth:`Table.insert`.
+
+        :param table: Name of the table
+        :param record: Dictionary to insert
+        :param kwargs: Other arguments for :meth:`Table.insert`
+        """
+        return self._submit("insert", table, (record,), kwargs)
+
+    def upsert(self, table: str, record: dict[str, Any], **kwargs: Any) -> Future:
+        """
+        Upsert a record, see :meth:`Table.upsert`.
+
+        :param table: Name of the table
+        :param record: Dictionary to upsert
+        :param kwargs: Other arguments for :meth:`Table.upsert`, including ``pk=``
+        """
+        return self._submit("upsert", table, (record,), kwargs)
+
+    def update(
+        self, table: str, pk_values: Any, updates: dict[str, Any], **kwargs: Any
+    ) -> Future:
+        """
+        Update a row, see :meth:`Table.update`. The future fails with
+        ``NotFoundError`` if there is no row with that primary key.
+
+        :param table: Name of the table
+        :param pk_values: Primary key of the row to update
+        :param updates: Dictionary of new values
+        :param kwargs: Other arguments for :meth:`Table.update`
+        """
+        return self._submit("update", table, (pk_values, updates), kwargs)
+
+    def flush(self) -> None:
+        "Wait until every operation submitted so far has been committed."
+        self._submit("flush", "", (), {}).result()
+
+    def close(self) -> None:
+        "Commit any outstanding operations, then stop the background thread."
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        db = self._writer
+        tables: dict[str, Table] = {}
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                # flush() commits straight away instead of waiting for more
+                while len(batch) < self.max_operations and batch[-1][1] != "flush":
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._write(db, tables, batch)
+        finally:
+            db.close()
+
+    def _write(self, db: Database, tables: dict[str, "Table"], batch: list) -> None:
+        results = []
+        try:
+            with db.atomic():
+                for future, method, table_name, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    if method == "flush":
+                        results.append((future, None))
+                        continue
+                    try:
+                        if table_name not in tables:
+                            tables[table_name] = db.table(table_name)
+                        table = tables[table_name]
+                        # A savepoint, so a failure only undoes this operation
+                        with db.atomic():
+                            getattr(table, method)(*args, **kwargs)
+                    except Exception as ex:
+                        future.set_exception(ex)
+                    else:
+                        results.append((future, table.last_pk))
+        except Exception as ex:
+            for future, _ in results:
+                future.set_exception(ex)
+            return
+        self.transactions += 1
+        for future, result in results:
+            future.set_result(result)
+
+
 class Queryable:
     db: "Database"
     name: str
@@ -2145,7 +3113,8 @@ class Queryable:
         select: str = "*",
         limit: int | None = None,
         offset: int | None = None,
-    ) -> Generator[dict[str, Any], None, None]:
+        row_factory: RowFactory | None = None,
+    ) -> Generator[Any, None, None]:
         """
         Iterate over every row in this table or view that matches the specified where clause.
 
@@ -2158,9 +3127,60 @@ class Queryable:
         :param select: Comma-separated list of columns to select - defaults to ``*``
         :param limit: Integer number of rows to limit to
         :param offset: Integer for SQL offset
+        :param row_factory: Return rows as this type instead of the database's
+          ``row_factory`` - see :ref:`python_api_row_factory`
         """
+        row_factory = self.db._resolve_row_factory(row_factory)
         if not self.exists():
             return
+        sql = self._rows_where_sql(where, order_by, select, limit, offset)
+        cursor = self.db.execute(sql, where_args or [])
+        columns = dedupe_keys(c[0] for c in cursor.description)
+        yield from _convert_rows(row_factory, cursor, columns, cursor)
+
+    def columns_of(
+        self,
+        where: str | None = None,
+        where_args: Sequence | dict[str, Any] | None = None,
+        order_by: str | None = None,
+        select: str = "*",
+        limit: int | None = None,
+        offset: int | None = None,
+        arrays: bool = False,
+        numpy: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Like ``.rows_where()`` but returns a dictionary mapping each column name to a
+        list of that column's values, without creating a dictionary for every row.
+
+        See :ref:`python_api_query_columns` for more details.
+
+        :param where: SQL where fragment to use, for example ``id > ?``
+        :param where_args: Parameters to use with that fragment - an iterable for ``id > ?``
+          parameters, or a dictionary for ``id > :id``
+        :param order_by: Column or fragment of SQL to order by
+        :param select: Comma-separated list of columns to select - defaults to ``*``
+        :param limit: Integer number of rows to limit to
+        :param offset: Integer for SQL offset
+        :param arrays: Return columns that only contain integers or floats as
+          ``array.array`` objects instead of lists
+        :param numpy: Return every column as a NumPy array - requires NumPy
+        """
+        if not self.exists():
+            return {}
+        sql = self._rows_where_sql(where, order_by, select, limit, offset)
+        cursor = self.db.execute(sql, where_args or [])
+        keys = dedupe_keys(c[0] for c in cursor.description)
+        return _fetch_columns(keys, cursor, arrays, numpy)
+
+    def _rows_where_sql(
+        self,
+        where: str | None,
+        order_by: str | None,
+        select: str,
+        limit: int | None,
+        offset: int | None,
+    ) -> str:
         sql = f"select {select} from {quote_identifier(self.name)}"
         if where is not None:
             sql += " where " + where
@@ -2174,10 +3194,7 @@ class Queryable:
             if limit is None:
                 sql += " limit -1"
             sql += f" offset {offset}"
-        cursor = self.db.execute(sql, where_args or [])
-        columns = dedupe_keys(c[0] for c in cursor.description)
-        for row in cursor:
-            yield dict(zip(columns, row))
+        return sql
 
     def pks_and_rows_where(
         self,
@@ -2186,7 +3203,8 @@ class Queryable:
         order_by: str | None = None,
         limit: int | None = None,
         offset: int | None = None,
-    ) -> Generator[tuple[Any, dict[str, Any]], None, None]:
+        row_factory: RowFactory | None = None,
+    ) -> Generator[tuple[Any, Any], None, None]:
         """
         Like ``.rows_where()`` but returns ``(pk, row)`` pairs - ``pk`` can be a single value or tuple.
 
@@ -2197,44 +3215,51 @@ class Queryable:
         :param select: Comma-separated list of columns to select - defaults to ``*``
         :param limit: Integer number of rows to limit to
         :param offset: Integer for SQL offset
+        :param row_factory: Return rows as this type instead of the database's
+          ``row_factory`` - see :ref:`python_api_row_factory`
         """
-        # This method is defined on Queryable so it serves views too, which
+        row_factory = self.db._resolve_row_factory(row_factory)
+        if not self.exists():
+            return
+        # This method is defined on Queryable so it serves views too, which
         # have no pks property - sort pk columns into declaration order here
+        columns = self.columns
         pk_columns = sorted(
-            (column for column in self.columns if column.is_pk),
+            (column for column in columns if column.is_pk),
             key=lambda column: column.is_pk,
         )
-        pks = [column.name for column in pk_columns]
-        select_parts = [quote_identifier(column.name) for column in self.columns]
-        if not pks:
+        select_parts = [quote_identifier(column.name) for column in columns]
+        # Primary key values are read from the row tuple by position, so they
+        # work whichever row_factory is used
+        pk_indexes = [columns.index(column) for column in pk_columns]
+        if not pk_indexes:
             # rowid is left unquoted: it is not a real column, and SQLite
             # turns a double-quoted identifier that does not resolve into a
             # string literal - on a view that would silently select the
             # string 'rowid' instead of raising an error
             select_parts.insert(0, "rowid")
-            pks = ["rowid"]
-        select = ",".join(select_parts)
-        for row in self.rows_where(
-            select=select,
-            where=where,
-            where_args=where_args,
-            order_by=order_by,
-            limit=limit,
-            offset=offset,
-        ):
-            row_pk = tuple(row[pk] for pk in pks)
+            pk_indexes = [0]
+        sql = self._rows_where_sql(
+            where, order_by, ",".join(select_parts), limit, offset
+        )
+        cursor = self.db.execute(sql, where_args or [])
+        keys = dedupe_keys(c[0] for c in cursor.description)
+        convert = _row_converter(row_factory, cursor, keys)
+        for row in cursor:
+            row_pk = tuple(row[index] for index in pk_indexes)
             if len(row_pk) == 1:
                 row_pk = row_pk[0]
-            yield row_pk, row
+            yield row_pk, convert(row)
 
     @property
+    @_schema_operation
     def columns(self) -> list["Column"]:
         "List of :ref:`Columns <reference_db_other_column>` representing the columns in this table or view."
         if not self.exists():
             return []
-        rows = self.db.execute(
+        rows = self.db._schema_fetch(
             f"PRAGMA table_info({quote_identifier(self.name)})"
-        ).fetchall()
+        )[1]
         return [Column(*row) for row in rows]
 
     @property
@@ -2245,9 +3270,9 @@ class Queryable:
     @property
     def schema(self) -> str:
         "SQL schema for this table or view."
-        return self.db.execute(
+        return self.db._schema_fetch(
             "select sql from sqlite_master where name = ?", (self.name,)
-        ).fetchone()[0]
+        )[1][0][0]
 
 
 class Table(Queryable):
@@ -2264,7 +3289,7 @@ class Table(Queryable):
     :param column_order: List of column names in the order they should be in the table
     :param not_null: List of columns that cannot be null
     :param defaults: Dictionary of column names and default values
-    :param batch_size: Integer number of rows to insert at a time
+    :param batch_size: Integer number of rows to insert at a time, or ``"auto"``
     :param hash_id: Name of a column to create and use as a primary key, where the
       value of that primary key is derived from a hash of the row values
     :param hash_id_columns: List of columns to use for the hash_id
@@ -2281,6 +3306,9 @@ class Table(Queryable):
     last_rowid: int | None = None
     #: The primary key of the last inserted, updated or selected row.
     last_pk: Any | None = None
+    #: Rows inserted and updated by the last upsert that used ``staging=True``
+    #: or ``only_changed=True``
+    last_upsert_counts: UpsertCounts | None = None
 
     def __init__(
         self,
@@ -2291,7 +3319,7 @@ class Table(Queryable):
         column_order: list[str] | None = None,
         not_null: Iterable[str] | None = None,
         defaults: dict[str, Any] | None = None,
-        batch_size: int = 100,
+        batch_size: int | Literal["auto"] = 100,
         hash_id: str | None = None,
         hash_id_columns: Iterable[str] | None = None,
         alter: bool = False,
@@ -2344,6 +3372,7 @@ class Table(Queryable):
         return self.name in self.db.table_names()
 
     @property
+    @_schema_operation
     def pks(self) -> list[str]:
         """
         Primary key columns for this table, in PRIMARY KEY declaration order -
@@ -2362,6 +3391,7 @@ class Table(Queryable):
         return names
 
     @property
+    @_schema_operation
     def use_rowid(self) -> bool:
         "Does this table use ``rowid`` for its primary key (no other primary keys are specified)?"
         return not any(column for column in self.columns if column.is_pk)
@@ -2407,7 +3437,7 @@ class Table(Queryable):
             )
 
         wheres = [f"{quote_identifier(pk_name)} = ?" for pk_name in pks]
-        rows = self.rows_where(" and ".join(wheres), pk_values)
+        rows = self.rows_where(" and ".join(wheres), pk_values, row_factory="dict")
         try:
             row = next(iter(rows))
             self.last_pk = last_pk
@@ -2415,7 +3445,80 @@ class Table(Queryable):
         except StopIteration:
             raise NotFoundError
 
+    def iter_pages(
+        self,
+        page_size: int = 1000,
+        where: str | None = None,
+        where_args: Sequence | dict[str, Any] | None = None,
+        select: str = "*",
+        token: str | None = None,
+        row_factory: RowFactory | None = None,
+    ) -> Generator[Page, None, None]:
+        """
+        Iterate over the rows in this table in primary key order, one
+        :ref:`Page <reference_db_other_page>` of rows at a time.
+
+        Each page is fetched with a ``where`` clause that continues after the
+        primary key (or ``rowid``) of the previous page, so deep pages are as
+        fast as the first one - unlike ``offset=``. See :ref:`python_api_iter_pages`.
+
+        :param page_size: Maximum number of rows in each page
+        :param where: SQL where fragment to use, for example ``id > ?``
+        :param where_args: Parameters to use with that fragment - an iterable for ``id > ?``
+          parameters, or a dictionary for ``id > :id``
+        :param select: Comma-separated list of columns to select - defaults to ``*``.
+          Primary key columns that are not selected are added to the start of each row
+        :param token: ``token`` from a previously returned page, to continue after it
+        :param row_factory: Return rows as this type instead of the database's
+          ``row_factory`` - see :ref:`python_api_row_factory`
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be a positive integer")
+        row_factory = self.db._resolve_row_factory(row_factory)
+        after = _decode_page_token(token) if token is not None else None
+        if not self.exists():
+            return
+        pks = self.pks
+        if after is not None and len(after) != len(pks):
+            raise ValueError("token does not match the primary key of this table")
+        key_sql = ", ".join(
+            "rowid" if self.use_rowid else quote_identifier(pk) for pk in pks
+        )
+        table_sql = quote_identifier(self.name)
+        selected = self.db.execute(f"select {select} from {table_sql} limit 0")
+        if not set(pks).issubset(c[0] for c in selected.description):
+            select = f"{key_sql}, {select}"
+        while True:
+            wheres = [f"({where})"] if where is not None else []
+            params: Sequence | dict[str, Any] = where_args or []
+            if after is not None:
+                if isinstance(where_args, dict):
+                    names = [f"_page_{i}" for i in range(len(after))]
+                    params = dict(where_args, **dict(zip(names, after)))
+                    placeholders = ", ".join(f":{name}" for name in names)
+                else:
+                    params = [*params, *after]
+                    placeholders = ", ".join("?" for _ in after)
+                wheres.append(f"({key_sql}) > ({placeholders})")
+            sql = f"select {select} from {table_sql}"
+            if wheres:
+                sql += " where " + " and ".join(wheres)
+            sql += f" order by {key_sql} limit {page_size}"
+            cursor = self.db.execute(sql, params)
+            keys = dedupe_keys(c[0] for c in cursor.description)
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            after = [rows[-1][keys.index(pk)] for pk in pks]
+            convert = _row_converter(row_factory, cursor, keys)
+            # A short page is the last one, so there is nothing to continue from
+            next_token = _encode_page_token(after) if len(rows) == page_size else None
+            yield Page([convert(row) for row in rows], next_token)
+            if next_token is None:
+                return
+
     @property
+    @_schema_operation
     def foreign_keys(self) -> list["ForeignKey"]:
         """
         List of foreign keys defined on this table.
@@ -2427,9 +3530,9 @@ class Table(Queryable):
         # PRAGMA foreign_key_list returns one row per column, grouped by "id"
         # with "seq" giving the column order within a compound foreign key.
         by_id: dict[int, list] = {}
-        for row in self.db.execute(
+        for row in self.db._schema_fetch(
             f"PRAGMA foreign_key_list({quote_identifier(self.name)})"
-        ).fetchall():
+        )[1]:
             if row is not None:
                 id, seq, table_name, from_, to_, on_update, on_delete, _match = row
                 by_id.setdefault(id, []).append(
@@ -2472,15 +3575,17 @@ class Table(Queryable):
         return match.groupdict()["using"].upper()
 
     @property
+    @_schema_operation
     def indexes(self) -> list[Index]:
         "List of indexes defined on this table."
         sql = f"PRAGMA index_list({quote_identifier(self.name)})"
         indexes = []
-        for row in self.db.execute_returning_dicts(sql):
+        names, rows = self.db._schema_fetch(sql)
+        for row in (dict(zip(names, r)) for r in rows):
             index_name = row["name"]
             column_sql = f"PRAGMA index_info({quote_identifier(index_name)})"
             columns = []
-            for seqno, cid, name in self.db.execute(column_sql).fetchall():
+            for seqno, cid, name in self.db._schema_fetch(column_sql)[1]:
                 columns.append(name)
             row["columns"] = columns
             # These columns may be missing on older SQLite versions:
@@ -2491,15 +3596,17 @@ class Table(Queryable):
         return indexes
 
     @property
+    @_schema_operation
     def xindexes(self) -> list[XIndex]:
         "List of indexes defined on this table using the more detailed ``XIndex`` format."
         sql = f"PRAGMA index_list({quote_identifier(self.name)})"
         indexes = []
-        for row in self.db.execute_returning_dicts(sql):
+        names, rows = self.db._schema_fetch(sql)
+        for row in (dict(zip(names, r)) for r in rows):
             index_name = row["name"]
             column_sql = f"PRAGMA index_xinfo({quote_identifier(index_name)})"
             index_columns = []
-            for info in self.db.execute(column_sql).fetchall():
+            for info in self.db._schema_fetch(column_sql)[1]:
                 index_columns.append(XIndexColumn(*info))
             indexes.append(XIndex(index_name, index_columns))
         return indexes
@@ -2509,11 +3616,11 @@ class Table(Queryable):
         "List of triggers defined on this table."
         return [
             Trigger(*r)
-            for r in self.db.execute(
+            for r in self.db._schema_fetch(
                 "select name, tbl_name, sql from sqlite_master where type = 'trigger'"
                 " and tbl_name = ?",
                 (self.name,),
-            ).fetchall()
+            )[1]
         ]
 
     @property
@@ -2640,6 +3747,7 @@ class Table(Queryable):
             self.db.execute(sql)
         return self.db.table(new_name)
 
+    @_schema_operation
     def transform(
         self,
         *,
@@ -3253,6 +4361,7 @@ class Table(Queryable):
         sqls.extend(index_create_sqls)
         return sqls
 
+    @_schema_operation
     def extract(
         self,
         columns: str | Iterable[str],
@@ -3474,6 +4583,48 @@ class Table(Queryable):
         self.db.execute(f"DROP INDEX {quote_identifier(index_name)}")
         return self
 
+    @contextlib.contextmanager
+    def _deferred_indexes(
+        self, threads: int | None = None
+    ) -> Generator[None, None, None]:
+        # Drop the non-unique indexes created with CREATE INDEX for the
+        # duration of the block, then recreate them from their original SQL
+        deferred = []
+        if self.exists():
+            for index in self.indexes:
+                if index.unique or index.origin != "c":
+                    continue
+                index_sql = self.db.execute(
+                    """SELECT sql FROM sqlite_master WHERE type = 'index' AND name = :index_name;""",
+                    {"index_name": index.name},
+                ).fetchall()[0][0]
+                if index_sql is not None:
+                    deferred.append((index.name, index_sql))
+            with self.db.atomic():
+                for index_name, _ in deferred:
+                    self.db.execute(f"DROP INDEX {quote_identifier(index_name)}")
+        try:
+            yield
+        finally:
+            # A rolled back transaction may have restored some of them already
+            existing = {index.name for index in self.indexes}
+            missing = [
+                sql for index_name, sql in deferred if index_name not in existing
+            ]
+            if missing:
+                previous_threads = None
+                if threads is not None:
+                    # Allow the sorter that builds each index to use helper threads
+                    previous_threads = self.db.execute("PRAGMA threads;").fetchone()[0]
+                    self.db.execute(f"PRAGMA threads={int(threads)};")
+                try:
+                    with self.db.atomic():
+                        for sql in missing:
+                            self.db.execute(sql)
+                finally:
+                    if previous_threads is not None:
+                        self.db.execute(f"PRAGMA threads={previous_threads};")
+
     def add_column(
         self,
         col_name: str,
@@ -4026,7 +5177,8 @@ class Table(Queryable):
         where_args: Iterable | dict | None = None,
         include_rank: bool = False,
         quote: bool = False,
-    ) -> Generator[dict, None, None]:
+        row_factory: RowFactory | None = None,
+    ) -> Generator[Any, None, None]:
         """
         Execute a search against this table using SQLite full-text search, returning a sequence of
         dictionaries for each row.
@@ -4040,9 +5192,12 @@ class Table(Queryable):
         :param where_args: Arguments to use for :param placeholders in the extra WHERE clause
         :param include_rank: Select the search rank column in the final query
         :param quote: Apply quoting to disable any special characters in the search query
+        :param row_factory: Return rows as this type instead of the database's
+          ``row_factory`` - see :ref:`python_api_row_factory`
 
         See :ref:`python_api_fts_search`.
         """
+        row_factory = self.db._resolve_row_factory(row_factory)
         args = {"query": self.db.quote_fts(q) if quote else q}
         if where_args and "query" in where_args:
             raise ValueError(
@@ -4063,8 +5218,7 @@ class Table(Queryable):
             args,
         )
         columns = dedupe_keys(c[0] for c in cursor.description)
-        for row in cursor:
-            yield dict(zip(columns, row))
+        yield from _convert_rows(row_factory, cursor, columns, cursor)
 
     def value_or_default(self, key: str, value: T | Default) -> T:
         if value is DEFAULT:
@@ -4086,6 +5240,7 @@ class Table(Queryable):
         )
         with self.db.atomic():
             self.db.execute(sql, pk_values)
+        self.db._clear_lookup_cache()
         return self
 
     def delete_where(
@@ -4111,6 +5266,7 @@ class Table(Queryable):
             sql += " where " + where
         with self.db.atomic():
             self.db.execute(sql, where_args or [])
+        self.db._clear_lookup_cache()
         if analyze:
             self.analyze()
         return self
@@ -4171,6 +5327,7 @@ class Table(Queryable):
 
             # TODO: Test this works (rolls back) - use better exception:
             assert rowcount == 1
+        self.db._clear_lookup_cache()
         self.last_pk = pk_values[0] if len(pks) == 1 else pk_values
         return self
 
@@ -4269,6 +5426,7 @@ class Table(Queryable):
                 ),
                 where=where,
                 where_args=where_args,
+                row_factory="dict",
             ):
                 row_pk = tuple(row[pk] for pk in pks)
                 if len(row_pk) == 1:
@@ -4302,46 +5460,110 @@ class Table(Queryable):
                 self.transform(drop=(column,))
         return self
 
-    def build_insert_queries_and_params(
+    def _replace_extracted_values(
+        self,
+        extracts: dict[str, str],
+        values: list[list],
+        all_columns: list[str],
+        lookup_cache: "_LookupCache | None",
+    ) -> None:
+        # Swap each value in an extracted column for the primary key of the
+        # matching row in its lookup table, resolving the whole chunk at once
+        indexes_by_table: dict[str, list[int]] = {}
+        for i, column in enumerate(all_columns):
+            if column in extracts:
+                indexes_by_table.setdefault(extracts[column], []).append(i)
+        for table_name, indexes in indexes_by_table.items():
+            ids = self.db.table(table_name)._lookup_ids(
+                [row[i] for row in values for i in indexes if row[i] is not None],
+                lookup_cache,
+            )
+            for row in values:
+                for i in indexes:
+                    if row[i] is not None:
+                        row[i] = ids[_lookup_key(row[i])]
+
+    def _lookup_ids(
+        self, values: Iterable[Any], lookup_cache: "_LookupCache | None" = None
+    ) -> dict[tuple, Any]:
+        # Equivalent to calling .lookup({"value": value}) for each value, but
+        # only looks up values missing from lookup_cache, using .lookup_many()
+        # Returns {_lookup_key(value): id}
+        ids: dict[tuple, Any] = {}
+        hits: dict[tuple, tuple] = {}
+        misses: dict[tuple, tuple] = {}
+        if lookup_cache is not None and (
+            lookup_cache.version != self.db._lookup_cache_version() or not self.exists()
+        ):
+            # Cached ids may no longer exist - and if the lookup table has gone
+            # every value must miss, so that it is created again
+            lookup_cache.clear()
+        for value in values:
+            key = _lookup_key(value)
+            if key in hits or key in misses:
+                continue
+            if lookup_cache is not None:
+                cached = lookup_cache.get((self.name, key))
+                if cached is not None:
+                    hits[key] = (cached, value)
+                    continue
+            misses[key] = (value,)
+        if hits:
+            # Deletes and updates made with SQL on this connection leave
+            # data_version unchanged, so check the cached ids still match
+            valid = self._select_valid_lookup_hits(hits)
+            for key, (pk, value) in hits.items():
+                if key in valid:
+                    ids[key] = pk
+                else:
+                    misses[key] = (value,)
+        if not misses:
+            return ids
+        found = self._lookup_many(["value"], misses)
+        ids.update(found)
+        if lookup_cache is not None:
+            for key, pk in found.items():
+                lookup_cache.set((self.name, key), pk)
+            # Creating the lookup table changed the schema version - nothing
+            # else can have changed it since the cache was checked
+            lookup_cache.version = self.db._lookup_cache_version()
+        return ids
+
+    def _select_valid_lookup_hits(self, hits: dict[tuple, tuple]) -> set[tuple]:
+        # hits maps keys to (id, value) pairs from the lookup cache - returns
+        # the keys whose id still exists with that value in this lookup table
+        valid = set()
+        items = list(hits.items())
+        for batch in chunks(items, SQLITE_MAX_VARS // 3):
+            batch = list(batch)
+            sql = (
+                "WITH sqlite_utils_lookup(k, id, value) AS (VALUES {values}) "
+                "SELECT sqlite_utils_lookup.k FROM sqlite_utils_lookup "
+                "JOIN {table} AS t ON t.id = sqlite_utils_lookup.id "
+                "AND t.value IS sqlite_utils_lookup.value"
+            ).format(
+                values=", ".join("(?, ?, ?)" for _ in batch),
+                table=quote_identifier(self.name),
+            )
+            params: list[Any] = []
+            for i, (_, (pk, value)) in enumerate(batch):
+                params.extend((i, pk, value))
+            for (i,) in self.db.execute(sql, params):
+                valid.add(batch[i][0])
+        return valid
+
+    def _build_values(
         self,
         extracts,
         chunk,
         all_columns,
         hash_id,
         hash_id_columns,
-        upsert,
-        pk,
-        not_null,
-        conversions,
-        num_records_processed,
-        replace,
-        ignore,
-        list_mode=False,
-    ):
-        """
-        Given a list ``chunk`` of records that should be written to *this* table,
-        return a list of ``(sql, parameters)`` 2-tuples which, when executed in
-        order, perform the desired INSERT / UPSERT / REPLACE operation.
-        """
-        # Dict-mode insert({}) has no explicit columns; SQLite spells that as
-        # DEFAULT VALUES. List mode with no columns is a different input shape.
-        if not list_mode and not all_columns:
-            if upsert:
-                raise PrimaryKeyRequired(
-                    "upsert() requires a value for the primary key - "
-                    "an empty record cannot be upserted"
-                )
-            or_clause = ""
-            if replace:
-                or_clause = " OR REPLACE"
-            elif ignore:
-                or_clause = " OR IGNORE"
-            sql = (
-                f"INSERT{or_clause} INTO {quote_identifier(self.name)} "
-                "DEFAULT VALUES"
-            )
-            return [(sql, []) for _ in chunk]
-
+        list_mode,
+        lookup_cache,
+    ) -> list[list]:
+        # One list of values per record, in all_columns order, ready to be
+        # passed as SQL parameters
         if hash_id_columns and hash_id is None:
             hash_id = "id"
 
@@ -4353,7 +5575,6 @@ class Table(Queryable):
         if list_mode:
             # In list mode, records are already lists of values
             num_columns = len(all_columns)
-            has_extracts = bool(extracts)
             for record in chunk:
                 # Pad short records with None, truncate long ones
                 record_len = len(record)
@@ -4363,13 +5584,6 @@ class Table(Queryable):
                     )
                 else:
                     record_values = [jsonify_if_needed(v) for v in record[:num_columns]]
-                # Only process extracts if there are any
-                if has_extracts:
-                    for i, key in enumerate(all_columns):
-                        if key in extracts and record_values[i] is not None:
-                            record_values[i] = self.db.table(extracts[key]).lookup(
-                                {"value": record_values[i]}
-                            )
                 values.append(record_values)
         else:
             # Dict mode: original logic
@@ -4386,37 +5600,14 @@ class Table(Queryable):
                             ),
                         )
                     )
-                    if key in extracts and value is not None:
-                        extract_table = extracts[key]
-                        value = self.db.table(extract_table).lookup({"value": value})
                     record_values.append(value)
                 values.append(record_values)
 
-        columns_sql = ", ".join(quote_identifier(c) for c in all_columns)
-        placeholder_expr = ", ".join(conversions.get(c, "?") for c in all_columns)
-        row_placeholders_sql = ", ".join(f"({placeholder_expr})" for _ in values)
-        flat_params = list(itertools.chain.from_iterable(values))
-
-        # replace=True mean INSERT OR REPLACE INTO
-        if replace:
-            sql = (
-                f"INSERT OR REPLACE INTO {quote_identifier(self.name)} "
-                f"({columns_sql}) VALUES {row_placeholders_sql}"
-            )
-            return [(sql, flat_params)]
+        if extracts:
+            self._replace_extracted_values(extracts, values, all_columns, lookup_cache)
+        return values
 
-        # If not an upsert it's an INSERT, maybe with OR IGNORE
-        if not upsert:
-            or_ignore = ""
-            if ignore:
-                or_ignore = " OR IGNORE"
-            sql = (
-                f"INSERT{or_ignore} INTO {quote_identifier(self.name)} "
-                f"({columns_sql}) VALUES {row_placeholders_sql}"
-            )
-            return [(sql, flat_params)]
-
-        # Everything from here on is for upsert=True
+    def _upsert_pk_columns(self, pk, all_columns, values) -> list[str]:
         pk_cols = [pk] if isinstance(pk, str) else list(pk)
         # The records may use different casing for the pk columns than pk=
         pk_cols = [resolve_casing(c, all_columns) for c in pk_cols]
@@ -4440,38 +5631,206 @@ class Table(Queryable):
                         ", ".join(pk_cols),
                     )
                 )
+        return pk_cols
+
+    def _upsert_do_clause(self, non_pk_cols, conversions, only_changed=False) -> str:
+        if not non_pk_cols:
+            # All columns are in the PK – nothing to update.
+            return "DO NOTHING"
+        values = {}
+        for c in non_pk_cols:
+            c_quoted = quote_identifier(c)
+            if c in conversions:
+                values[c] = conversions[c].replace("?", f"excluded.{c_quoted}")
+            else:
+                values[c] = f"excluded.{c_quoted}"
+        sql = "DO UPDATE SET " + ", ".join(
+            f"{quote_identifier(c)} = {value}" for c, value in values.items()
+        )
+        if only_changed:
+            sql += " WHERE " + self._changed_guard(values)
+        return sql
+
+    def _changed_guard(self, values) -> str:
+        # SQL that is true if writing values - a dictionary of column names
+        # to SQL expressions - would change the current row
+        table = quote_identifier(self.name)
+        return " OR ".join(
+            f"{table}.{quote_identifier(c)} IS NOT {value}"
+            for c, value in values.items()
+        )
+
+    def _count_new_pks_queries(self, pk_cols, values, all_columns, conversions):
+        # SELECT queries counting the distinct primary keys in values that
+        # are not in the table yet, for upsert_all(..., only_changed=True)
+        pk_indexes = [all_columns.index(c) for c in pk_cols]
+        pk_values = list(
+            {tuple(row[i] for i in pk_indexes): None for row in values}.keys()
+        )
+        table = quote_identifier(self.name)
+        match = " AND ".join(
+            f"{table}.{quote_identifier(c)} = v.column{i}"
+            for i, c in enumerate(pk_cols, 1)
+        )
+        row_sql = "({})".format(", ".join(conversions.get(c, "?") for c in pk_cols))
+        queries = []
+        for batch in chunks(pk_values, SQLITE_MAX_VARS // len(pk_cols)):
+            batch = list(batch)
+            queries.append(
+                (
+                    "SELECT count(*) FROM (VALUES {}) AS v "
+                    "WHERE NOT EXISTS (SELECT 1 FROM {} WHERE {})".format(
+                        ", ".join(row_sql for _ in batch), table, match
+                    ),
+                    list(itertools.chain.from_iterable(batch)),
+                )
+            )
+        return queries
+
+    def build_insert_queries_and_params(
+        self,
+        extracts,
+        chunk,
+        all_columns,
+        hash_id,
+        hash_id_columns,
+        upsert,
+        pk,
+        not_null,
+        conversions,
+        num_records_processed,
+        replace,
+        ignore,
+        list_mode=False,
+        executemany=False,
+        lookup_cache=None,
+        only_changed=False,
+    ):
+        """
+        Given a list ``chunk`` of records that should be written to *this* table,
+        return a list of ``(sql, parameters)`` 2-tuples which, when executed in
+        order, perform the desired INSERT / UPSERT / REPLACE operation.
+
+        If ``executemany`` is true each SQL statement inserts a single row and
+        ``parameters`` is a list of parameter lists, one for each row, suitable
+        for passing to ``cursor.executemany()``.
+
+        With ``only_changed`` an upsert skips rows that would not change, and
+        the returned list starts with ``SELECT`` queries that count how many of
+        the records have primary keys that are not yet in the table.
+        """
+        # Dict-mode insert({}) has no explicit columns; SQLite spells that as
+        # DEFAULT VALUES. List mode with no columns is a different input shape.
+        if not list_mode and not all_columns:
+            if upsert:
+                raise PrimaryKeyRequired(
+                    "upsert() requires a value for the primary key - "
+                    "an empty record cannot be upserted"
+                )
+            or_clause = ""
+            if replace:
+                or_clause = " OR REPLACE"
+            elif ignore:
+                or_clause = " OR IGNORE"
+            sql = (
+                f"INSERT{or_clause} INTO {quote_identifier(self.name)} "
+                "DEFAULT VALUES"
+            )
+            if executemany:
+                return [(sql, [[] for _ in chunk])]
+            return [(sql, []) for _ in chunk]
+
+        values = self._build_values(
+            extracts,
+            chunk,
+            all_columns,
+            hash_id,
+            hash_id_columns,
+            list_mode,
+            lookup_cache,
+        )
+
+        columns_sql = ", ".join(quote_identifier(c) for c in all_columns)
+        placeholder_expr = ", ".join(conversions.get(c, "?") for c in all_columns)
+        if executemany:
+            # One single-row statement, executed once per row
+            row_placeholders_sql = f"({placeholder_expr})"
+            flat_params: list = values
+        else:
+            row_placeholders_sql = ", ".join(f"({placeholder_expr})" for _ in values)
+            flat_params = list(itertools.chain.from_iterable(values))
+
+        # replace=True mean INSERT OR REPLACE INTO
+        if replace:
+            sql = (
+                f"INSERT OR REPLACE INTO {quote_identifier(self.name)} "
+                f"({columns_sql}) VALUES {row_placeholders_sql}"
+            )
+            return [(sql, flat_params)]
+
+        # If not an upsert it's an INSERT, maybe with OR IGNORE
+        if not upsert:
+            or_ignore = ""
+            if ignore:
+                or_ignore = " OR IGNORE"
+            sql = (
+                f"INSERT{or_ignore} INTO {quote_identifier(self.name)} "
+                f"({columns_sql}) VALUES {row_placeholders_sql}"
+            )
+            return [(sql, flat_params)]
+
+        # Everything from here on is for upsert=True
+        pk_cols = self._upsert_pk_columns(pk, all_columns, values)
         non_pk_cols = [c for c in all_columns if c not in pk_cols]
         conflict_sql = ", ".join(quote_identifier(c) for c in pk_cols)
 
-        if self.db.supports_on_conflict and not self.db.use_old_upsert:
-            if non_pk_cols:
-                # DO UPDATE
-                assignments = []
-                for c in non_pk_cols:
-                    c_quoted = quote_identifier(c)
-                    if c in conversions:
-                        assignments.append(
-                            f"{c_quoted} = {conversions[c].replace('?', f'excluded.{c_quoted}')}"
-                        )
-                    else:
-                        assignments.append(f"{c_quoted} = excluded.{c_quoted}")
-                do_clause = "DO UPDATE SET " + ", ".join(assignments)
+        count_queries = []
+        if only_changed:
+            # Every record has a value for every column, so only the last
+            # record for each primary key affects the result
+            pk_indexes = [all_columns.index(c) for c in pk_cols]
+            values = list(
+                {tuple(row[i] for i in pk_indexes): row for row in values}.values()
+            )
+            if executemany:
+                flat_params = values
             else:
-                # All columns are in the PK – nothing to update.
-                do_clause = "DO NOTHING"
+                row_placeholders_sql = ", ".join(
+                    f"({placeholder_expr})" for _ in values
+                )
+                flat_params = list(itertools.chain.from_iterable(values))
+            count_queries = [
+                (sql, [params] if executemany else params)
+                for sql, params in self._count_new_pks_queries(
+                    pk_cols, values, all_columns, conversions
+                )
+            ]
 
+        if self.db.supports_on_conflict and not self.db.use_old_upsert:
+            do_clause = self._upsert_do_clause(non_pk_cols, conversions, only_changed)
             sql = (
                 f"INSERT INTO {quote_identifier(self.name)} ({columns_sql}) "
                 f"VALUES {row_placeholders_sql} "
                 f"ON CONFLICT({conflict_sql}) {do_clause}"
             )
-            return [(sql, flat_params)]
+            return count_queries + [(sql, flat_params)]
+
+        if only_changed:
+            return count_queries + self._old_upsert_only_changed_queries(
+                values, all_columns, pk_cols, not_null, conversions, executemany
+            )
 
         # At this point we need compatibility UPSERT for SQLite < 3.24.0
         # (INSERT OR IGNORE + second UPDATE stage)
         queries_and_params = []
         pks = pk_cols
         self.last_pk = None
+        # With executemany the INSERT OR IGNORE and UPDATE statements for the
+        # whole chunk are grouped together - running every INSERT before every
+        # UPDATE leaves the same final state as interleaving them
+        insert_params: list[list] = []
+        update_params: list[list] = []
+        insert_sql = update_sql = None
         for record_values in values:
             record = dict(zip(all_columns, record_values))
             placeholders = list(pks)
@@ -4486,9 +5845,12 @@ class Table(Queryable):
                     placeholders=", ".join(["?" for p in placeholders]),
                 )
             )
-            queries_and_params.append(
-                (sql, [record[col] for col in pks] + ["" for _ in (not_null or [])])
-            )
+            params = [record[col] for col in pks] + ["" for _ in (not_null or [])]
+            if executemany:
+                insert_sql = sql
+                insert_params.append(params)
+            else:
+                queries_and_params.append((sql, params))
             # UPDATE "book" SET "name" = 'Programming' WHERE "id" = 1001;
             set_cols = [col for col in all_columns if col not in pks]
             if set_cols:
@@ -4502,12 +5864,12 @@ class Table(Queryable):
                     ),
                     wheres=" AND ".join(f"{quote_identifier(pk)} = ?" for pk in pks),
                 )
-                queries_and_params.append(
-                    (
-                        sql2,
-                        [record[col] for col in set_cols] + [record[pk] for pk in pks],
-                    )
-                )
+                params2 = [record[col] for col in set_cols] + [record[pk] for pk in pks]
+                if executemany:
+                    update_sql = sql2
+                    update_params.append(params2)
+                else:
+                    queries_and_params.append((sql2, params2))
             # We can populate .last_pk right here
             if num_records_processed == 1:
                 pk_values = tuple(record[pk] for pk in pks)
@@ -4515,8 +5877,270 @@ class Table(Queryable):
                     self.last_pk = pk_values[0]
                 else:
                     self.last_pk = pk_values
+        if insert_sql is not None:
+            queries_and_params.append((insert_sql, insert_params))
+        if update_sql is not None:
+            queries_and_params.append((update_sql, update_params))
         return queries_and_params
 
+    def _old_upsert_only_changed_queries(
+        self, values, all_columns, pk_cols, not_null, conversions, executemany
+    ):
+        # Compatibility UPSERT for upsert_all(..., only_changed=True): UPDATE
+        # existing rows whose values differ, then INSERT OR IGNORE the whole
+        # record so that only rows that were not there already are added
+        table = quote_identifier(self.name)
+        set_cols = [c for c in all_columns if c not in pk_cols]
+        updates: list = []
+        update_sql = None
+        if set_cols:
+            assignments = {c: conversions.get(c, "?") for c in set_cols}
+            update_sql = "UPDATE {} SET {} WHERE {} AND ({})".format(
+                table,
+                ", ".join(
+                    f"{quote_identifier(c)} = {v}" for c, v in assignments.items()
+                ),
+                " AND ".join(f"{quote_identifier(c)} = ?" for c in pk_cols),
+                self._changed_guard(assignments),
+            )
+        # Need to populate not-null columns too, or INSERT OR IGNORE ignores
+        # them since it ignores the resulting integrity errors
+        extra_not_null = [c for c in (not_null or []) if c not in all_columns]
+        insert_sql = "INSERT OR IGNORE INTO {} ({}) VALUES ({})".format(
+            table,
+            ", ".join(quote_identifier(c) for c in all_columns + extra_not_null),
+            ", ".join(
+                [conversions.get(c, "?") for c in all_columns]
+                + ["?" for _ in extra_not_null]
+            ),
+        )
+        inserts: list = []
+        for record_values in values:
+            record = dict(zip(all_columns, record_values))
+            if update_sql is not None:
+                updates.append(
+                    [record[c] for c in set_cols]
+                    + [record[c] for c in pk_cols]
+                    + [record[c] for c in set_cols]
+                )
+            inserts.append(list(record_values) + ["" for _ in extra_not_null])
+        if executemany:
+            # Records were de-duplicated by primary key, so running every
+            # UPDATE before every INSERT leaves the same final state
+            queries_and_params = [(insert_sql, inserts)]
+            if update_sql is not None:
+                queries_and_params.insert(0, (update_sql, updates))
+            return queries_and_params
+        queries_and_params = []
+        for i, params in enumerate(inserts):
+            if update_sql is not None:
+                queries_and_params.append((update_sql, updates[i]))
+            queries_and_params.append((insert_sql, params))
+        return queries_and_params
+
+    def _stage_upsert_chunk(
+        self,
+        staged: "_UpsertStaging",
+        alter,
+        extracts,
+        chunk,
+        all_columns,
+        hash_id,
+        hash_id_columns,
+        pk,
+        not_null,
+        conversions,
+        list_mode,
+        lookup_cache,
+        only_changed=False,
+    ) -> None:
+        # Load a chunk of records into the TEMP staging table for
+        # upsert_all(..., staging=True)
+        values = self._build_values(
+            extracts,
+            chunk,
+            all_columns,
+            hash_id,
+            hash_id_columns,
+            list_mode,
+            lookup_cache,
+        )
+        pk_cols = self._upsert_pk_columns(pk, all_columns, values)
+        if staged.columns != all_columns:
+            # Records in a later chunk introduced new columns. Rows that are
+            # already staged must not set those columns, so merge them first
+            if staged.columns is not None:
+                self._merge_staged_upserts(staged, not_null, conversions, only_changed)
+                self.db.execute(f"DROP TABLE temp.{quote_identifier(staged.name)}")
+            if alter:
+                existing = {fold_identifier_case(c) for c in self.columns_dict}
+                if any(fold_identifier_case(c) not in existing for c in all_columns):
+                    if list_mode:
+                        self.add_missing_columns(
+                            [dict(zip(all_columns, row)) for row in values]
+                        )
+                    else:
+                        self.add_missing_columns(chunk)
+            # No column types, so values are stored exactly as provided and
+            # only converted by the affinity of the target table's columns
+            self.db.execute(
+                "CREATE TEMP TABLE {} ({})".format(
+                    quote_identifier(staged.name),
+                    ", ".join(quote_identifier(c) for c in all_columns),
+                )
+            )
+            if not self.db.supports_on_conflict or self.db.use_old_upsert:
+                # The UPDATE used by the old upsert looks rows up by pk
+                self.db.execute(
+                    "CREATE INDEX temp.{} ON {} ({})".format(
+                        quote_identifier(f"{staged.name}_pk"),
+                        quote_identifier(staged.name),
+                        ", ".join(quote_identifier(c) for c in pk_cols),
+                    )
+                )
+            staged.columns = list(all_columns)
+            staged.pk_cols = pk_cols
+        self.db.executemany(
+            "INSERT INTO temp.{} ({}) VALUES ({})".format(
+                quote_identifier(staged.name),
+                ", ".join(quote_identifier(c) for c in all_columns),
+                ", ".join("?" for _ in all_columns),
+            ),
+            values,
+        )
+
+    def _merge_staged_upserts(
+        self, staged: "_UpsertStaging", not_null, conversions, only_changed=False
+    ) -> None:
+        # Upsert every row in the staging table into this table, adding the
+        # number of inserted and updated rows to the totals in staged
+        assert staged.columns is not None
+        table = quote_identifier(self.name)
+        staging_table = "temp." + quote_identifier(staged.name)
+        pk_cols = staged.pk_cols
+        non_pk_cols = [c for c in staged.columns if c not in pk_cols]
+
+        def converted(column, expression):
+            if column in conversions:
+                return conversions[column].replace("?", expression)
+            return expression
+
+        # Count each distinct staged pk once: pks that are not yet in the
+        # table will be inserted, the rest will be updated
+        distinct, inserted = self.db.execute(
+            "SELECT count(*), count(*) - count({first}) FROM "
+            "(SELECT DISTINCT {pks} FROM {staging}) AS s "
+            "LEFT JOIN {table} ON {match}".format(
+                first=f"{table}.{quote_identifier(pk_cols[0])}",
+                pks=", ".join(quote_identifier(c) for c in pk_cols),
+                staging=staging_table,
+                table=table,
+                match=" AND ".join(
+                    f"{table}.{quote_identifier(c)} = s.{quote_identifier(c)}"
+                    for c in pk_cols
+                ),
+            )
+        ).fetchone()
+        staged.inserted += inserted
+        if non_pk_cols and not only_changed:
+            staged.updated += distinct - inserted
+
+        if self.db.supports_on_conflict and not self.db.use_old_upsert:
+            # WHERE true avoids ON CONFLICT being parsed as a join constraint
+            where = "true"
+            if only_changed:
+                # Only the last staged row for each pk, so that every row that
+                # is not an insert is counted as an update at most once
+                where = "rowid IN (SELECT max(rowid) FROM {} GROUP BY {})".format(
+                    staging_table, ", ".join(quote_identifier(c) for c in pk_cols)
+                )
+            cursor = self.db.execute(
+                "INSERT INTO {table} ({columns}) SELECT {select} FROM {staging} "
+                "WHERE {where} ORDER BY rowid ON CONFLICT({pks}) {do_clause}".format(
+                    table=table,
+                    columns=", ".join(quote_identifier(c) for c in staged.columns),
+                    select=", ".join(
+                        converted(c, quote_identifier(c)) for c in staged.columns
+                    ),
+                    staging=staging_table,
+                    where=where,
+                    pks=", ".join(quote_identifier(c) for c in pk_cols),
+                    do_clause=self._upsert_do_clause(
+                        non_pk_cols, conversions, only_changed
+                    ),
+                )
+            )
+            if only_changed:
+                staged.updated += cursor.rowcount - inserted
+            return
+
+        # Compatibility UPSERT for SQLite < 3.24.0 - INSERT OR IGNORE the
+        # primary keys, then UPDATE every staged row from its last staged values
+        match = " AND ".join(
+            f"s.{quote_identifier(c)} = {table}.{quote_identifier(c)}" for c in pk_cols
+        )
+        update_sql = None
+        if non_pk_cols:
+            assignments = {
+                c: converted(
+                    c,
+                    f"(SELECT s.{quote_identifier(c)} FROM {staging_table} AS s "
+                    f"WHERE {match} ORDER BY s.rowid DESC LIMIT 1)",
+                )
+                for c in non_pk_cols
+            }
+            update_sql = (
+                "UPDATE {} SET {} WHERE EXISTS (SELECT 1 FROM {} AS s WHERE {})".format(
+                    table,
+                    ", ".join(
+                        f"{quote_identifier(c)} = {v}" for c, v in assignments.items()
+                    ),
+                    staging_table,
+                    match,
+                )
+            )
+            if only_changed:
+                update_sql += " AND ({})".format(self._changed_guard(assignments))
+                # Run before the INSERT OR IGNORE so only existing rows count
+                staged.updated += self.db.execute(update_sql).rowcount
+        if only_changed:
+            # INSERT OR IGNORE the last staged row for each new pk in full,
+            # so newly inserted rows are never updated as well
+            extra_not_null = [c for c in (not_null or []) if c not in staged.columns]
+            self.db.execute(
+                "INSERT OR IGNORE INTO {table} ({columns}) SELECT {select} "
+                "FROM {staging} WHERE rowid IN "
+                "(SELECT max(rowid) FROM {staging} GROUP BY {pks}) "
+                "ORDER BY rowid".format(
+                    table=table,
+                    columns=", ".join(
+                        quote_identifier(c) for c in staged.columns + extra_not_null
+                    ),
+                    select=", ".join(
+                        [converted(c, quote_identifier(c)) for c in staged.columns]
+                        + ["''" for _ in extra_not_null]
+                    ),
+                    staging=staging_table,
+                    pks=", ".join(quote_identifier(c) for c in pk_cols),
+                )
+            )
+            return
+        insert_columns = list(pk_cols) + list(not_null or [])
+        self.db.execute(
+            "INSERT OR IGNORE INTO {table} ({columns}) SELECT {select} "
+            "FROM {staging} WHERE true ORDER BY rowid".format(
+                table=table,
+                columns=", ".join(quote_identifier(c) for c in insert_columns),
+                select=", ".join(
+                    [quote_identifier(c) for c in pk_cols]
+                    + ["''" for _ in (not_null or [])]
+                ),
+                staging=staging_table,
+            )
+        )
+        if update_sql is not None:
+            self.db.execute(update_sql)
+
     def insert_chunk(
         self,
         alter,
@@ -4533,6 +6157,10 @@ class Table(Queryable):
         replace,
         ignore,
         list_mode=False,
+        executemany=False,
+        lookup_cache=None,
+        only_changed=False,
+        upsert_counter=None,
     ) -> sqlite3.Cursor | None:
         queries_and_params = self.build_insert_queries_and_params(
             extracts,
@@ -4548,18 +6176,43 @@ class Table(Queryable):
             replace,
             ignore,
             list_mode,
+            executemany,
+            lookup_cache,
+            only_changed,
         )
         result = None
+        # With only_changed the SELECT queries count new primary keys, every
+        # other statement counts rows that were inserted or updated
+        new_rows = changed_rows = 0
+        split = False
+
+        def run(query, params):
+            if not executemany:
+                return self.db.execute(query, params)
+            if len(params) == 1:
+                # A single row is executed directly so that the cursor
+                # reports .lastrowid, which executemany() does not
+                return self.db.execute(query, params[0])
+            return self.db.executemany(query, params)
+
         with self.db.atomic():
             for query, params in queries_and_params:
                 try:
-                    result = self.db.execute(query, params)
+                    result = run(query, params)
                 except OperationalError as e:
                     if alter and (" column" in e.args[0]):
                         # Attempt to add any missing columns, then try again
-                        self.add_missing_columns(chunk)
-                        result = self.db.execute(query, params)
+                        if list_mode:
+                            record_columns = [c for c in all_columns if c != hash_id]
+                            self.add_missing_columns(
+                                [dict(zip(record_columns, row)) for row in chunk]
+                            )
+                        else:
+                            self.add_missing_columns(chunk)
+                        result = run(query, params)
                     elif e.args[0] == "too many SQL variables":
+                        # Each half counts its own rows
+                        split = True
                         first_half = chunk[: len(chunk) // 2]
                         second_half = chunk[len(chunk) // 2 :]
 
@@ -4578,6 +6231,10 @@ class Table(Queryable):
                             replace,
                             ignore,
                             list_mode,
+                            executemany,
+                            lookup_cache,
+                            only_changed,
+                            upsert_counter,
                         )
 
                         result = self.insert_chunk(
@@ -4595,10 +6252,23 @@ class Table(Queryable):
                             replace,
                             ignore,
                             list_mode,
+                            executemany,
+                            lookup_cache,
+                            only_changed,
+                            upsert_counter,
                         )
 
                     else:
                         raise
+                if upsert_counter is not None and not split:
+                    assert result is not None
+                    if query.startswith("SELECT"):
+                        new_rows += result.fetchone()[0]
+                    else:
+                        changed_rows += result.rowcount
+        if upsert_counter is not None and not split:
+            upsert_counter.inserted += new_rows
+            upsert_counter.updated += changed_rows - new_rows
         return result
 
     def insert(
@@ -4670,6 +6340,7 @@ class Table(Queryable):
             strict=strict,
         )
 
+    @_schema_operation
     def insert_all(
         self,
         records: Iterable[dict[str, Any]] | Iterable[Sequence[Any]],
@@ -4678,7 +6349,7 @@ class Table(Queryable):
         column_order: list[str] | Default | None = DEFAULT,
         not_null: Iterable[str] | Default | None = DEFAULT,
         defaults: dict[str, Any] | Default | None = DEFAULT,
-        batch_size: int | Default = DEFAULT,
+        batch_size: int | Literal["auto"] | Default = DEFAULT,
         hash_id: str | Default | None = DEFAULT,
         hash_id_columns: Iterable[str] | Default | None = DEFAULT,
         alter: bool | Default | None = DEFAULT,
@@ -4691,19 +6362,47 @@ class Table(Queryable):
         upsert: bool = False,
         analyze: bool = False,
         strict: bool | Default | None = DEFAULT,
+        executemany: bool = False,
+        staging: bool = False,
+        only_changed: bool = False,
+        defer_indexes: bool = False,
+        index_threads: int | None = None,
     ) -> "Table":
         """
         Like ``.insert()`` but takes a list of records and ensures that the table
         that it creates (if table does not exist) has columns for ALL of that data.
 
         Use ``analyze=True`` to run ``ANALYZE`` after the insert has completed.
+
+        Use ``batch_size="auto"`` to adjust the number of records written in each
+        batch based on how long each batch takes, see
+        :ref:`python_api_insert_batch_size_auto`.
+
+        Use ``executemany=True`` to insert each batch by executing a single-row
+        ``INSERT`` statement once per record using ``cursor.executemany()``, see
+        :ref:`python_api_insert_executemany`.
+
+        With ``upsert=True``, use ``staging=True`` to load the records into a
+        temporary table and then merge them into this table using a single
+        statement, see :ref:`python_api_upsert_staging`.
+
+        With ``upsert=True``, use ``only_changed=True`` to leave existing rows
+        untouched unless their values change, see
+        :ref:`python_api_upsert_only_changed`.
+
+        Use ``defer_indexes=True`` to drop the table's non-unique indexes while
+        the records are written and rebuild them afterwards, optionally using
+        ``index_threads`` helper threads - see :ref:`python_api_defer_indexes`.
         """
         pk = self.value_or_default("pk", pk)
         foreign_keys = self.value_or_default("foreign_keys", foreign_keys)
         column_order = self.value_or_default("column_order", column_order)
         not_null = self.value_or_default("not_null", not_null)
         defaults = self.value_or_default("defaults", defaults)
-        batch_size = self.value_or_default("batch_size", batch_size)
+        batch_size = cast(
+            Union[int, Literal["auto"]],
+            self.value_or_default("batch_size", batch_size),
+        )
         hash_id = self.value_or_default("hash_id", hash_id)
         hash_id_columns = self.value_or_default("hash_id_columns", hash_id_columns)
         alter = self.value_or_default("alter", alter)
@@ -4763,6 +6462,12 @@ class Table(Queryable):
 
         if ignore and replace:
             raise ValueError("Use either ignore=True or replace=True, not both")
+        if staging and not upsert:
+            raise ValueError("staging=True can only be used with upsert")
+        if only_changed and not upsert:
+            raise ValueError("only_changed=True can only be used with upsert")
+        if index_threads is not None and not defer_indexes:
+            raise ValueError("index_threads= can only be used with defer_indexes=True")
         all_columns = []
         first = True
         num_records_processed = 0
@@ -4813,96 +6518,187 @@ class Table(Queryable):
 
         if num_columns > SQLITE_MAX_VARS:
             raise ValueError(f"Rows can have a maximum of {SQLITE_MAX_VARS} columns")
-        batch_size = (
-            1
-            if num_columns == 0
-            else max(1, min(batch_size, SQLITE_MAX_VARS // num_columns))
-        )
+        auto_batch_size = None
+        if isinstance(batch_size, str):
+            if batch_size != "auto":
+                raise ValueError('batch_size must be an integer or "auto"')
+            max_values = AUTO_BATCH_MAX_VALUES
+            if not (executemany or staging):
+                # Every value in the batch is bound to a single statement
+                max_values = min(max_values, self.db._variable_limit())
+            auto_batch_size = _AdaptiveBatchSize(max_values // max(1, num_columns))
+            batch_size = auto_batch_size.size
+        elif executemany or staging:
+            # Each statement binds a single row, so the number of SQL
+            # variables no longer limits the batch size
+            batch_size = max(1, batch_size)
+        else:
+            batch_size = (
+                1
+                if num_columns == 0
+                else max(1, min(batch_size, SQLITE_MAX_VARS // num_columns))
+            )
         self.last_rowid = None
         self.last_pk = None
+        self.last_upsert_counts = None
+        lookup_cache = None
+        if extracts:
+            lookup_cache = self.db._lookup_cache
+            if lookup_cache is None:
+                lookup_cache = _LookupCache(LOOKUP_CACHE_SIZE)
         if truncate and self.exists():
             with self.db.atomic():
                 self.db.execute(f"DELETE FROM {quote_identifier(self.name)};")
         result = None
-        for chunk in chunks(itertools.chain([first_record], records_iter), batch_size):
-            chunk = list(chunk)
-            num_records_processed += len(chunk)
-            if first:
-                if not self.exists():
-                    # Use the first batch to derive the table names
-                    if list_mode:
-                        # Convert list records to dicts for type detection
-                        chunk_as_dicts = [dict(zip(column_names, row)) for row in chunk]
-                        column_types = suggest_column_types(chunk_as_dicts)
+        staged = None
+        upsert_counter = None
+        if staging:
+            staged = _UpsertStaging(f"_sqlite_utils_staging_{secrets.token_hex(8)}")
+        elif only_changed:
+            upsert_counter = _UpsertCounter()
+        deferred_indexes = (
+            self._deferred_indexes(index_threads)
+            if defer_indexes
+            else contextlib.nullcontext()
+        )
+        transaction = (
+            self.db.atomic() if staged is not None else contextlib.nullcontext()
+        )
+        with deferred_indexes, transaction:
+            try:
+                all_records = itertools.chain([first_record], records_iter)
+                for chunk in (
+                    chunks(all_records, batch_size)
+                    if auto_batch_size is None
+                    else auto_batch_size.chunks(all_records)
+                ):
+                    chunk = list(chunk)
+                    num_records_processed += len(chunk)
+                    if first:
+                        if not self.exists():
+                            # Use the first batch to derive the table names
+                            if list_mode:
+                                # Convert list records to dicts for type detection
+                                chunk_as_dicts = [
+                                    dict(zip(column_names, row)) for row in chunk
+                                ]
+                                column_types = suggest_column_types(chunk_as_dicts)
+                            else:
+                                dict_chunk = cast(list[dict[str, Any]], chunk)
+                                column_types = suggest_column_types(dict_chunk)
+                            if extracts:
+                                for col in extracts:
+                                    if col in column_types:
+                                        column_types[col] = (
+                                            int  # This will be an integer foreign key
+                                        )
+                            column_types.update(columns or {})
+                            self.create(
+                                column_types,
+                                pk,
+                                foreign_keys,
+                                column_order=column_order,
+                                not_null=not_null,
+                                defaults=defaults,
+                                hash_id=hash_id,
+                                hash_id_columns=hash_id_columns,
+                                extracts=extracts,
+                                strict=strict,
+                            )
+                        if list_mode:
+                            # In list mode, columns are already known
+                            all_columns = list(column_names)
+                            if hash_id:
+                                all_columns.insert(0, hash_id)
+                        else:
+                            all_columns_set: set[str] = set()
+                            for record in cast(list[dict[str, Any]], chunk):
+                                all_columns_set.update(record.keys())
+                            all_columns = sorted(all_columns_set)
+                            if hash_id:
+                                all_columns.insert(0, hash_id)
+                        if deferred_invalid_pk_check is not None:
+                            # alter=True - pk columns the table lacks are valid if
+                            # the records supply them, otherwise raise the error
+                            missing_pk_cols, invalid_pk_error = (
+                                deferred_invalid_pk_check
+                            )
+                            record_columns = {column: True for column in all_columns}
+                            if any(
+                                resolve_casing(col, record_columns)
+                                not in record_columns
+                                for col in missing_pk_cols
+                            ):
+                                raise invalid_pk_error
                     else:
-                        dict_chunk = cast(list[dict[str, Any]], chunk)
-                        column_types = suggest_column_types(dict_chunk)
-                    if extracts:
-                        for col in extracts:
-                            if col in column_types:
-                                column_types[col] = (
-                                    int  # This will be an integer foreign key
-                                )
-                    column_types.update(columns or {})
-                    self.create(
-                        column_types,
-                        pk,
-                        foreign_keys,
-                        column_order=column_order,
-                        not_null=not_null,
-                        defaults=defaults,
-                        hash_id=hash_id,
-                        hash_id_columns=hash_id_columns,
-                        extracts=extracts,
-                        strict=strict,
+                        if not list_mode:
+                            for record in cast(list[dict[str, Any]], chunk):
+                                all_columns += [
+                                    column
+                                    for column in record
+                                    if column not in all_columns
+                                ]
+
+                    first = False
+
+                    started = time.perf_counter()
+                    if staged is not None:
+                        self._stage_upsert_chunk(
+                            staged,
+                            alter,
+                            extracts,
+                            chunk,
+                            all_columns,
+                            hash_id,
+                            hash_id_columns,
+                            pk,
+                            not_null,
+                            conversions,
+                            list_mode,
+                            lookup_cache,
+                            only_changed,
+                        )
+                    else:
+                        result = self.insert_chunk(
+                            alter,
+                            extracts,
+                            chunk,
+                            all_columns,
+                            hash_id,
+                            hash_id_columns,
+                            upsert,
+                            pk,
+                            not_null,
+                            conversions,
+                            num_records_processed,
+                            replace,
+                            ignore,
+                            list_mode,
+                            executemany,
+                            lookup_cache,
+                            only_changed,
+                            upsert_counter,
+                        )
+                    if auto_batch_size is not None:
+                        auto_batch_size.record(
+                            len(chunk), time.perf_counter() - started
+                        )
+                if staged is not None:
+                    self._merge_staged_upserts(
+                        staged, not_null, conversions, only_changed
+                    )
+                    self.last_upsert_counts = UpsertCounts(
+                        staged.inserted, staged.updated
+                    )
+                elif upsert_counter is not None:
+                    self.last_upsert_counts = UpsertCounts(
+                        upsert_counter.inserted, upsert_counter.updated
+                    )
+            finally:
+                if staged is not None and staged.columns is not None:
+                    self.db.execute(
+                        f"DROP TABLE IF EXISTS temp.{quote_identifier(staged.name)}"
                     )
-                if list_mode:
-                    # In list mode, columns are already known
-                    all_columns = list(column_names)
-                    if hash_id:
-                        all_columns.insert(0, hash_id)
-                else:
-                    all_columns_set: set[str] = set()
-                    for record in cast(list[dict[str, Any]], chunk):
-                        all_columns_set.update(record.keys())
-                    all_columns = sorted(all_columns_set)
-                    if hash_id:
-                        all_columns.insert(0, hash_id)
-                if deferred_invalid_pk_check is not None:
-                    # alter=True - pk columns the table lacks are valid if
-                    # the records supply them, otherwise raise the error
-                    missing_pk_cols, invalid_pk_error = deferred_invalid_pk_check
-                    record_columns = {column: True for column in all_columns}
-                    if any(
-                        resolve_casing(col, record_columns) not in record_columns
-                        for col in missing_pk_cols
-                    ):
-                        raise invalid_pk_error
-            else:
-                if not list_mode:
-                    for record in cast(list[dict[str, Any]], chunk):
-                        all_columns += [
-                            column for column in record if column not in all_columns
-                        ]
-
-            first = False
-
-            result = self.insert_chunk(
-                alter,
-                extracts,
-                chunk,
-                all_columns,
-                hash_id,
-                hash_id_columns,
-                upsert,
-                pk,
-                not_null,
-                conversions,
-                num_records_processed,
-                replace,
-                ignore,
-                list_mode,
-            )
 
         # If we only handled a single row populate self.last_pk
         if num_records_processed == 1:
@@ -4976,7 +6772,11 @@ class Table(Queryable):
                     if (hash_id or (pk and not rowid_pk)) and self.last_rowid:
                         # Set self.last_pk to the pk(s) for that rowid
                         row = next(
-                            iter(self.rows_where("rowid = ?", [self.last_rowid]))
+                            iter(
+                                self.rows_where(
+                                    "rowid = ?", [self.last_rowid], row_factory="dict"
+                                )
+                            )
                         )
                         if hash_id:
                             self.last_pk = row[hash_id]
@@ -5028,6 +6828,76 @@ class Table(Queryable):
 
         return self
 
+    def insert_columns(
+        self,
+        columns: dict[str, Sequence[Any]],
+        pk: PrimaryKey | Default | None = DEFAULT,
+        foreign_keys: ForeignKeysType | Default | None = DEFAULT,
+        column_order: list[str] | Default | None = DEFAULT,
+        not_null: Iterable[str] | Default | None = DEFAULT,
+        defaults: dict[str, Any] | Default | None = DEFAULT,
+        batch_size: int | Literal["auto"] | Default = DEFAULT,
+        alter: bool | Default | None = DEFAULT,
+        ignore: bool | Default | None = DEFAULT,
+        replace: bool | Default | None = DEFAULT,
+        strict: bool | Default | None = DEFAULT,
+        executemany: bool = False,
+    ) -> "Table":
+        """
+        Insert data that is held column by column, as a dictionary mapping each
+        column name to a sequence of values - a list, an ``array.array`` or a
+        NumPy array. Every sequence must be the same length.
+
+        Column types are detected from the sequences - from the type code or
+        ``dtype`` of arrays, or from the values in a list - and used to create
+        the table if it does not exist. The rows are then inserted as tuples
+        without creating a dictionary for each one.
+
+        See :ref:`python_api_insert_columns`.
+
+        :param columns: Dictionary mapping column names to sequences of values
+        """
+        names = list(columns)
+        sequences = []
+        column_types: dict[str, Any] = {}
+        num_rows = None
+        for name, values in columns.items():
+            column_types[name] = _column_sequence_type(values)
+            if np is not None and isinstance(values, np.ndarray):
+                # Convert NumPy scalars to Python values SQLite can store
+                values = values.tolist()
+            if num_rows is None:
+                num_rows = len(values)
+            elif len(values) != num_rows:
+                raise ValueError("All columns must have the same number of values")
+            sequences.append(values)
+        if not num_rows:
+            return self
+        if not self.exists():
+            self.create(
+                column_types,
+                pk=pk,
+                foreign_keys=foreign_keys,
+                column_order=column_order,
+                not_null=not_null,
+                defaults=defaults,
+                strict=strict,
+            )
+        return self.insert_all(
+            itertools.chain([names], zip(*sequences)),
+            pk=pk,
+            foreign_keys=foreign_keys,
+            column_order=column_order,
+            not_null=not_null,
+            defaults=defaults,
+            batch_size=batch_size,
+            alter=alter,
+            ignore=ignore,
+            replace=replace,
+            strict=strict,
+            executemany=executemany,
+        )
+
     def upsert(
         self,
         record: dict[str, Any],
@@ -5043,6 +6913,7 @@ class Table(Queryable):
         conversions: dict[str, str] | Default | None = DEFAULT,
         columns: dict[str, Any] | Default | None = DEFAULT,
         strict: bool | Default | None = DEFAULT,
+        only_changed: bool = False,
     ) -> "Table":
         """
         Like ``.insert()`` but performs an ``UPSERT``, where records are inserted if they do
@@ -5064,6 +6935,7 @@ class Table(Queryable):
             conversions=conversions,
             columns=columns,
             strict=strict,
+            only_changed=only_changed,
         )
 
     def upsert_all(
@@ -5074,7 +6946,7 @@ class Table(Queryable):
         column_order: list[str] | Default | None = DEFAULT,
         not_null: Iterable[str] | Default | None = DEFAULT,
         defaults: dict[str, Any] | Default | None = DEFAULT,
-        batch_size: int | Default = DEFAULT,
+        batch_size: int | Literal["auto"] | Default = DEFAULT,
         hash_id: str | Default | None = DEFAULT,
         hash_id_columns: Iterable[str] | Default | None = DEFAULT,
         alter: bool | Default | None = DEFAULT,
@@ -5083,9 +6955,24 @@ class Table(Queryable):
         columns: dict[str, Any] | Default | None = DEFAULT,
         analyze: bool = False,
         strict: bool | Default | None = DEFAULT,
+        executemany: bool = False,
+        staging: bool = False,
+        only_changed: bool = False,
+        defer_indexes: bool = False,
+        index_threads: int | None = None,
     ) -> "Table":
         """
         Like ``.upsert()`` but can be applied to a list of records.
+
+        Use ``staging=True`` to load the records into a temporary table and then
+        merge them into this table using a single statement, see
+        :ref:`python_api_upsert_staging`.
+
+        Use ``only_changed=True`` to skip updating rows whose values would not
+        change, see :ref:`python_api_upsert_only_changed`.
+
+        Use ``defer_indexes=True`` to rebuild non-unique indexes after the
+        records have been written, see :ref:`python_api_defer_indexes`.
         """
         return self.insert_all(
             records,
@@ -5104,6 +6991,11 @@ class Table(Queryable):
             upsert=True,
             analyze=analyze,
             strict=strict,
+            executemany=executemany,
+            staging=staging,
+            only_changed=only_changed,
+            defer_indexes=defer_indexes,
+            index_threads=index_threads,
         )
 
     def add_missing_columns(self, records: Iterable[dict[str, Any]]) -> "Table":
@@ -5114,6 +7006,7 @@ class Table(Queryable):
                 self.add_column(col_name, col_type)
         return self
 
+    @_schema_operation
     def lookup(
         self,
         lookup_values: dict[str, Any],
@@ -5173,7 +7066,9 @@ class Table(Queryable):
             wheres = [f"{quote_identifier(column)} IS ?" for column in lookup_values]
             rows = list(
                 self.rows_where(
-                    " and ".join(wheres), [value for _, value in lookup_values.items()]
+                    " and ".join(wheres),
+                    [value for _, value in lookup_values.items()],
+                    row_factory="dict",
                 )
             )
             try:
@@ -5207,6 +7102,162 @@ class Table(Queryable):
             self.create_index(lookup_values.keys(), unique=True)
             return pk
 
+    @_schema_operation
+    def lookup_many(
+        self,
+        lookup_values: Iterable[dict[str, Any]],
+        pk: str | None = "id",
+        foreign_keys: ForeignKeysType | None = None,
+        column_order: list[str] | None = None,
+        not_null: Iterable[str] | None = None,
+        defaults: dict[str, Any] | None = None,
+        extracts: dict[str, str] | list[str] | None = None,
+        conversions: dict[str, str] | None = None,
+        columns: dict[str, Any] | None = None,
+        strict: bool | None = False,
+    ) -> dict[tuple, Any]:
+        """
+        Like ``.lookup()`` but for many lookup dictionaries at once.
+
+        Returns a dictionary mapping a tuple of the values in each lookup
+        dictionary to the primary key of the matching row, creating any rows
+        that do not exist yet::
+
+            db["Species"].lookup_many([{"name": "Palm"}, {"name": "Oak"}])
+            # {("Palm",): 1, ("Oak",): 2}
+
+        Every dictionary must have the same keys. The values in each tuple are
+        in the order of the keys in the first dictionary.
+
+        Existing rows are found using one query for each batch of values and
+        missing rows are created using a single ``INSERT OR IGNORE``.
+
+        See :ref:`python_api_lookup_many` for more details.
+
+        :param lookup_values: Iterable of dictionaries specifying column names and
+          values to use for the lookup
+        :param strict: Boolean, apply STRICT mode if creating the table.
+        """
+        if pk is None:
+            raise ValueError("pk cannot be None")
+        lookup_columns: list[str] | None = None
+        items: dict[tuple, tuple] = {}
+        for values in lookup_values:
+            if not isinstance(values, dict):
+                raise ValueError(  # noqa: TRY004
+                    "lookup_values must be an iterable of dictionaries"
+                )
+            if lookup_columns is None:
+                if not values:
+                    raise ValueError("lookup_values dictionaries cannot be empty")
+                lookup_columns = list(values)
+            elif len(values) != len(lookup_columns) or any(
+                column not in values for column in lookup_columns
+            ):
+                raise ValueError(
+                    "All lookup_values dictionaries must have the same keys"
+                )
+            row = tuple(values[column] for column in lookup_columns)
+            items.setdefault(tuple(_lookup_key(value) for value in row), row)
+        if lookup_columns is None:
+            return {}
+        found = self._lookup_many(
+            lookup_columns,
+            items,
+            pk=pk,
+            foreign_keys=foreign_keys,
+            column_order=column_order,
+            not_null=not_null,
+            defaults=defaults,
+            extracts=extracts,
+            conversions=conversions,
+            columns=columns,
+            strict=strict,
+        )
+        return {items[key]: pk_value for key, pk_value in found.items()}
+
+    def _lookup_many(
+        self,
+        lookup_columns: list[str],
+        items: dict[Any, tuple],
+        pk: str = "id",
+        **kwargs: Any,
+    ) -> dict[Any, Any]:
+        # items maps a caller-chosen key to a tuple of values for lookup_columns,
+        # returns a dictionary mapping those keys to primary keys
+        pending = list(items.items())
+        found: dict[Any, Any] = {}
+        if not self.exists():
+            # .lookup() creates the table and its unique index
+            key, values = pending.pop(0)
+            found[key] = self.lookup(dict(zip(lookup_columns, values)), pk=pk, **kwargs)
+        else:
+            self.add_missing_columns(
+                [dict(zip(lookup_columns, values)) for _, values in pending]
+            )
+            unique_column_sets = [
+                {fold_identifier_case(c) for c in i.columns} for i in self.indexes
+            ]
+            if {
+                fold_identifier_case(c) for c in lookup_columns
+            } not in unique_column_sets:
+                self.create_index(lookup_columns, unique=True)
+        found.update(self._select_lookup_pks(lookup_columns, pending, pk))
+        not_found = [(key, values) for key, values in pending if key not in found]
+        if not_found:
+            self.insert_all(
+                [dict(zip(lookup_columns, values)) for _, values in not_found],
+                pk=pk,
+                ignore=True,
+                batch_size=len(not_found),
+                executemany=True,
+                **kwargs,
+            )
+            found.update(self._select_lookup_pks(lookup_columns, not_found, pk))
+            # Anything still missing, for example because conversions= changed
+            # the stored value, gets exactly the same treatment as .lookup()
+            for key, values in not_found:
+                if key not in found:
+                    found[key] = self.lookup(
+                        dict(zip(lookup_columns, values)), pk=pk, **kwargs
+                    )
+        return found
+
+    def _select_lookup_pks(
+        self, lookup_columns: list[str], items: list[tuple[Any, tuple]], pk: str
+    ) -> dict[Any, Any]:
+        # IS rather than = so that null values are matched correctly, and so
+        # values are compared exactly as .lookup() compares them
+        found = {}
+        value_columns = [f"c{i}" for i in range(len(lookup_columns))]
+        placeholders = "({})".format(
+            ", ".join("?" for _ in range(len(lookup_columns) + 1))
+        )
+        join_sql = " AND ".join(
+            f"t.{quote_identifier(column)} IS sqlite_utils_lookup.{value_column}"
+            for column, value_column in zip(lookup_columns, value_columns)
+        )
+        for batch in chunks(items, SQLITE_MAX_VARS // (len(lookup_columns) + 1)):
+            batch = list(batch)
+            sql = (
+                "WITH sqlite_utils_lookup(k, {value_columns}) AS (VALUES {values}) "
+                "SELECT sqlite_utils_lookup.k, t.{pk} FROM sqlite_utils_lookup "
+                "JOIN {table} AS t ON {join_sql}"
+            ).format(
+                value_columns=", ".join(value_columns),
+                values=", ".join(placeholders for _ in batch),
+                pk=quote_identifier(pk),
+                table=quote_identifier(self.name),
+                join_sql=join_sql,
+            )
+            params: list[Any] = []
+            for i, (_, values) in enumerate(batch):
+                params.append(i)
+                params.extend(values)
+            for i, pk_value in self.db.execute(sql, params):
+                found[batch[i][0]] = pk_value
+        return found
+
     def m2m(
         self,
         other_table: Union[str, "Table"],
@@ -5511,6 +7562,88 @@ def jsonify_if_needed(value: object) -> object:
         return value
 
 
+def _lookup_key(value: object) -> tuple:
+    # 1, 1.0 and True are equal as dictionary keys but may be stored
+    # differently in a lookup table, so the type is part of the key
+    return (type(value), value)
+
+
+@dataclass
+class _UpsertCounter:
+    # Running totals for table.last_upsert_counts
+    inserted: int = 0
+    updated: int = 0
+
+
+@dataclass
+class _UpsertStaging:
+    # State for upsert_all(..., staging=True) - the TEMP table that records
+    # are loaded into, and running totals from merging it into the target
+    name: str
+    columns: list[str] | None = None
+    pk_cols: list[str] = field(default_factory=list)
+    inserted: int = 0
+    updated: int = 0
+
+
+class _AdaptiveBatchSize:
+    'Batch size for insert_all(batch_size="auto") that adapts to write times'
+
+    def __init__(self, max_rows: int, initial_rows: int = 100):
+        self.max_rows = max(1, max_rows)
+        self.size = min(self.max_rows, initial_rows)
+
+    def record(self, rows: int, seconds: float) -> None:
+        # Scale towards the number of rows that can be written in the target
+        # time, changing by no more than a factor of two between batches
+        if seconds > 0:
+            target = rows * AUTO_BATCH_TARGET_SECONDS / seconds
+        else:
+            target = rows * 2
+        target = min(max(target, self.size / 2), self.size * 2)
+        self.size = max(1, min(self.max_rows, int(target)))
+
+    def chunks(self, iterator: Iterable) -> Generator[list, None, None]:
+        iterator = iter(iterator)
+        while True:
+            chunk = list(itertools.islice(iterator, self.size))
+            if not chunk:
+                return
+            yield chunk
+
+
+class _LookupCache:
+    "Bounded least-recently-used mapping of ``(table, value)`` to primary keys"
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        # Database._lookup_cache_version() when the entries were last known
+        # to match the lookup tables
+        self.version: tuple | None = None
+
+    def get(self, key: Any) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.version = None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 def resolve_extracts(
     extracts: dict[str, str] | list[str] | tuple[str] | None,
 ) -> dict:
@@ -1,16 +1,24 @@
 import base64
+import bz2
+import codecs
 import contextlib
 import csv
 import enum
+import gzip
 import hashlib
 import importlib
 import io
 import itertools
 import json
+import lzma
 import os
+import pickle
+import re
 import sys
+import tempfile
 from collections.abc import Callable, Generator, Iterable, Iterator
 from typing import (
+    IO,
     TYPE_CHECKING,
     Any,
     BinaryIO,
@@ -205,25 +213,44 @@ def decode_base64_values(doc: dict[str, Any]) -> dict[str, Any]:
 
 
 class UpdateWrapper:
-    def __init__(self, wrapped: io.IOBase, update: Callable[[int], None]) -> None:
+    def __init__(
+        self,
+        wrapped: io.IOBase,
+        update: Callable[[int], None],
+        fileno: int | None = None,
+    ) -> None:
         self._wrapped = wrapped
         self._update = update
+        # If fileno is provided progress is measured by the position in that
+        # file, which counts compressed bytes for a decompressed stream
+        self._fileno = fileno
+        self._position = 0
+
+    def _progress(self, data: Union[bytes, str]) -> None:
+        if self._fileno is None:
+            self._update(len(data))
+        else:
+            position = os.lseek(self._fileno, 0, os.SEEK_CUR)
+            self._update(position - self._position)
+            self._position = position
 
     def __iter__(self) -> Iterator[bytes]:
         for line in self._wrapped:
-            self._update(len(line))
+            self._progress(line)
             yield line
 
     def read(self, size: int = -1) -> bytes:
         data = self._wrapped.read(size)
-        self._update(len(data))
+        self._progress(data)
         return data
 
 
 @contextlib.contextmanager
 def file_progress(
-    file: io.IOBase, silent: bool = False, **kwargs: object
+    file: io.IOBase, silent: bool = False, compressed: bool = False, **kwargs: object
 ) -> Generator[Union[io.IOBase, "UpdateWrapper"], None, None]:
+    # Pass compressed=True if file is decompressing its underlying file as it
+    # is read, so progress is measured in bytes of that file
     if silent:
         yield file
         return
@@ -236,9 +263,49 @@ def file_progress(
     if fileno == 0:  # 0 means stdin
         yield file
     else:
-        file_length = os.path.getsize(file.name)  # type: ignore
+        file_length = os.fstat(fileno).st_size
+        position_fileno = None
+        if compressed:
+            try:
+                os.lseek(fileno, 0, os.SEEK_CUR)
+            except OSError:
+                # Not seekable, so fall back to counting what is read
+                pass
+            else:
+                position_fileno = fileno
         with click.progressbar(length=file_length, **kwargs) as bar:  # type: ignore
-            yield UpdateWrapper(file, bar.update)
+            yield UpdateWrapper(file, bar.update, position_fileno)
+
+
+def _compression(head: bytes) -> str | None:
+    # Detect compression using the magic bytes at the start of the file
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if re.match(rb"BZh[1-9](1AY&SY|\x17rE8P\x90)", head):
+        return "bz2"
+    if head.startswith(b"\xfd7zXZ\x00"):
+        return "xz"
+    return None
+
+
+def decompress(fp: BinaryIO) -> BinaryIO:
+    """
+    If ``fp`` contains gzip, bz2 or xz compressed data return a file-like object
+    that decompresses it as it is read, otherwise return ``fp`` unchanged (or
+    wrapped in ``io.BufferedReader`` if it does not support ``peek()``).
+
+    :param fp: a file-like object containing binary data
+    """
+    if not hasattr(fp, "peek"):
+        fp = cast(BinaryIO, io.BufferedReader(cast(io.RawIOBase, fp)))
+    compression = _compression(fp.peek(10))  # type: ignore[attr-defined]
+    if compression == "gzip":
+        return cast(BinaryIO, gzip.GzipFile(fileobj=fp, mode="rb"))
+    elif compression == "bz2":
+        return cast(BinaryIO, bz2.BZ2File(fp, mode="rb"))
+    elif compression == "xz":
+        return cast(BinaryIO, lzma.LZMAFile(fp, mode="rb"))
+    return fp
 
 
 class Format(enum.Enum):
@@ -260,6 +327,162 @@ class RowError(Exception):
     pass
 
 
+# How much of a JSON file to read at a time when streaming a top-level array
+JSON_READ_SIZE = 64 * 1024
+
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _JSONArrayStream:
+    """
+    Iterate over the items in a top-level JSON array one at a time, reading the
+    file in chunks so that memory use is bounded by the size of a single item.
+
+    A top-level object is treated as an array containing just that object,
+    unless further objects follow it on later lines - newline-delimited JSON.
+    """
+
+    def __init__(
+        self, fp: Union[BinaryIO, IO[str]], read_size: int = JSON_READ_SIZE
+    ) -> None:
+        self._fp = fp
+        self._read_size = read_size
+        self._decoder = json.JSONDecoder()
+        self._text_decoder: codecs.IncrementalDecoder | None = None
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        # Where self._buffer starts within the whole document, for error messages
+        self._offset = 0
+        self._lineno = 1
+        self._line_start = 0
+
+    def _fill(self, size: int) -> None:
+        consumed = self._buffer[: self._pos]
+        newlines = consumed.count("\n")
+        if newlines:
+            self._lineno += newlines
+            self._line_start = self._offset + consumed.rindex("\n") + 1
+        self._offset += self._pos
+        self._buffer = self._buffer[self._pos :]
+        self._pos = 0
+        data = self._fp.read(size)
+        if isinstance(data, bytes):
+            if self._text_decoder is None:
+                # Detect the encoding the same way json.loads() does for bytes
+                while 0 < len(data) < 4:
+                    more = cast(bytes, self._fp.read(4 - len(data)))
+                    if not more:
+                        break
+                    data += more
+                self._text_decoder = codecs.getincrementaldecoder(
+                    json.detect_encoding(data)
+                )("surrogatepass")
+            text = self._text_decoder.decode(data, final=not data)
+        else:
+            text = data
+        if not data:
+            self._eof = True
+        self._buffer += text
+
+    def _error(self, msg: str, pos: int) -> json.JSONDecodeError:
+        error = json.JSONDecodeError(msg, self._buffer, pos)
+        # Report the position within the document, not within the buffer
+        error.pos = self._offset + pos
+        if error.lineno == 1:
+            error.colno += self._offset - self._line_start
+        error.lineno += self._lineno - 1
+        error.args = (
+            "%s: line %d column %d (char %d)"
+            % (msg, error.lineno, error.colno, error.pos),
+        )
+        return error
+
+    def _next_char(self) -> str:
+        # Skip whitespace, returning the next character or "" at end of file
+        while True:
+            match = _JSON_WHITESPACE.match(self._buffer, self._pos)
+            assert match is not None
+            self._pos = match.end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._eof:
+                return ""
+            self._fill(self._read_size)
+
+    def _decode(self) -> Any:
+        size = self._read_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as ex:
+                # An error at the end of the buffer may just mean the value
+                # continues in the part of the file that has not been read yet
+                truncated = ex.msg.startswith("Unterminated string") or (
+                    ex.pos >= len(self._buffer) - 8
+                )
+                if self._eof or not truncated:
+                    raise self._error(ex.msg, ex.pos)
+            else:
+                # A number such as 12 could continue as 123 after the buffer
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            self._fill(size)
+            # Read progressively larger chunks for values spanning many reads
+            size *= 2
+
+    def __iter__(self) -> Iterator[Any]:
+        first = self._next_char()
+        if first == "[":
+            self._pos += 1
+            if self._next_char() == "]":
+                self._pos += 1
+            else:
+                while True:
+                    yield self._decode()
+                    char = self._next_char()
+                    if char == "]":
+                        self._pos += 1
+                        break
+                    if char != ",":
+                        raise self._error("Expecting ',' delimiter", self._pos)
+                    self._pos += 1
+                    self._next_char()
+        elif first == "{":
+            yield self._decode()
+            # Newline-delimited JSON with a first object too long to detect
+            # from the start of the file: each object begins on a new line
+            while True:
+                line = self._lineno + self._buffer.count("\n", 0, self._pos)
+                if self._next_char() != "{":
+                    break
+                if self._lineno + self._buffer.count("\n", 0, self._pos) == line:
+                    raise self._error("Extra data", self._pos)
+                yield self._decode()
+        elif not first:
+            raise self._error("Expecting value", self._pos)
+        else:
+            # Raises JSONDecodeError if this is not valid JSON
+            self._decode()
+            raise RowsFromFileBadJSON("JSON must be a list or a dictionary")
+        if self._next_char():
+            raise self._error("Extra data", self._pos)
+
+
+def _stream_json(
+    fp: Union[BinaryIO, IO[str]], read_size: int = JSON_READ_SIZE
+) -> Iterator[Any]:
+    # The first item is read straight away, so a file that is not JSON at all
+    # fails here rather than part way through being consumed
+    items = iter(_JSONArrayStream(fp, read_size))
+    try:
+        first = next(items)
+    except StopIteration:
+        return iter(())
+    return itertools.chain([first], items)
+
+
 def _extra_key_strategy(
     reader: Iterable[dict[str | None, object]],
     ignore_extras: bool | None = False,
@@ -285,6 +508,17 @@ def _extra_key_strategy(
             yield row_out
 
 
+def _looks_like_newline_json(first_bytes: bytes) -> bool:
+    # Newline-delimited JSON if the first object is followed by another object
+    # on a later line, rather than by the end of the file
+    text = first_bytes.decode("utf-8", "ignore")
+    try:
+        _, end = json.JSONDecoder().raw_decode(text)
+    except json.JSONDecodeError:
+        return False
+    return bool(re.match(r"[ \t\r]*\n\s*\{", text[end:]))
+
+
 def rows_from_file(
     fp: BinaryIO,
     format: Format | None = None,
@@ -306,7 +540,10 @@ def rows_from_file(
         # Outputs [{'id': '1', 'name': 'Cleo'}] Format.CSV
 
     This defaults to attempting to automatically detect the format of the data, or you can pass in an
-    explicit format using the format= option.
+    explicit format using the format= option. Newline-delimited JSON is detected if the file starts
+    with a JSON object that is followed by another object on the next line. If the first object is
+    too long for that to be detected, the file is reported as ``Format.JSON`` but its objects are
+    still read one line at a time.
 
     Returns a tuple of ``(rows_generator, format_used)`` where ``rows_generator`` can be iterated over
     to return dictionaries, while ``format_used`` is a value from the ``sqlite_utils.utils.Format`` enum:
@@ -319,6 +556,12 @@ def rows_from_file(
             JSON = 3
             NL = 4
 
+    JSON arrays are read incrementally, so only one item needs to be held in memory at a
+    time. Invalid JSON at the start of the file raises ``json.JSONDecodeError`` straight away,
+    but invalid JSON later in the file will raise that exception when you loop over the generator.
+
+    Files compressed using gzip, bz2 or xz are detected and decompressed as they are read.
+
     If a CSV or TSV file includes rows with more fields than are declared in the header a
     ``sqlite_utils.utils.RowError`` exception will be raised when you loop over the generator.
 
@@ -335,13 +578,10 @@ def rows_from_file(
     """
     if ignore_extras and extras_key:
         raise ValueError("Cannot use ignore_extras= and extras_key= together")
+    if not isinstance(fp, io.TextIOBase):
+        fp = decompress(fp)
     if format == Format.JSON:
-        decoded = json.load(fp)
-        if isinstance(decoded, dict):
-            decoded = [decoded]
-        if not isinstance(decoded, list):
-            raise RowsFromFileBadJSON("JSON must be a list or a dictionary")
-        return decoded, Format.JSON
+        return _stream_json(fp), Format.JSON
     elif format == Format.NL:
         return (json.loads(line) for line in fp if line.strip()), Format.NL
     elif format == Format.CSV:
@@ -381,8 +621,9 @@ def rows_from_file(
             )
         if not first_bytes:
             return (), Format.CSV
-        if first_bytes.startswith((b"[", b"{")):
-            # TODO: Detect newline-JSON
+        if first_bytes.startswith(b"{") and _looks_like_newline_json(first_bytes):
+            return rows_from_file(buffered, format=Format.NL)
+        elif first_bytes.startswith((b"[", b"{")):
             return rows_from_file(buffered, format=Format.JSON)
         else:
             dialect = csv.Sniffer().sniff(
@@ -424,23 +665,69 @@ class TypeTracker:
         print(tracker.types)
         # Outputs {'id': 'integer', 'name': 'text'}
         db["creatures"].transform(types=tracker.types)
+
+    :param sample: Only use the first ``sample`` rows to decide the types, instead of every row
     """
 
-    def __init__(self) -> None:
+    def __init__(self, sample: int | None = None) -> None:
         self.trackers: dict[str, ValueTracker] = {}
+        self.sample = sample
 
-    def wrap(self, iterator: Iterable[dict[str, Any]]) -> Iterable[dict[str, Any]]:
+    def wrap(self, iterator: Iterable[T]) -> Iterable[T]:
         """
         Use this to loop through an existing iterator, tracking the column types
         as part of the iteration.
 
+        The iterator can yield dictionaries, or it can use the same list format as
+        ``table.insert_all()`` - a list of column names followed by lists of values.
+
         :param iterator: The iterator to wrap
         """
-        for row in iterator:
+        rows: Iterator[Any] = iter(iterator)
+        try:
+            first = next(rows)
+        except StopIteration:
+            return
+        if isinstance(first, dict):
+            yield from self._wrap_dicts(itertools.chain([first], rows))
+        else:
+            # A list of column names, followed by lists of values
+            yield from self._wrap_lists(first, rows)
+
+    def _sampled(self, rows: Iterator[T]) -> Iterator[T]:
+        return rows if self.sample is None else itertools.islice(rows, self.sample)
+
+    def _wrap_dicts(self, rows: Iterator[Any]) -> Iterator[Any]:
+        trackers = self.trackers
+        for row in self._sampled(rows):
             for key, value in row.items():
-                tracker = self.trackers.setdefault(key, ValueTracker())
-                tracker.evaluate(value)
+                tracker = trackers.get(key)
+                if tracker is None:
+                    tracker = trackers[key] = ValueTracker()
+                # Columns already known to be text do not need testing again
+                if value and tracker.couldbe:
+                    tracker.evaluate(value)
+            yield row
+        # Rows after the sample are not evaluated, and any columns that first
+        # appear in them are treated as text
+        for row in rows:
+            if not trackers.keys() >= row.keys():
+                for key in row.keys() - trackers.keys():
+                    trackers[key] = ValueTracker()
+                    trackers[key].couldbe.clear()
+            yield row
+
+    def _wrap_lists(self, columns: list[str], rows: Iterator[Any]) -> Iterator[Any]:
+        yield columns
+        trackers = [
+            self.trackers.setdefault(column, ValueTracker()) for column in columns
+        ]
+        for row in self._sampled(rows):
+            for tracker, value in zip(trackers, row):
+                if value and tracker.couldbe:
+                    tracker.evaluate(value)
             yield row
+        yield from rows
 
     @property
     def types(self) -> dict[str, str]:
@@ -451,11 +738,18 @@ class TypeTracker:
         return {key: tracker.guessed_type for key, tracker in self.trackers.items()}
 
 
+# Strings that int() and float() would both accept, and strings that only
+# float() would accept - anything else falls back to actually calling them
+_INTEGER_RE = re.compile(r"[+-]?\d+")
+_FLOAT_RE = re.compile(r"[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?")
+
+
 class ValueTracker:
     couldbe: dict[str, Callable[[object], bool]]
 
     def __init__(self) -> None:
-        self.couldbe = {key: getattr(self, "test_" + key) for key in self.get_tests()}
+        self._tests = self.get_tests()
+        self.couldbe = {key: getattr(self, "test_" + key) for key in self._tests}
 
     @classmethod
     def get_tests(cls) -> list[str]:
@@ -482,16 +776,22 @@ class ValueTracker:
 
     @property
     def guessed_type(self) -> str:
-        options = set(self.couldbe.keys())
         # Return based on precedence
-        for key in self.get_tests():
-            if key in options:
+        for key in self._tests:
+            if key in self.couldbe:
                 return key
         return "text"
 
     def evaluate(self, value: object) -> None:
         if not value or not self.couldbe:
             return
+        if isinstance(value, str):
+            # Fast paths for the common cases, without raising exceptions
+            if _INTEGER_RE.fullmatch(value):
+                return
+            if _FLOAT_RE.fullmatch(value):
+                self.couldbe.pop("integer", None)
+                return
         not_these: list[str] = []
         for name, test in self.couldbe.items():
             if not test(value):
@@ -582,6 +882,56 @@ def chunks(sequence: Iterable[T], size: int) -> Iterable[Iterable[T]]:
         yield itertools.chain([item], itertools.islice(iterator, size - 1))
 
 
+# Rows that _SpooledRows keeps in memory before writing the rest to disk
+SPOOL_MEMORY_ROWS = 10000
+
+
+def _read_ahead(rows: Iterable[T], count: int) -> Iterator[T]:
+    """
+    Read the first ``count`` items from ``rows`` straight away - so that
+    anything tracking the items as they pass through has seen them - then
+    yield every item.
+    """
+    iterator = iter(rows)
+    head = list(itertools.islice(iterator, count))
+    return itertools.chain(head, iterator)
+
+
+class _SpooledRows(Iterable[T]):
+    """
+    Read every item from an iterator up front - so that anything tracking
+    the items as they pass through, such as a ``TypeTracker``, has seen them
+    all - then replay them when this is iterated over.
+
+    The first ``memory_rows`` items (default ``SPOOL_MEMORY_ROWS``) are kept in
+    memory and any more are pickled to a temporary file in batches of that size.
+    """
+
+    def __init__(self, rows: Iterable[T], memory_rows: int | None = None) -> None:
+        memory_rows = memory_rows or SPOOL_MEMORY_ROWS
+        iterator = iter(rows)
+        self._head = list(itertools.islice(iterator, memory_rows))
+        self._spool: IO[bytes] | None = None
+        for batch in chunks(iterator, memory_rows):
+            if self._spool is None:
+                self._spool = tempfile.TemporaryFile()
+            pickle.dump(list(batch), self._spool, pickle.HIGHEST_PROTOCOL)
+
+    def __iter__(self) -> Iterator[T]:
+        head, self._head = self._head, []
+        yield from head
+        if self._spool is None:
+            return
+        with self._spool as spool:
+            spool.seek(0)
+            while True:
+                try:
+                    batch = pickle.load(spool)
+                except EOFError:
+                    break
+                yield from batch
+
+
 def hash_record(record: dict[str, Any], keys: Iterable[str] | None = None) -> str:
     """
     ``record`` should be a Python dictionary. Returns a sha1 hash of the
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+
+import pytest
+
+from sqlite_utils.aio import AsyncDatabase, AsyncTable
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_async_database_runs_on_worker_thread(tmpdir):
+    async def go():
+        async with AsyncDatabase(str(tmpdir / "test.db")) as db:
+            thread_ids = set()
+            db.db._tracer = lambda sql, params: thread_ids.add(threading.get_ident())
+            table = db.table("dogs")
+            assert isinstance(table, AsyncTable)
+            assert await table.insert({"id": 1, "name": "Cleo"}, pk="id") is table
+            assert table.last_pk == 1
+            assert [row async for row in db.query("select * from dogs")] == [
+                {"id": 1, "name": "Cleo"}
+            ]
+            assert thread_ids and threading.get_ident() not in thread_ids
+            assert len(thread_ids) == 1
+
+    run(go())
+
+
+def test_async_query_fetches_in_blocks():
+    async def go():
+        db = AsyncDatabase(memory=True)
+        await db.table("numbers").insert_all({"n": i} for i in range(25))
+        blocks = []
+        original = db._run
+
+        async def _run(fn, *args, **kwargs):
+            result = await original(fn, *args, **kwargs)
+            if isinstance(result, list):
+                blocks.append(len(result))
+            return result
+
+        db._run = _run
+        rows = [row async for row in db.query("select n from numbers", block_size=10)]
+        assert [row["n"] for row in rows] == list(range(25))
+        assert blocks == [10, 10, 5]
+        tuples = [
+            row
+            async for row in db.table("numbers").rows_where(
+                "n < ?", [3], row_factory="tuple"
+            )
+        ]
+        assert tuples == [(0,), (1,), (2,)]
+        await db.close()
+
+    run(go())
+
+
+def test_async_table_methods():
+    async def go():
+        db = AsyncDatabase(memory=True)
+        dogs = db["dogs"]
+        assert not await dogs.exists()
+        await dogs.insert_all(
+            [{"id": 1, "name": "Cleo"}, {"id": 2, "name": "Pancakes"}], pk="id"
+        )
+        await dogs.upsert({"id": 2, "age": 3}, pk="id", alter=True)
+        await dogs.update(1, {"age": 5})
+        assert await dogs.get(2) == {"id": 2, "name": "Pancakes", "age": 3}
+        assert await dogs.count() == 2
+        assert await dogs.count_where("age > ?", [4]) == 1
+        await dogs.delete(1)
+        assert await dogs.count() == 1
+        assert await db.table("species").lookup({"name": "dog"}) == 1
+        assert await db.table_names() == ["dogs", "species"]
+        assert await dogs.run(lambda table: table.pks) == ["id"]
+        assert await db.run(lambda db: db["dogs"].columns_dict) == {
+            "id": int,
+            "name": str,
+            "age": int,
+        }
+        assert await db.execute("update dogs set age = age + 1") == 1
+        assert await db.query_columns("select age from dogs") == {"age": [4]}
+        await dogs.run(lambda table: table.enable_fts(["name"]))
+        assert [row["name"] async for row in dogs.search("pancakes")] == ["Pancakes"]
+        await db.close()
+
+    run(go())
+
+
+def test_async_atomic():
+    async def go():
+        db = AsyncDatabase(memory=True)
+        await db.table("dogs").create({"name": str})
+        async with db.atomic():
+            await db.table("dogs").insert({"name": "Cleo"})
+            assert db.db.conn.in_transaction
+        assert not db.db.conn.in_transaction
+        with pytest.raises(ZeroDivisionError):
+            async with db.atomic():
+                await db.table("dogs").insert({"name": "Pancakes"})
+                async with db.atomic():
+                    await db.table("dogs").insert({"name": "Lila"})
+                1 / 0
+        assert [row["name"] async for row in db.query("select name from dogs")] == [
+            "Cleo"
+        ]
+        await db.close()
+
+    run(go())
+
+
+def test_async_atomic_blocks_other_tasks():
+    async def go():
+        db = AsyncDatabase(memory=True)
+        await db.table("dogs").create({"name": str})
+        events = []
+
+        async def transaction():
+            async with db.atomic():
+                await db.table("dogs").insert({"name": "Cleo"})
+                events.append("inserted")
+                await asyncio.sleep(0.05)
+                events.append("committing")
+
+        async def other():
+            await asyncio.sleep(0.01)
+            events.append("counting")
+            events.append(await db.table("dogs").count())
+
+        await asyncio.gather(transaction(), other())
+        # The other task could not see - or join - the open transaction
+        assert events == ["inserted", "counting", "committing", 1]
+        await db.close()
+
+    run(go())
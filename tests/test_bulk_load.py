@@ -0,0 +1,112 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from sqlite_utils import Database, cli
+from sqlite_utils.db import BULK_LOAD_PRAGMAS, TransactionError
+
+
+def pragmas(db):
+    return {
+        name: db.execute(f"PRAGMA {name};").fetchone()[0] for name in BULK_LOAD_PRAGMAS
+    }
+
+
+@pytest.fixture
+def db(tmpdir):
+    return Database(str(tmpdir / "test.db"))
+
+
+def test_bulk_load_applies_and_restores_pragmas(db, tmpdir):
+    before = pragmas(db)
+    with db.bulk_load() as bulk_db:
+        assert bulk_db is db
+        assert pragmas(db) == {
+            "synchronous": 0,
+            "journal_mode": "memory",
+            "cache_size": -262144,
+            "temp_store": 2,
+            "locking_mode": "exclusive",
+            "mmap_size": 268435456,
+        }
+        db.table("rows").insert_all({"id": i} for i in range(100))
+    assert pragmas(db) == before
+    # The exclusive lock was released, so other connections can read
+    assert Database(str(tmpdir / "test.db")).table("rows").count == 100
+
+
+def test_bulk_load_restores_pragmas_on_error(db):
+    before = pragmas(db)
+    with pytest.raises(ZeroDivisionError):
+        with db.bulk_load():
+            1 / 0
+    assert pragmas(db) == before
+
+
+def test_bulk_load_overrides(db):
+    with db.bulk_load(cache_size=-1000, locking_mode=None, mmap_size=None):
+        settings = pragmas(db)
+        assert settings["cache_size"] == -1000
+        assert settings["locking_mode"] == "normal"
+        assert settings["mmap_size"] == 0
+    assert db.execute("PRAGMA cache_size;").fetchone()[0] == -2000
+
+
+def test_bulk_load_keeps_wal_mode(db):
+    db.enable_wal()
+    with db.bulk_load():
+        assert db.journal_mode == "wal"
+        assert db.execute("PRAGMA synchronous;").fetchone()[0] == 0
+    assert db.journal_mode == "wal"
+
+
+@pytest.mark.parametrize("pragmas", ({"cache size": 1}, {"synchronous": "OFF; DROP"}))
+def test_bulk_load_invalid_pragmas(db, pragmas):
+    with pytest.raises(ValueError):
+        with db.bulk_load(**pragmas):
+            pass
+    assert db.execute("PRAGMA synchronous;").fetchone()[0] == 2
+
+
+def test_bulk_load_inside_transaction_raises(db):
+    with pytest.raises(TransactionError), db.atomic():
+        db.table("test").insert({"id": 1})
+        with db.bulk_load():
+            pass
+
+
+@pytest.mark.parametrize(
+    "args",
+    (
+        ["insert", "rows", "-", "--bulk-load"],
+        ["upsert", "rows", "-", "--pk", "id", "--bulk-load"],
+        ["bulk", "insert into rows (id) values (:id)", "-", "--bulk-load"],
+    ),
+)
+def test_cli_bulk_load(tmpdir, args):
+    db_path = str(tmpdir / "test.db")
+    db = Database(db_path)
+    db.table("rows").create({"id": int}, pk="id")
+    db.close()
+    result = CliRunner().invoke(
+        cli.cli,
+        [args[0], db_path] + args[1:],
+        input=json.dumps([{"id": 1}, {"id": 2}]),
+    )
+    assert result.exit_code == 0, result.output
+    db = Database(db_path)
+    assert [row["id"] for row in db.table("rows").rows] == [1, 2]
+    assert db.execute("PRAGMA synchronous;").fetchone()[0] == 2
+    assert db.journal_mode == "delete"
+
+
+def test_cli_insert_files_bulk_load(tmpdir):
+    db_path = str(tmpdir / "files.db")
+    (tmpdir / "one.txt").write_text("one", "utf-8")
+    result = CliRunner().invoke(
+        cli.cli,
+        ["insert-files", db_path, "files", str(tmpdir / "one.txt"), "--bulk-load"],
+    )
+    assert result.exit_code == 0, result.output
+    assert Database(db_path).table("files").count == 1
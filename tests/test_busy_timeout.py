@@ -0,0 +1,150 @@
+import threading
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from sqlite_utils import Database, cli
+from sqlite_utils.utils import sqlite3
+
+
+@pytest.fixture
+def db_path(tmpdir):
+    path = str(tmpdir / "busy.db")
+    db = Database(path)
+    db.table("dogs").insert({"id": 1, "name": "Cleo"}, pk="id")
+    db.close()
+    return path
+
+
+def hold_write_lock(path, seconds):
+    # Lock the database from another connection, releasing it after a delay
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.isolation_level = None
+    conn.execute("BEGIN IMMEDIATE")
+
+    def release():
+        time.sleep(seconds)
+        conn.execute("COMMIT")
+        conn.close()
+
+    thread = threading.Thread(target=release)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("busy_timeout,expected", ((30, 500), (0.2, 200)))
+def test_busy_timeout_sets_pragma(db_path, busy_timeout, expected):
+    # SQLite only waits for part of busy_timeout, leaving the rest to retries
+    db = Database(db_path, busy_timeout=busy_timeout)
+    assert db.execute("PRAGMA busy_timeout").fetchone()[0] == expected
+    assert db.busy_info() == (0, 0.0)
+
+
+@pytest.mark.parametrize("use_atomic", (False, True))
+def test_busy_timeout_retries_until_lock_released(db_path, use_atomic):
+    db = Database(db_path, busy_timeout=5)
+    thread = hold_write_lock(db_path, 1.2)
+    if use_atomic:
+        with db.atomic():
+            db.table("dogs").insert({"id": 2, "name": "Pancakes"})
+    else:
+        db.execute("insert into dogs (id, name) values (2, 'Pancakes')")
+    thread.join()
+    assert db.table("dogs").count == 2
+    retries, wait_seconds = db.busy_info()
+    assert retries > 1
+    assert 1 < wait_seconds < 5
+
+
+def test_busy_timeout_gives_up(db_path):
+    db = Database(db_path, busy_timeout=1.2)
+    thread = hold_write_lock(db_path, 3)
+    start = time.monotonic()
+    with pytest.raises(sqlite3.OperationalError, match="database is locked"):
+        db.table("dogs").insert({"id": 2, "name": "Pancakes"})
+    # Each attempt waits for at most half a second inside SQLite
+    assert 1.2 <= time.monotonic() - start < 2
+    thread.join()
+    assert db.busy_info().retries > 0
+
+
+def test_without_busy_timeout_no_retries(db_path):
+    db = Database(db_path)
+    db.execute("PRAGMA busy_timeout = 0")
+    thread = hold_write_lock(db_path, 0.3)
+    with pytest.raises(sqlite3.OperationalError, match="database is locked"):
+        db.execute("insert into dogs (id, name) values (2, 'Pancakes')")
+    thread.join()
+    assert db.busy_info() == (0, 0.0)
+
+
+@pytest.mark.parametrize("busy_timeout,expected_locked", ((None, False), (5, True)))
+def test_busy_timeout_atomic_takes_write_lock(db_path, busy_timeout, expected_locked):
+    db = Database(db_path, busy_timeout=busy_timeout)
+    other = sqlite3.connect(db_path, timeout=0)
+    other.isolation_level = None
+    with db.atomic():
+        # BEGIN IMMEDIATE holds the write lock from the start of the block
+        if expected_locked:
+            with pytest.raises(sqlite3.OperationalError):
+                other.execute("BEGIN IMMEDIATE")
+        else:
+            other.execute("BEGIN IMMEDIATE")
+            other.execute("COMMIT")
+    other.close()
+
+
+def test_busy_timeout_non_busy_errors_are_not_retried(db_path):
+    db = Database(db_path, busy_timeout=5)
+    with pytest.raises(sqlite3.OperationalError, match="no such table"):
+        db.execute("insert into missing (id) values (1)")
+    assert db.busy_info().retries == 0
+
+
+def test_cli_insert_busy_timeout(db_path):
+    thread = hold_write_lock(db_path, 0.3)
+    result = CliRunner().invoke(
+        cli.cli,
+        ["insert", db_path, "dogs", "-", "--pk", "id", "--busy-timeout", "5"],
+        input='{"id": 2, "name": "Pancakes"}',
+    )
+    thread.join()
+    assert result.exit_code == 0, result.output
+    assert Database(db_path).table("dogs").count == 2
+
+
+# Commands that only read from the database, or use an in-memory database
+READ_ONLY_COMMANDS = {
+    "dump",
+    "indexes",
+    "install",
+    "memory",
+    "plugins",
+    "rows",
+    "schema",
+    "search",
+    "tables",
+    "triggers",
+    "uninstall",
+    "views",
+}
+
+
+@pytest.mark.parametrize("name", sorted(set(cli.cli.commands) - READ_ONLY_COMMANDS))
+def test_write_commands_have_busy_timeout_option(name):
+    options = [
+        option for param in cli.cli.commands[name].params for option in param.opts
+    ]
+    assert "--busy-timeout" in options
+
+
+def test_cli_create_table_busy_timeout(db_path):
+    thread = hold_write_lock(db_path, 0.3)
+    result = CliRunner().invoke(
+        cli.cli,
+        ["create-table", db_path, "cats", "id", "integer", "--busy-timeout", "5"],
+    )
+    thread.join()
+    assert result.exit_code == 0, result.output
+    assert Database(db_path).table("cats").exists()
@@ -1,4 +1,9 @@
+import bz2
+import gzip
+import itertools
 import json
+import lzma
+import os
 import subprocess
 import sys
 import time
@@ -6,7 +11,8 @@ import time
 import pytest
 from click.testing import CliRunner
 
-from sqlite_utils import Database, cli
+from sqlite_utils import Database, cli, utils
+from sqlite_utils.db import Table
 
 
 def test_insert_simple(tmpdir):
@@ -51,6 +57,51 @@ def test_insert_invalid_json_error(tmpdir):
     )
 
 
+def test_insert_invalid_json_error_later_in_file(tmpdir):
+    db_path = str(tmpdir / "dogs.db")
+    result = CliRunner().invoke(
+        cli.cli,
+        ["insert", db_path, "dogs", "-"],
+        input='[{"name": "Cleo"},\n {"name": ]',
+    )
+    assert result.exit_code == 1
+    assert result.output == (
+        "Error: Invalid JSON - use --csv for CSV or --tsv for TSV files\n\n"
+        "JSON error: Expecting value: line 2 column 11 (char 29)\n"
+    )
+
+
+def test_insert_json_must_be_list_or_dict(tmpdir):
+    db_path = str(tmpdir / "dogs.db")
+    result = CliRunner().invoke(cli.cli, ["insert", db_path, "dogs", "-"], input="5")
+    assert result.exit_code == 1
+    assert result.output == "Error: JSON must be a list or a dictionary\n"
+
+
+@pytest.mark.parametrize(
+    "compress,suffix",
+    ((gzip.compress, "gz"), (bz2.compress, "bz2"), (lzma.compress, "xz")),
+)
+@pytest.mark.parametrize("use_stdin", (False, True))
+def test_insert_compressed(tmpdir, compress, suffix, use_stdin):
+    db_path = str(tmpdir / "dogs.db")
+    data = compress(b"id,name\n1,Cleo\n2,Pancakes\n")
+    if use_stdin:
+        path, input = "-", data
+    else:
+        path, input = str(tmpdir / "dogs.csv.{}".format(suffix)), None
+        with open(path, "wb") as fp:
+            fp.write(data)
+    result = CliRunner().invoke(
+        cli.cli, ["insert", db_path, "dogs", path, "--csv"], input=input
+    )
+    assert result.exit_code == 0, result.output
+    assert list(Database(db_path)["dogs"].rows) == [
+        {"id": 1, "name": "Cleo"},
+        {"id": 2, "name": "Pancakes"},
+    ]
+
+
 def test_insert_json_flatten(tmpdir):
     db_path = str(tmpdir / "flat.db")
     result = CliRunner().invoke(
@@ -666,6 +717,129 @@ def test_insert_csv_detect_types_new_table(db_path):
     assert db.table("data").columns_dict == {"name": str, "age": int, "weight": float}
 
 
+def test_insert_csv_detect_types_creates_typed_table(db_path, monkeypatch):
+    # The table is created with the detected types, so no transform() is needed
+    def transform(*args, **kwargs):
+        raise AssertionError("transform() should not be called")
+
+    monkeypatch.setattr(Table, "transform", transform)
+    monkeypatch.setattr(utils, "SPOOL_MEMORY_ROWS", 2)
+    result = CliRunner().invoke(
+        cli.cli,
+        ["insert", db_path, "data", "-", "--csv"],
+        catch_exceptions=False,
+        input="name,age,weight\nCleo,5,12.5\nPancakes,,3\nLila,2,\nBants,3.5,1\n",
+    )
+    assert result.exit_code == 0, result.output
+    db = Database(db_path)
+    assert db.table("data").columns_dict == {
+        "name": str,
+        "age": float,
+        "weight": float,
+    }
+    assert list(db.table("data").rows) == [
+        {"name": "Cleo", "age": 5.0, "weight": 12.5},
+        {"name": "Pancakes", "age": None, "weight": 3.0},
+        {"name": "Lila", "age": 2.0, "weight": None},
+        {"name": "Bants", "age": 3.5, "weight": 1.0},
+    ]
+
+
+CSV_MIXED_TYPES = "name,age\nCleo,5\nPancakes,4\nLila,2.5\nBants,3\n"
+
+
+@pytest.mark.parametrize("workers", (None, "2"))
+def test_insert_csv_detect_types_from_sample(db_path, monkeypatch, workers):
+    # Types come from the first rows, the rest are streamed without spooling
+    def spooled_rows(*args, **kwargs):
+        raise AssertionError("rows should not be spooled")
+
+    monkeypatch.setattr(cli, "_SpooledRows", spooled_rows)
+    args = ["insert", db_path, "data", "-", "--csv", "--detect-types-sample", "2"]
+    if workers:
+        args.extend(["--workers", workers])
+    result = CliRunner().invoke(
+        cli.cli, args, catch_exceptions=False, input=CSV_MIXED_TYPES
+    )
+    assert result.exit_code == 0, result.output
+    db = Database(db_path)
+    assert db.table("data").columns_dict == {"name": str, "age": int}
+    assert [row["age"] for row in db.table("data").rows] == [5, 4, 2.5, 3]
+
+
+@pytest.mark.parametrize("extra_args", ([], ["--strict", "--detect-types-sample", "2"]))
+def test_insert_csv_detect_types_every_row(db_path, monkeypatch, extra_args):
+    monkeypatch.setattr(utils, "SPOOL_MEMORY_ROWS", 2)
+    result = CliRunner().invoke(
+        cli.cli,
+        ["insert", db_path, "data", "-", "--csv"] + extra_args,
+        catch_exceptions=False,
+        input=CSV_MIXED_TYPES,
+    )
+    assert result.exit_code == 0, result.output
+    db = Database(db_path)
+    assert db.table("data").columns_dict == {"name": str, "age": float}
+    assert [row["age"] for row in db.table("data").rows] == [5, 4, 2.5, 3]
+
+
+def test_insert_csv_detect_types_value_after_10000_rows(db_path):
+    # A value after the first 10,000 rows still decides the type, so zip
+    # codes keep their leading zeros
+    result = CliRunner().invoke(
+        cli.cli,
+        ["insert", db_path, "places", "-", "--csv"],
+        catch_exceptions=False,
+        input="zip\n" + "02134\n" * 10000 + "K1A 0B1\n",
+    )
+    assert result.exit_code == 0, result.output
+    db = Database(db_path)
+    assert db.table("places").columns_dict == {"zip": str}
+    zips = [row[0] for row in db.execute("select zip from places")]
+    assert zips == ["02134"] * 10000 + ["K1A 0B1"]
+
+
+def test_insert_csv_uses_list_mode(db_path, monkeypatch):
+    first_records = []
+    insert_all = Table.insert_all
+
+    def capture_insert_all(self, records, *args, **kwargs):
+        records = iter(records)
+        first = next(records)
+        first_records.append(first)
+        return insert_all(self, itertools.chain([first], records), *args, **kwargs)
+
+    monkeypatch.setattr(Table, "insert_all", capture_insert_all)
+    result = CliRunner().invoke(
+        cli.cli,
+        ["insert", db_path, "data", "-", "--csv", "--empty-null", "--stop-after", "2"],
+        catch_exceptions=False,
+        input="name,age,weight\nCleo,5,\nPancakes,,3,extra\nLila,2,1\n",
+    )
+    assert result.exit_code == 0, result.output
+    # Rows are passed as lists, after a list of the column names
+    assert first_records == [["name", "age", "weight"]]
+    assert list(Database(db_path).table("data").rows) == [
+        {"name": "Cleo", "age": 5, "weight": None},
+        {"name": "Pancakes", "age": None, "weight": 3},
+    ]
+
+
+def test_insert_csv_alter_existing_table(db_path):
+    db = Database(db_path)
+    db.table("data").insert({"name": "Cleo"})
+    result = CliRunner().invoke(
+        cli.cli,
+        ["insert", db_path, "data", "-", "--csv", "--alter"],
+        catch_exceptions=False,
+        input="name,age\nPancakes,4\n",
+    )
+    assert result.exit_code == 0, result.output
+    assert list(db.table("data").rows) == [
+        {"name": "Cleo", "age": None},
+        {"name": "Pancakes", "age": "4"},
+    ]
+
+
 @pytest.mark.parametrize(
     "command,extra_args,input_text,expected_row",
     (
@@ -892,3 +1066,87 @@ def test_insert_code_file_not_found(tmpdir):
     )
     assert result.exit_code == 1
     assert "File not found: missing.py" in result.output
+
+
+@pytest.mark.parametrize("workers", ("1", "4"))
+def test_insert_workers(tmpdir, workers):
+    db_path = str(tmpdir / "dogs.db")
+    result = CliRunner().invoke(
+        cli.cli,
+        [
+            "insert",
+            db_path,
+            "dogs",
+            "-",
+            "--nl",
+            "--workers",
+            workers,
+            "--batch-size",
+            "7",
+            "--convert",
+            'row["name"] = row["name"].upper()',
+        ],
+        input="\n".join(
+            json.dumps({"id": i, "name": "dog {}".format(i)}) for i in range(500)
+        ),
+    )
+    assert result.exit_code == 0, result.output
+    rows = list(Database(db_path).query("select id, name from dogs order by rowid"))
+    assert rows == [{"id": i, "name": "DOG {}".format(i)} for i in range(500)]
+
+
+def test_insert_workers_convert_in_other_processes(tmpdir):
+    db_path = str(tmpdir / "data.db")
+    result = CliRunner().invoke(
+        cli.cli,
+        [
+            "insert",
+            db_path,
+            "data",
+            "-",
+            "--nl",
+            "--workers",
+            "2",
+            "--import",
+            "os",
+            "--convert",
+            'row["pid"] = os.getpid()',
+        ],
+        input='{"id": 1}\n{"id": 2}\n',
+    )
+    assert result.exit_code == 0, result.output
+    pids = {row["pid"] for row in Database(db_path)["data"].rows}
+    assert os.getpid() not in pids
+
+
+def test_insert_workers_csv_detect_types(tmpdir):
+    db_path = str(tmpdir / "data.db")
+    result = CliRunner().invoke(
+        cli.cli,
+        ["insert", db_path, "data", "-", "--csv", "--workers", "2"],
+        input="id,score\n1,1.5\n2,2.5\n",
+    )
+    assert result.exit_code == 0, result.output
+    assert Database(db_path).table("data").columns_dict == {"id": int, "score": float}
+
+
+@pytest.mark.parametrize(
+    "args,input,expected",
+    (
+        ([], '[{"id": 1}, 2]', "Error: Rows must all be dictionaries, got: 2"),
+        (["--convert", "1 / 0"], '[{"id": 1}]', None),
+        (["--nl"], '{"id": 1}\n{"id": 2, "extra": 1}\n', "Try using --alter"),
+    ),
+)
+def test_insert_workers_errors(tmpdir, args, input, expected):
+    db_path = str(tmpdir / "dogs.db")
+    result = CliRunner().invoke(
+        cli.cli,
+        ["insert", db_path, "dogs", "-", "--workers", "2", "--batch-size", "1"] + args,
+        input=input,
+    )
+    assert result.exit_code != 0
+    if expected:
+        assert expected in result.output
+    else:
+        assert isinstance(result.exception, ZeroDivisionError)
@@ -1,3 +1,4 @@
+import gzip
 import json
 
 import click
@@ -116,6 +117,34 @@ def test_memory_json_nl(tmpdir, use_stdin):
     ]
 
 
+def test_memory_json_nl_detected(tmpdir):
+    path = str(tmpdir / "chickens.ndjson")
+    with open(path, "w") as fp:
+        fp.write('{"name": "Bants"}\n{"name": "Dori"}\n')
+    result = CliRunner().invoke(
+        cli.cli, ["memory", path, "select * from chickens"], catch_exceptions=False
+    )
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output.strip()) == [
+        {"name": "Bants"},
+        {"name": "Dori"},
+    ]
+
+
+def test_memory_compressed(tmpdir):
+    path = str(tmpdir / "dogs.csv.gz")
+    with gzip.open(path, "wb") as fp:
+        fp.write(b"id,name\n1,Cleo\n2,Pancakes\n")
+    result = CliRunner().invoke(
+        cli.cli, ["memory", path, "select * from dogs"], catch_exceptions=False
+    )
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output.strip()) == [
+        {"id": 1, "name": "Cleo"},
+        {"id": 2, "name": "Pancakes"},
+    ]
+
+
 @pytest.mark.parametrize("use_stdin", (True, False))
 def test_memory_csv_encoding(tmpdir, use_stdin):
     latin1_csv = (
@@ -248,6 +277,19 @@ def test_memory_no_detect_types(option):
     ]
 
 
+@pytest.mark.parametrize(
+    "extra_args,expected", (([], "real"), (["--detect-types-sample", "2"], "integer"))
+)
+def test_memory_detect_types_sample(extra_args, expected):
+    result = CliRunner().invoke(
+        cli.cli,
+        ["memory", "-", "select typeof(age) as t from stdin limit 1"] + extra_args,
+        input="name,age\nCleo,5\nPancakes,4\nLila,2.5\n",
+    )
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output.strip()) == [{"t": expected}]
+
+
 def test_memory_flatten():
     result = CliRunner().invoke(
         cli.cli,
@@ -0,0 +1,78 @@
+import pytest
+
+from sqlite_utils import Database
+
+
+def index_sql(db):
+    return db.execute(
+        "select name, sql from sqlite_master where type = 'index' order by name"
+    ).fetchall()
+
+
+@pytest.fixture
+def db():
+    db = Database(memory=True)
+    events = db.table("events")
+    events.insert_all([{"id": 1, "name": "a", "category": "x", "score": 1}], pk="id")
+    events.create_index(["category"])
+    events.create_index(["name"], unique=True)
+    db.execute("create index events_high on events (score desc) where score > 5")
+    return db
+
+
+def test_defer_indexes(db):
+    before = index_sql(db)
+    collected = []
+    with db.tracer(lambda sql, params: collected.append(sql)):
+        db.table("events").insert_all(
+            (
+                {"id": i, "name": str(i), "category": "y", "score": i}
+                for i in range(2, 250)
+            ),
+            defer_indexes=True,
+            index_threads=2,
+        )
+    assert index_sql(db) == before
+    assert db.table("events").count == 249
+    assert [sql for sql in collected if sql.startswith(("DROP", "CREATE"))] == [
+        'DROP INDEX "events_high"',
+        'DROP INDEX "idx_events_category"',
+        "CREATE INDEX events_high on events (score desc) where score > 5",
+        'CREATE INDEX "idx_events_category"\n    ON "events" ("category")',
+    ]
+    assert "PRAGMA threads=2;" in collected
+    assert db.execute("PRAGMA threads;").fetchone()[0] == 0
+    assert db.execute("PRAGMA integrity_check;").fetchone()[0] == "ok"
+
+
+@pytest.mark.parametrize("use_atomic", (False, True))
+def test_defer_indexes_recreated_on_error(db, use_atomic):
+    before = index_sql(db)
+    with pytest.raises(Exception):
+        if use_atomic:
+            with db.atomic():
+                db.table("events").upsert_all(
+                    [{"id": 2, "name": "b"}, {"id": 3, "name": "a"}],
+                    pk="id",
+                    defer_indexes=True,
+                )
+        else:
+            db.table("events").insert_all(
+                [{"id": 2, "name": "b"}, {"id": 3, "name": "a"}],
+                defer_indexes=True,
+            )
+    assert index_sql(db) == before
+
+
+def test_defer_indexes_table_does_not_exist():
+    db = Database(memory=True)
+    db.table("new").insert_all([{"id": 1}], pk="id", defer_indexes=True)
+    assert db.table("new").count == 1
+
+
+@pytest.mark.parametrize("method", ("insert_all", "upsert_all"))
+def test_index_threads_requires_defer_indexes(db, method):
+    with pytest.raises(ValueError, match="defer_indexes"):
+        getattr(db.table("events"), method)(
+            [{"id": 4, "name": "c"}], pk="id", index_threads=2
+        )
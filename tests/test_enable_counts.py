@@ -145,9 +145,7 @@ def test_uses_counts_after_enable_counts(counts_db_path):
             None,
         ),
         ("select name from sqlite_master where type = 'table'", None),
-        ("select name from sqlite_master where type = 'view'", None),
-        ("select name from sqlite_master where type = 'view'", None),
-        ("select name from sqlite_master where type = 'view'", None),
+        # Repeated introspection queries are answered by the schema cache
         ("select name from sqlite_master where type = 'view'", None),
         ("select sql from sqlite_master where name = ?", ("foo",)),
         ("SELECT quote(:value)", {"value": "foo"}),
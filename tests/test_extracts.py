@@ -1,5 +1,6 @@
 import pytest
 
+from sqlite_utils import Database
 from sqlite_utils.db import Index
 
 
@@ -112,3 +113,151 @@ def test_extracts_null_values_list_mode(fresh_db):
         {"id": 3, "species_id": 2},
         {"id": 4, "species_id": None},
     ]
+
+
+def test_extracts_resolved_per_batch(fresh_db):
+    collected = []
+    fresh_db.table("Trees").insert_all(
+        [{"id": i, "species": ["Oak", "Palm", "Fir"][i % 3]} for i in range(10)]
+        + [{"id": 10, "species": "Oak"}],
+        extracts={"species": "Species"},
+        batch_size=10,
+    )
+    with fresh_db.tracer(lambda sql, params: collected.append(sql)):
+        fresh_db.table("Trees").insert_all(
+            [{"id": 11 + i, "species": "Oak"} for i in range(5)],
+            extracts={"species": "Species"},
+        )
+    # One SELECT against Species for the whole batch, no inserts into it
+    species_queries = [sql for sql in collected if '"Species"' in sql]
+    assert len([sql for sql in species_queries if sql.startswith("WITH")]) == 1
+    assert not [sql for sql in species_queries if "INSERT" in sql]
+    assert list(fresh_db.table("Species").rows) == [
+        {"id": 1, "value": "Oak"},
+        {"id": 2, "value": "Palm"},
+        {"id": 3, "value": "Fir"},
+    ]
+    assert [row["species"] for row in fresh_db.table("Trees").rows] == [
+        1,
+        2,
+        3,
+        1,
+        2,
+        3,
+        1,
+        2,
+        3,
+        1,
+        1,
+        1,
+        1,
+        1,
+        1,
+        1,
+    ]
+
+
+def test_extracts_multiple_columns_same_table(fresh_db):
+    fresh_db.table("Trips").insert_all(
+        [
+            {"from_city": "Paris", "to_city": "Rome"},
+            {"from_city": "Rome", "to_city": "Oslo"},
+        ],
+        extracts={"from_city": "City", "to_city": "City"},
+    )
+    # Ids are assigned in the order the values were seen, row by row
+    assert list(fresh_db.table("City").rows) == [
+        {"id": 1, "value": "Paris"},
+        {"id": 2, "value": "Rome"},
+        {"id": 3, "value": "Oslo"},
+    ]
+    assert list(fresh_db.table("Trips").rows) == [
+        {"from_city": 1, "to_city": 2},
+        {"from_city": 2, "to_city": 3},
+    ]
+
+
+def test_extracts_existing_lookup_table_without_unique_index(fresh_db):
+    fresh_db.execute('create table "Species" (id integer primary key, value text)')
+    fresh_db.execute("insert into \"Species\" (value) values ('Oak')")
+    fresh_db.table("Trees").insert_all(
+        [{"species": "Palm"}, {"species": "Oak"}, {"species": 5}],
+        extracts={"species": "Species"},
+    )
+    assert list(fresh_db.table("Species").rows) == [
+        {"id": 1, "value": "Oak"},
+        {"id": 2, "value": "Palm"},
+        {"id": 3, "value": "5"},
+    ]
+    assert [row["species"] for row in fresh_db.table("Trees").rows] == [2, 1, 3]
+    assert any(index.unique for index in fresh_db.table("Species").indexes)
+
+
+def test_extracts_shared_lookup_cache(tmpdir):
+    db = Database(str(tmpdir / "test.db"), lookup_cache_size=100)
+    db.table("Trees").insert({"species": "Oak"}, extracts={"species": "Species"})
+    collected = []
+    with db.tracer(lambda sql, params: collected.append(sql)):
+        db.table("Trees").insert({"species": "Oak"}, extracts={"species": "Species"})
+    # Just one query, checking the cached id is still valid
+    species_sql = [sql for sql in collected if '"Species"' in sql]
+    assert len(species_sql) == 1
+    assert species_sql[0].startswith("WITH sqlite_utils_lookup")
+    assert len(db._lookup_cache) == 1
+    # A rollback clears the shared cache
+    with pytest.raises(ZeroDivisionError):
+        with db.atomic():
+            db.table("Trees").insert(
+                {"species": "Palm"}, extracts={"species": "Species"}
+            )
+            1 / 0
+    assert len(db._lookup_cache) == 0
+    db.table("Trees").insert({"species": "Palm"}, extracts={"species": "Species"})
+    assert list(db.table("Species").rows) == [
+        {"id": 1, "value": "Oak"},
+        {"id": 2, "value": "Palm"},
+    ]
+    assert [row["species"] for row in db.table("Trees").rows] == [1, 1, 2]
+    db.close()
+
+
+@pytest.mark.parametrize(
+    "remove",
+    (
+        lambda table: table.delete_where(),
+        lambda table: table.delete(1),
+        lambda table: table.drop(),
+        lambda table: table.transform(types={"value": str}),
+        # SQL run on the same connection does not change data_version
+        lambda table: table.db.execute('delete from "Species"'),
+        lambda table: table.db.execute("""update "Species" set value = value || '!'"""),
+    ),
+)
+def test_extracts_shared_lookup_cache_after_lookup_table_changes(tmpdir, remove):
+    db = Database(str(tmpdir / "test.db"), lookup_cache_size=100)
+    trees = db.table("Trees")
+    trees.insert_all(
+        [{"species": "Oak"}, {"species": "Palm"}], extracts={"species": "Species"}
+    )
+    remove(db.table("Species"))
+    db.table("Trees").insert_all(
+        [{"species": "Oak"}, {"species": "Palm"}], extracts={"species": "Species"}
+    )
+    species = {row["id"]: row["value"] for row in db.table("Species").rows}
+    # The new species ids point at existing rows with the right values
+    new_rows = list(trees.rows)[-2:]
+    assert [species[row["species"]] for row in new_rows] == ["Oak", "Palm"]
+    db.close()
+
+
+def test_extracts_shared_lookup_cache_sees_other_connections(tmpdir):
+    path = str(tmpdir / "test.db")
+    db = Database(path, lookup_cache_size=100)
+    db.table("Trees").insert({"species": "Oak"}, extracts={"species": "Species"})
+    other = Database(path)
+    other.execute('delete from "Species"')
+    other.close()
+    db.table("Trees").insert({"species": "Oak"}, extracts={"species": "Species"})
+    assert list(db.table("Species").rows) == [{"id": 1, "value": "Oak"}]
+    assert [row["species"] for row in db.table("Trees").rows] == [1, 1]
+    db.close()
@@ -0,0 +1,82 @@
+import array
+
+import pytest
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    np = None  # type: ignore
+
+
+def test_insert_columns(fresh_db):
+    table = fresh_db.table("readings")
+    table.insert_columns(
+        {
+            "ts": array.array("q", [1, 2, 3]),
+            "value": array.array("d", [1.5, 2.0, 2.5]),
+            "sensor": ["a", None, "c"],
+            "ok": [True, False, None],
+        },
+        pk="ts",
+    )
+    assert table.columns_dict == {"ts": int, "value": float, "sensor": str, "ok": int}
+    assert table.pks == ["ts"]
+    assert list(table.rows) == [
+        {"ts": 1, "value": 1.5, "sensor": "a", "ok": 1},
+        {"ts": 2, "value": 2.0, "sensor": None, "ok": 0},
+        {"ts": 3, "value": 2.5, "sensor": "c", "ok": None},
+    ]
+
+
+def test_insert_columns_existing_table(fresh_db):
+    table = fresh_db.table("readings")
+    table.insert({"ts": 1, "value": 1.5})
+    table.insert_columns(
+        {"ts": [2, 3], "value": [2.0, 2.5], "note": ["x", "y"]}, alter=True
+    )
+    assert list(table.rows) == [
+        {"ts": 1, "value": 1.5, "note": None},
+        {"ts": 2, "value": 2.0, "note": "x"},
+        {"ts": 3, "value": 2.5, "note": "y"},
+    ]
+
+
+def test_insert_columns_does_not_create_dicts(fresh_db, monkeypatch):
+    # The first batch is not converted to dictionaries to detect column types
+    from sqlite_utils import db
+
+    def suggest_column_types(records):
+        raise AssertionError("suggest_column_types() should not be called")
+
+    monkeypatch.setattr(db, "suggest_column_types", suggest_column_types)
+    fresh_db.table("t").insert_columns({"a": [1, 2], "b": ["x", "y"]})
+    assert fresh_db.table("t").count == 2
+
+
+@pytest.mark.parametrize("columns", ({}, {"a": [], "b": []}))
+def test_insert_columns_empty(fresh_db, columns):
+    fresh_db.table("t").insert_columns(columns)
+    assert not fresh_db.table("t").exists()
+
+
+def test_insert_columns_different_lengths(fresh_db):
+    with pytest.raises(ValueError):
+        fresh_db.table("t").insert_columns({"a": [1, 2], "b": [1]})
+
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_insert_columns_numpy(fresh_db):
+    table = fresh_db.table("readings")
+    table.insert_columns(
+        {
+            "ts": np.arange(3, dtype=np.int64),
+            "value": np.array([1.5, 2.0, 2.5], dtype=np.float32),
+            "sensor": np.array(["a", "b", "c"]),
+        }
+    )
+    assert table.columns_dict == {"ts": int, "value": float, "sensor": str}
+    assert list(table.rows) == [
+        {"ts": 0, "value": 1.5, "sensor": "a"},
+        {"ts": 1, "value": 2.0, "sensor": "b"},
+        {"ts": 2, "value": 2.5, "sensor": "c"},
+    ]
@@ -0,0 +1,188 @@
+import pytest
+
+from sqlite_utils import Database
+
+
+def test_insert_all_executemany(fresh_db):
+    collected = []
+    fresh_db._tracer = lambda sql, params: collected.append((sql, params))
+    fresh_db.table("dogs").insert_all(
+        ({"id": i, "name": "Dog {}".format(i)} for i in range(250)),
+        pk="id",
+        executemany=True,
+    )
+    assert fresh_db.table("dogs").count == 250
+    inserts = [(sql, params) for sql, params in collected if sql.startswith("INSERT")]
+    # Three batches of 100, 100 and 50 sharing the same single-row statement
+    assert [sql for sql, _ in inserts] == [
+        'INSERT INTO "dogs" ("id", "name") VALUES (?, ?)'
+    ] * 3
+    assert [len(params) for _, params in inserts] == [100, 100, 50]
+    assert inserts[0][1][:2] == [[0, "Dog 0"], [1, "Dog 1"]]
+
+
+def test_insert_all_executemany_ignores_sql_variable_limit(fresh_db):
+    collected = []
+    fresh_db._tracer = lambda sql, params: collected.append((sql, params))
+    columns = ["c{}".format(i) for i in range(100)]
+    fresh_db.table("wide").insert_all(
+        ({c: i for c in columns} for i in range(50)),
+        batch_size=50,
+        executemany=True,
+    )
+    assert fresh_db.table("wide").count == 50
+    inserts = [params for sql, params in collected if sql.startswith("INSERT")]
+    # Without executemany=True these would be split into batches of 9
+    assert [len(params) for params in inserts] == [50]
+
+
+def test_insert_all_executemany_list_mode(fresh_db):
+    fresh_db.table("creatures").insert_all(
+        [["name", "species"], ["Cleo", "dog"], ["Lila", "chicken"]],
+        executemany=True,
+    )
+    assert list(fresh_db.table("creatures").rows) == [
+        {"name": "Cleo", "species": "dog"},
+        {"name": "Lila", "species": "chicken"},
+    ]
+
+
+def test_insert_executemany_single_record_sets_last_pk(fresh_db):
+    table = fresh_db.table("dogs")
+    table.insert_all([{"id": 5, "name": "Cleo"}], pk="id", executemany=True)
+    assert table.last_pk == 5
+    assert table.last_rowid == 5
+
+
+def test_insert_all_executemany_alter(fresh_db):
+    table = fresh_db.table("dogs")
+    table.insert_all(
+        [{"name": "Cleo"}, {"name": "Pancakes", "age": 4}, {"name": "Lila", "age": 2}],
+        batch_size=1,
+        alter=True,
+        executemany=True,
+    )
+    assert list(table.rows) == [
+        {"name": "Cleo", "age": None},
+        {"name": "Pancakes", "age": 4},
+        {"name": "Lila", "age": 2},
+    ]
+
+
+def test_insert_all_executemany_conversions_and_extracts(fresh_db):
+    table = fresh_db.table("dogs")
+    table.insert_all(
+        [
+            {"name": "Cleo", "species": "dog"},
+            {"name": "Lila", "species": "chicken"},
+            {"name": "Bants", "species": "chicken"},
+        ],
+        conversions={"name": "upper(?)"},
+        extracts=["species"],
+        executemany=True,
+    )
+    assert list(table.rows) == [
+        {"name": "CLEO", "species": 1},
+        {"name": "LILA", "species": 2},
+        {"name": "BANTS", "species": 2},
+    ]
+
+
+@pytest.mark.parametrize("use_old_upsert", (False, True))
+def test_upsert_all_executemany(use_old_upsert):
+    db = Database(memory=True, use_old_upsert=use_old_upsert)
+    table = db.table("dogs")
+    table.insert_all(
+        [{"id": 1, "name": "Cleo", "age": 4}, {"id": 2, "name": "Pancakes", "age": 3}],
+        pk="id",
+    )
+    table.upsert_all(
+        [{"id": 2, "age": 5}, {"id": 3, "age": 1}, {"id": 2, "age": 6}],
+        pk="id",
+        executemany=True,
+    )
+    assert list(table.rows) == [
+        {"id": 1, "name": "Cleo", "age": 4},
+        {"id": 2, "name": "Pancakes", "age": 6},
+        {"id": 3, "name": None, "age": 1},
+    ]
+    table.upsert_all([{"id": 1, "age": 10}], pk="id", executemany=True)
+    assert table.last_pk == 1
+    assert table.get(1)["age"] == 10
+    db.close()
+
+
+def test_executemany(fresh_db):
+    collected = []
+    fresh_db.execute("create table t (id integer primary key, name text)")
+    with fresh_db.tracer(lambda sql, params: collected.append((sql, params))):
+        cursor = fresh_db.executemany(
+            "insert into t (name) values (:name)", [{"name": "a"}, {"name": "b"}]
+        )
+    assert cursor.rowcount == 2
+    # The write was committed automatically
+    assert not fresh_db.conn.in_transaction
+    assert collected == [
+        ("insert into t (name) values (:name)", [{"name": "a"}, {"name": "b"}])
+    ]
+    assert list(fresh_db.query("select * from t")) == [
+        {"id": 1, "name": "a"},
+        {"id": 2, "name": "b"},
+    ]
+
+
+@pytest.mark.parametrize("executemany", (False, True))
+def test_insert_all_batch_size_auto(fresh_db, executemany):
+    collected = []
+    fresh_db._tracer = lambda sql, params: collected.append((sql, params))
+    table = fresh_db.table("dogs")
+    table.insert_all(
+        ({"id": i, "name": "Dog {}".format(i)} for i in range(1000)),
+        pk="id",
+        batch_size="auto",
+        executemany=executemany,
+    )
+    assert table.count == 1000
+    inserts = [params for sql, params in collected if sql.startswith("INSERT")]
+    rows_per_batch = [len(params) // (1 if executemany else 2) for params in inserts]
+    assert sum(rows_per_batch) == 1000
+    # The first batch uses the starting size, then batches grow as they are fast
+    assert rows_per_batch[0] == 100
+    assert rows_per_batch[1] > 100
+
+
+def test_adaptive_batch_size():
+    from sqlite_utils.db import _AdaptiveBatchSize
+
+    batch_size = _AdaptiveBatchSize(max_rows=1000)
+    assert batch_size.size == 100
+    # Far faster than the target, but grows by at most a factor of two
+    batch_size.record(100, 0.001)
+    assert batch_size.size == 200
+    # Slower than the target shrinks by at most a factor of two
+    batch_size.record(200, 10)
+    assert batch_size.size == 100
+    batch_size.record(100, 0.15)
+    assert batch_size.size == 133
+    for _ in range(10):
+        batch_size.record(batch_size.size, 0)
+    assert batch_size.size == 1000
+    assert [len(chunk) for chunk in batch_size.chunks(range(2500))] == [1000] * 2 + [
+        500
+    ]
+
+
+def test_batch_size_auto_uses_variable_limit(fresh_db):
+    fresh_db._variable_limit_value = 30
+    collected = []
+    fresh_db._tracer = lambda sql, params: collected.append((sql, params))
+    fresh_db.table("t").insert_all(
+        ({"a": i, "b": i, "c": i} for i in range(100)), batch_size="auto"
+    )
+    inserts = [params for sql, params in collected if sql.startswith("INSERT")]
+    assert {len(params) for params in inserts} == {30}
+
+
+def test_batch_size_invalid_string(fresh_db):
+    with pytest.raises(ValueError):
+        fresh_db.table("t").insert_all([{"a": 1}], batch_size="big")
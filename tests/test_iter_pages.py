@@ -0,0 +1,123 @@
+import pytest
+
+
+@pytest.fixture
+def dogs(fresh_db):
+    table = fresh_db.table("dogs")
+    table.insert_all(
+        ({"id": i, "name": "Dog {}".format(i), "age": i % 4} for i in range(1, 11)),
+        pk="id",
+    )
+    return table
+
+
+def test_iter_pages(dogs):
+    pages = list(dogs.iter_pages(4))
+    assert [[row["id"] for row in page.rows] for page in pages] == [
+        [1, 2, 3, 4],
+        [5, 6, 7, 8],
+        [9, 10],
+    ]
+    assert [page.token for page in pages] == ["[4]", "[8]", None]
+    assert pages[0].rows[0] == {"id": 1, "name": "Dog 1", "age": 1}
+
+
+def test_iter_pages_uses_keyset_not_offset(dogs):
+    collected = []
+    dogs.db._tracer = lambda sql, params: collected.append((sql, params))
+    list(dogs.iter_pages(4))
+    selects = [(sql, params) for sql, params in collected if "limit 4" in sql]
+    assert selects == [
+        ('select * from "dogs" order by "id" limit 4', []),
+        ('select * from "dogs" where ("id") > (?) order by "id" limit 4', [4]),
+        ('select * from "dogs" where ("id") > (?) order by "id" limit 4', [8]),
+    ]
+
+
+def test_iter_pages_resume_from_token(dogs):
+    pages = dogs.iter_pages(3)
+    first = next(pages)
+    resumed = list(dogs.iter_pages(3, token=first.token))
+    assert [row["id"] for page in resumed for row in page.rows] == list(range(4, 11))
+
+
+def test_iter_pages_exact_multiple(dogs):
+    pages = list(dogs.iter_pages(5))
+    assert [len(page.rows) for page in pages] == [5, 5]
+    # The size of the last page cannot tell us it is the last one
+    assert pages[-1].token == "[10]"
+    assert list(dogs.iter_pages(5, token=pages[-1].token)) == []
+
+
+@pytest.mark.parametrize(
+    "where,where_args",
+    (("age = ?", [1]), ("age = :age", {"age": 1})),
+)
+def test_iter_pages_where(dogs, where, where_args):
+    pages = list(dogs.iter_pages(2, where=where, where_args=where_args))
+    assert [[row["id"] for row in page.rows] for page in pages] == [[1, 5], [9]]
+
+
+def test_iter_pages_select_adds_missing_pk(dogs):
+    page = next(dogs.iter_pages(2, select="name"))
+    assert page.rows == [{"id": 1, "name": "Dog 1"}, {"id": 2, "name": "Dog 2"}]
+    page = next(dogs.iter_pages(2, select="name, id", row_factory="tuple"))
+    assert page.rows == [("Dog 1", 1), ("Dog 2", 2)]
+
+
+def test_iter_pages_rowid_table(fresh_db):
+    table = fresh_db.table("places")
+    table.insert_all({"name": name} for name in ("Paris", "Rome", "Oslo"))
+    pages = list(table.iter_pages(2))
+    assert pages == [
+        ([{"rowid": 1, "name": "Paris"}, {"rowid": 2, "name": "Rome"}], "[2]"),
+        ([{"rowid": 3, "name": "Oslo"}], None),
+    ]
+
+
+def test_iter_pages_compound_pk(fresh_db):
+    table = fresh_db.table("t")
+    table.insert_all(
+        ({"a": i % 3, "b": i, "blob": bytes([i])} for i in range(9)), pk=("a", "b")
+    )
+    pages = list(table.iter_pages(4, row_factory="tuple"))
+    assert [row[:2] for page in pages for row in page.rows] == [
+        (0, 0),
+        (0, 3),
+        (0, 6),
+        (1, 1),
+        (1, 4),
+        (1, 7),
+        (2, 2),
+        (2, 5),
+        (2, 8),
+    ]
+    assert pages[0].token == "[1, 1]"
+
+
+def test_iter_pages_blob_pk(fresh_db):
+    table = fresh_db.table("t")
+    table.insert_all(({"key": bytes([i])} for i in range(5)), pk="key")
+    first = next(table.iter_pages(2))
+    assert first.token == '[{"$base64": true, "encoded": "AQ=="}]'
+    resumed = list(table.iter_pages(2, token=first.token))
+    assert [row["key"] for page in resumed for row in page.rows] == [
+        b"\x02",
+        b"\x03",
+        b"\x04",
+    ]
+
+
+def test_iter_pages_missing_table(fresh_db):
+    assert list(fresh_db.table("missing").iter_pages()) == []
+
+
+@pytest.mark.parametrize("token", ("not json", '{"id": 1}', "[1, 2]"))
+def test_iter_pages_invalid_token(dogs, token):
+    with pytest.raises(ValueError):
+        list(dogs.iter_pages(token=token))
+
+
+def test_iter_pages_invalid_page_size(dogs):
+    with pytest.raises(ValueError):
+        list(dogs.iter_pages(0))
@@ -287,3 +287,13 @@ def test_list_mode_single_record_upsert_last_pk():
 
     # Verify last_pk is populated correctly
     assert table.last_pk == 1
+
+
+def test_list_mode_alter_adds_missing_columns():
+    db = Database(memory=True)
+    db.table("people").insert({"id": 1, "name": "Alice"})
+    db.table("people").insert_all([["id", "name", "age"], [2, "Bob", 25]], alter=True)
+    assert list(db.table("people").rows) == [
+        {"id": 1, "name": "Alice", "age": None},
+        {"id": 2, "name": "Bob", "age": 25},
+    ]
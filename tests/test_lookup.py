@@ -182,3 +182,62 @@ def test_lookup_compound_key_with_null_idempotent(fresh_db):
         {"id": palm_id, "name": "Palm", "type": None},
         {"id": oak_id, "name": "Oak", "type": "Tree"},
     ]
+
+
+def test_lookup_many_creates_table(fresh_db):
+    species = fresh_db.table("species")
+    ids = species.lookup_many(
+        [{"name": "Palm"}, {"name": "Oak"}, {"name": "Palm"}, {"name": None}]
+    )
+    assert ids == {("Palm",): 1, ("Oak",): 2, (None,): 3}
+    assert list(species.rows) == [
+        {"id": 1, "name": "Palm"},
+        {"id": 2, "name": "Oak"},
+        {"id": 3, "name": None},
+    ]
+    assert [index.columns for index in species.indexes if index.unique] == [["name"]]
+    # Repeated calls return the same ids without creating new rows
+    assert species.lookup_many([{"name": None}, {"name": "Oak"}]) == {
+        (None,): 3,
+        ("Oak",): 2,
+    }
+    assert species.count == 3
+
+
+def test_lookup_many_existing_table(fresh_db):
+    species = fresh_db.table("species")
+    palm_id = species.lookup({"name": "Palm", "type": "Tree"})
+    collected = []
+    with fresh_db.tracer(lambda sql, params: collected.append(sql)):
+        ids = species.lookup_many(
+            {"type": type_, "name": name}
+            for name, type_ in [("Palm", "Tree"), ("Rose", "Flower"), ("Oak", "Tree")]
+        )
+    # Keys are in the order of the first dictionary
+    assert ids == {("Tree", "Palm"): palm_id, ("Flower", "Rose"): 2, ("Tree", "Oak"): 3}
+    assert len([sql for sql in collected if sql.startswith("WITH")]) == 2
+    assert len([sql for sql in collected if sql.startswith("INSERT")]) == 1
+    assert species.get(2) == {"id": 2, "name": "Rose", "type": "Flower"}
+
+
+def test_lookup_many_batches(fresh_db):
+    species = fresh_db.table("species")
+    ids = species.lookup_many({"name": "Species {}".format(i)} for i in range(1200))
+    assert len(ids) == 1200
+    assert ids[("Species 1199",)] == 1200
+    assert species.count == 1200
+
+
+def test_lookup_many_empty(fresh_db):
+    assert fresh_db.table("species").lookup_many([]) == {}
+    assert not fresh_db.table("species").exists()
+
+
+def test_lookup_many_errors(fresh_db):
+    species = fresh_db.table("species")
+    with pytest.raises(ValueError):
+        species.lookup_many([{"name": "Palm"}, {"type": "Tree"}])
+    with pytest.raises(ValueError):
+        species.lookup_many([["Palm"]])
+    with pytest.raises(ValueError):
+        species.lookup_many([{"name": "Palm"}], pk=None)
@@ -0,0 +1,155 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sqlite_utils import Database, hookimpl
+from sqlite_utils.db import DatabasePool
+from sqlite_utils.plugins import pm
+from sqlite_utils.utils import sqlite3
+
+
+@pytest.fixture
+def db(tmpdir):
+    db = Database(str(tmpdir / "pool.db"))
+    db.table("dogs").insert_all(
+        [{"id": 1, "name": "Cleo"}, {"id": 2, "name": "Pancakes"}], pk="id"
+    )
+    yield db
+    db.close()
+
+
+def test_pool_readers_per_thread(db):
+    with db.pool() as pool:
+        assert isinstance(pool, DatabasePool)
+        assert pool.writer.journal_mode == "wal"
+
+        def read(_):
+            reader = pool.reader()
+            # The same connection is returned every time for a thread
+            assert pool.reader() is reader
+            return id(reader), [
+                row["name"] for row in pool.query("select name from dogs")
+            ]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(read, range(20)))
+        assert {tuple(names) for _, names in results} == {("Cleo", "Pancakes")}
+        assert 1 <= len({reader_id for reader_id, _ in results}) <= 4
+
+
+def test_pool_readers_are_read_only(db):
+    with db.pool() as pool:
+        with pytest.raises(sqlite3.OperationalError):
+            pool.reader().execute("insert into dogs (name) values ('Lila')")
+
+
+def test_pool_write(db):
+    with db.pool() as pool:
+        reader = pool.reader()
+        with pool.write() as writer:
+            writer.table("dogs").insert({"id": 3, "name": "Lila"})
+            # Not visible to readers until the write block commits
+            assert reader.table("dogs").count == 2
+        assert reader.table("dogs").count == 3
+
+        with pytest.raises(ZeroDivisionError):
+            with pool.write() as writer:
+                writer.table("dogs").insert({"id": 4, "name": "Bants"})
+                1 / 0
+        assert reader.table("dogs").count == 3
+
+
+def test_pool_writes_from_many_threads(db):
+    with db.pool() as pool:
+
+        def write(i):
+            with pool.write() as writer:
+                count = writer.execute("select count(*) from dogs").fetchone()[0]
+                writer.execute(
+                    "insert into dogs (id, name) values (?, ?)", [count + 1, str(i)]
+                )
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(write, range(50)))
+        assert pool.reader().table("dogs").count == 52
+
+
+def test_pool_registers_functions_and_plugins(db):
+    prepared = []
+
+    class Plugin:
+        __name__ = "Plugin"
+
+        @hookimpl
+        def prepare_connection(self, conn):
+            prepared.append(conn)
+
+    @db.register_function(deterministic=True)
+    def shout(value):
+        return value.upper() + "!"
+
+    pm.register(Plugin(), name="Plugin")
+    try:
+        with db.pool() as pool:
+            assert len(prepared) == 1  # The writer
+            assert (
+                pool.writer.execute("select shout(name) from dogs").fetchone()[0]
+                == "CLEO!"
+            )
+            assert next(pool.query("select shout(name) as s from dogs")) == {
+                "s": "CLEO!"
+            }
+            pool.reader()
+            thread = threading.Thread(target=pool.reader)
+            thread.start()
+            thread.join()
+            # Each connection ran the plugin hook once
+            assert len(prepared) == 3
+            assert len(set(map(id, prepared))) == 3
+    finally:
+        pm.unregister(name="Plugin")
+
+
+def test_pool_copies_database_options(tmpdir):
+    db = Database(str(tmpdir / "options.db"), strict=True, row_factory="tuple")
+    db.table("t").insert({"id": 1})
+    with db.pool() as pool:
+        assert pool.writer.strict
+        assert list(pool.query("select id from t")) == [(1,)]
+
+
+def test_pool_close(db):
+    pool = db.pool()
+    reader = pool.reader()
+    pool.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        reader.execute("select 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        pool.writer.execute("select 1")
+    # The database the pool was created from is still usable
+    assert db.table("dogs").count == 2
+
+
+def test_pool_requires_file():
+    with pytest.raises(ValueError):
+        Database(memory=True).pool()
+
+
+def test_pool_closes_reader_when_thread_exits(db):
+    with db.pool() as pool:
+        readers = []
+
+        def read():
+            readers.append(pool.reader())
+            assert list(pool.query("select id from dogs"))
+
+        for _ in range(10):
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+        # Only the write connection is left open
+        assert pool._connections == [pool.writer]
+        for reader in readers:
+            with pytest.raises(sqlite3.ProgrammingError):
+                reader.execute("select 1")
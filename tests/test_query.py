@@ -185,6 +185,65 @@ def test_first_keyword(sql, expected):
     assert _first_keyword(sql) == expected
 
 
+@pytest.mark.parametrize(
+    "sql,expected",
+    [
+        ("select 1", True),
+        ("/* comment */ select * from dogs", True),
+        ("values (1), (2)", True),
+        ("with t as (select 1) select * from t", True),
+        ("with t as (select 1) insert into dogs select * from t returning *", False),
+        ("with t as (select 1) delete from dogs returning *", False),
+        ("with t as (select 'update') select * from t", False),
+        ("insert into dogs (name) values ('Cleo') returning name", False),
+        ("replace into dogs (name) values ('Cleo') returning name", False),
+        ("pragma user_version", False),
+        ("explain select 1", False),
+    ],
+)
+def test_is_plain_read(sql, expected):
+    from sqlite_utils.db import _is_plain_read
+
+    assert _is_plain_read(sql) is expected
+
+
+def test_query_plain_read_skips_savepoint(fresh_db):
+    fresh_db.table("dogs").insert({"name": "Cleo"})
+    statements = []
+    fresh_db.conn.set_trace_callback(statements.append)
+    try:
+        assert list(fresh_db.query("select name from dogs")) == [{"name": "Cleo"}]
+        list(fresh_db.query("with t as (select 1 as n) select n from t"))
+    finally:
+        fresh_db.conn.set_trace_callback(None)
+    assert statements == [
+        "select name from dogs",
+        "with t as (select 1 as n) select n from t",
+    ]
+    assert not fresh_db.conn.in_transaction
+
+
+@pytest.mark.skipif(
+    sqlite3.sqlite_version_info < (3, 35, 0),
+    reason="RETURNING requires SQLite 3.35.0 or higher",
+)
+def test_query_write_returning_keeps_savepoint(fresh_db):
+    fresh_db.table("dogs").insert({"name": "Cleo"})
+    statements = []
+    fresh_db.conn.set_trace_callback(statements.append)
+    try:
+        list(
+            fresh_db.query(
+                "with t as (select 'Pancakes' as name) "
+                "insert into dogs (name) select name from t returning name"
+            )
+        )
+    finally:
+        fresh_db.conn.set_trace_callback(None)
+    assert statements[0] == 'SAVEPOINT "sqlite_utils_query"'
+    assert fresh_db.table("dogs").count == 2
+
+
 @pytest.mark.skipif(
     sqlite3.sqlite_version_info < (3, 35, 0),
     reason="RETURNING requires SQLite 3.35.0 or higher",
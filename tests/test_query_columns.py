@@ -0,0 +1,115 @@
+import array
+
+import pytest
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    np = None  # type: ignore
+
+
+@pytest.fixture
+def readings(fresh_db):
+    fresh_db.table("readings").insert_all(
+        [
+            {"id": 1, "value": 1.5, "count": 3, "sensor": "a"},
+            {"id": 2, "value": 2, "count": 4, "sensor": None},
+            {"id": 3, "value": 2.5, "count": 5, "sensor": "c"},
+        ],
+        pk="id",
+    )
+    return fresh_db
+
+
+def test_query_columns(readings):
+    assert readings.query_columns(
+        "select id, value, sensor from readings order by id"
+    ) == {
+        "id": [1, 2, 3],
+        "value": [1.5, 2.0, 2.5],
+        "sensor": ["a", None, "c"],
+    }
+
+
+def test_query_columns_blocks(fresh_db, monkeypatch):
+    from sqlite_utils import db
+
+    monkeypatch.setattr(db, "QUERY_COLUMNS_BLOCK_SIZE", 7)
+    fresh_db.table("t").insert_all({"n": i, "s": str(i)} for i in range(100))
+    columns = fresh_db.query_columns("select n, s from t order by n", arrays=True)
+    assert columns["n"] == array.array("q", range(100))
+    assert columns["s"] == [str(i) for i in range(100)]
+
+
+def test_query_columns_arrays(readings):
+    columns = readings.query_columns(
+        "select id, value, count * 1.0 as ratio, sensor from readings where id > ?",
+        [1],
+        arrays=True,
+    )
+    assert columns == {
+        "id": array.array("q", [2, 3]),
+        "value": array.array("d", [2.0, 2.5]),
+        "ratio": array.array("d", [4.0, 5.0]),
+        "sensor": [None, "c"],
+    }
+
+
+def test_query_columns_no_rows(readings):
+    assert readings.query_columns("select id, sensor from readings where 0") == {
+        "id": [],
+        "sensor": [],
+    }
+
+
+def test_query_columns_duplicate_names(readings):
+    assert readings.query_columns("select id, id from readings where id = 1") == {
+        "id": [1],
+        "id_2": [1],
+    }
+
+
+def test_query_columns_rejects_non_select(readings):
+    with pytest.raises(ValueError) as ex:
+        readings.query_columns("update readings set count = 0")
+    assert str(ex.value).startswith("query_columns() can only be used")
+    assert readings.query_columns("select count from readings")["count"] == [3, 4, 5]
+
+
+def test_query_columns_returning(fresh_db):
+    fresh_db.execute("create table t (id integer primary key, name text)")
+    assert fresh_db.query_columns(
+        "insert into t (name) values ('a'), ('b') returning id, name"
+    ) == {"id": [1, 2], "name": ["a", "b"]}
+    assert fresh_db.table("t").count == 2
+
+
+def test_columns_of(readings):
+    table = readings.table("readings")
+    assert table.columns_of() == {
+        "id": [1, 2, 3],
+        "value": [1.5, 2.0, 2.5],
+        "count": [3, 4, 5],
+        "sensor": ["a", None, "c"],
+    }
+    assert table.columns_of(
+        "count > ?", [3], select="id, count", order_by="id desc", arrays=True
+    ) == {"id": array.array("q", [3, 2]), "count": array.array("q", [5, 4])}
+    assert table.columns_of(select="id", limit=1, offset=1) == {"id": [2]}
+
+
+def test_columns_of_missing_table(fresh_db):
+    assert fresh_db.table("missing").columns_of() == {}
+
+
+@pytest.mark.skipif(np is not None, reason="numpy is installed")
+def test_query_columns_numpy_not_installed(readings):
+    with pytest.raises(ImportError):
+        readings.query_columns("select * from readings", numpy=True)
+
+
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+def test_query_columns_numpy(readings):
+    columns = readings.table("readings").columns_of(select="id, value", numpy=True)
+    assert columns["id"].dtype.kind == "i"
+    assert columns["value"].tolist() == [1.5, 2.0, 2.5]
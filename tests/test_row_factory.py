@@ -0,0 +1,124 @@
+import sqlite3
+
+import pytest
+
+from sqlite_utils import Database
+
+
+@pytest.fixture
+def db():
+    db = Database(memory=True)
+    db.table("dogs").insert_all(
+        [{"id": 1, "name": "Cleo", "age": 4}, {"id": 2, "name": "Pancakes", "age": 3}],
+        pk="id",
+    )
+    return db
+
+
+def test_row_factory_tuple(db):
+    assert list(db.query("select * from dogs", row_factory="tuple")) == [
+        (1, "Cleo", 4),
+        (2, "Pancakes", 3),
+    ]
+    assert list(db.table("dogs").rows_where("age > ?", [3], row_factory="tuple")) == [
+        (1, "Cleo", 4)
+    ]
+
+
+def test_row_factory_namedtuple(db):
+    rows = list(db.query("select id, name from dogs", row_factory="namedtuple"))
+    assert rows[0].name == "Cleo"
+    assert rows[1] == (2, "Pancakes")
+    # The class is generated once for each set of columns
+    assert type(rows[0]) is type(
+        next(db.table("dogs").rows_where(select="id, name", row_factory="namedtuple"))
+    )
+
+
+def test_row_factory_slots(db):
+    row = next(db.table("dogs").rows_where(row_factory="slots"))
+    assert (row.id, row.name, row.age) == (1, "Cleo", 4)
+    assert row.__slots__ == ("id", "name", "age")
+    assert not hasattr(row, "__dict__")
+
+
+def test_row_factory_sqlite3_row(db):
+    row = next(db.query("select * from dogs", row_factory=sqlite3.Row))
+    assert isinstance(row, sqlite3.Row)
+    assert row["name"] == "Cleo"
+    assert row.keys() == ["id", "name", "age"]
+
+
+@pytest.mark.parametrize("row_factory", ("namedtuple", "slots"))
+def test_row_factory_invalid_identifiers(row_factory):
+    db = Database(memory=True)
+    row = next(
+        db.query(
+            "select 1 as id, 2 as id, 3 as class, 4 as 'two words', 5 as _x",
+            row_factory=row_factory,
+        )
+    )
+    # Column names that cannot be attributes are replaced by position
+    assert (row.id, row.id_2, row._2, row._3, row._4) == (1, 2, 3, 4, 5)
+
+
+def test_database_row_factory(db):
+    db.row_factory = "tuple"
+    assert list(db.table("dogs").rows) == [(1, "Cleo", 4), (2, "Pancakes", 3)]
+    assert next(db.query("select name from dogs")) == ("Cleo",)
+    # A per-call row_factory overrides the database default
+    assert next(db.query("select name from dogs", row_factory="dict")) == {
+        "name": "Cleo"
+    }
+
+
+def test_database_row_factory_internal_methods_use_dicts():
+    db = Database(memory=True, row_factory="tuple")
+    table = db.table("dogs")
+    table.insert({"id": 1, "name": "Cleo"}, pk="id")
+    assert table.last_pk == 1
+    assert table.get(1) == {"id": 1, "name": "Cleo"}
+    assert table.lookup({"name": "Cleo"}) == 1
+    assert db.table("species").lookup({"name": "dog"}) == 1
+    assert db.table("species").lookup({"name": "dog"}) == 1
+    assert db.execute_returning_dicts("select name from dogs") == [{"name": "Cleo"}]
+    table.convert("name", lambda value: {"upper": value.upper()}, multi=True)
+    assert list(table.rows) == [(1, "Cleo", "CLEO")]
+
+
+@pytest.mark.parametrize("row_factory", ("tuple", "namedtuple", sqlite3.Row))
+def test_pks_and_rows_where_row_factory(db, row_factory):
+    assert [
+        (pk, tuple(row))
+        for pk, row in db.table("dogs").pks_and_rows_where(row_factory=row_factory)
+    ] == [(1, (1, "Cleo", 4)), (2, (2, "Pancakes", 3))]
+    # A rowid table, where the rowid is selected in addition to the columns
+    db.table("places").insert_all([{"name": "Paris"}, {"name": "Rome"}])
+    assert [
+        (pk, tuple(row))
+        for pk, row in db.table("places").pks_and_rows_where(row_factory=row_factory)
+    ] == [(1, (1, "Paris")), (2, (2, "Rome"))]
+
+
+def test_pks_and_rows_where_row_factory_slots(db):
+    pk, row = next(db.table("dogs").pks_and_rows_where(row_factory="slots"))
+    assert pk == 1
+    assert row.name == "Cleo"
+
+
+def test_search_row_factory(db):
+    db.table("dogs").enable_fts(["name"])
+    assert list(
+        db.table("dogs").search("cleo", columns=["name"], row_factory="tuple")
+    ) == [("Cleo",)]
+
+
+@pytest.mark.parametrize("row_factory", ("list", dict, None))
+def test_invalid_row_factory(db, row_factory):
+    with pytest.raises(ValueError):
+        Database(memory=True, row_factory=row_factory)
+    if row_factory is not None:
+        with pytest.raises(ValueError):
+            db.query("select 1", row_factory=row_factory)
+        with pytest.raises(ValueError):
+            list(db.table("dogs").rows_where(row_factory=row_factory))
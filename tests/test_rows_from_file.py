@@ -1,8 +1,22 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
 from io import BytesIO, StringIO
 
 import pytest
 
-from sqlite_utils.utils import Format, RowError, rows_from_file
+from sqlite_utils.utils import (
+    Format,
+    RowError,
+    RowsFromFileBadJSON,
+    UpdateWrapper,
+    _stream_json,
+    decompress,
+    file_progress,
+    rows_from_file,
+)
 
 
 @pytest.mark.parametrize(
@@ -11,6 +25,9 @@ from sqlite_utils.utils import Format, RowError, rows_from_file
         (b"id,name\n1,Cleo", Format.CSV),
         (b"id\tname\n1\tCleo", Format.TSV),
         (b'[{"id": "1", "name": "Cleo"}]', Format.JSON),
+        (b'{"id": "1", "name": "Cleo"}', Format.JSON),
+        (b'{\n  "id": "1",\n  "name": "Cleo"\n}\n', Format.JSON),
+        (b'{"id": "1", "name": "Cleo"}\n', Format.JSON),
     ),
 )
 def test_rows_from_file_detect_format(input, expected_format):
@@ -20,6 +37,33 @@ def test_rows_from_file_detect_format(input, expected_format):
     assert rows_list == [{"id": "1", "name": "Cleo"}]
 
 
+@pytest.mark.parametrize(
+    "input",
+    (
+        b'{"id": 1, "name": "Cleo"}\n{"id": 2, "name": "Pancakes"}\n',
+        b'{"id": 1, "name": "Cleo"}\r\n\r\n{"id": 2, "name": "Pancakes"}',
+    ),
+)
+def test_rows_from_file_detect_newline_json(input):
+    rows, format = rows_from_file(BytesIO(input))
+    assert format == Format.NL
+    assert list(rows) == [{"id": 1, "name": "Cleo"}, {"id": 2, "name": "Pancakes"}]
+
+
+def test_rows_from_file_newline_json_long_first_record():
+    # Longer than the bytes examined to detect the format
+    rows_in = [{"id": 1, "bio": "x" * 5000}, {"id": 2, "bio": "y"}, {"id": 3}]
+    data = "\n".join(json.dumps(row) for row in rows_in).encode("utf-8")
+    rows, _ = rows_from_file(BytesIO(data))
+    assert list(rows) == rows_in
+
+
+def test_stream_json_objects_on_same_line_is_error():
+    with pytest.raises(json.JSONDecodeError) as ex:
+        list(_stream_json(BytesIO(b'{"id": 1}\n{"id": 2} {"id": 3}')))
+    assert ex.value.msg == "Extra data"
+
+
 @pytest.mark.parametrize("input", (b"", b" \n\t"))
 def test_rows_from_file_empty_input(input):
     rows, format = rows_from_file(BytesIO(input))
@@ -61,3 +105,112 @@ def test_rows_from_file_error_on_string_io():
     assert ex.value.args == (
         "rows_from_file() requires a file-like object that supports peek(), such as io.BytesIO",
     )
+
+
+@pytest.mark.parametrize("read_size", (1, 3, 1024))
+@pytest.mark.parametrize("encoding", ("utf-8", "utf-8-sig", "utf-16"))
+@pytest.mark.parametrize(
+    "input",
+    (
+        '[{"id": 1, "name": "Cleo \\u00e9"}, {"id": 12345, "tags": ["a", {"b": null}]}]',
+        '\n[\n  {"name": "\u2603"},\n  {"score": -1.5e10, "good": true}\n]\n',
+        '{"id": 1}',
+        "[]",
+    ),
+)
+def test_stream_json(input, encoding, read_size):
+    expected = json.loads(input)
+    if isinstance(expected, dict):
+        expected = [expected]
+    assert list(_stream_json(BytesIO(input.encode(encoding)), read_size)) == expected
+
+
+@pytest.mark.parametrize("read_size", (1, 3, 1024))
+@pytest.mark.parametrize(
+    "input",
+    (
+        "",
+        "[",
+        '[{"id": 1}',
+        '[{"id": 1},',
+        '[{"id": 1} {"id": 2}]',
+        '[{"id": 1}] []',
+        '[\n  {"id": 1},\n  {"id": 2 "name": "Cleo"}\n]',
+        "[tru]",
+    ),
+)
+def test_stream_json_errors_match_json_loads(input, read_size):
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(input)
+    with pytest.raises(json.JSONDecodeError) as ex:
+        list(_stream_json(BytesIO(input.encode("utf-8")), read_size))
+    assert str(ex.value) == str(expected.value)
+    assert (ex.value.pos, ex.value.lineno, ex.value.colno) == (
+        expected.value.pos,
+        expected.value.lineno,
+        expected.value.colno,
+    )
+
+
+def test_rows_from_file_json_is_streamed():
+    fp = BytesIO(
+        b"[" + b",".join(b'{"id": %d}' % i for i in range(100000)) + b', {"id": ]'
+    )
+    rows, format = rows_from_file(fp, format=Format.JSON)
+    assert format == Format.JSON
+    assert next(iter(rows)) == {"id": 0}
+    # Only the start of the file has been read so far
+    assert fp.tell() < len(fp.getvalue())
+    with pytest.raises(json.JSONDecodeError):
+        list(rows)
+
+
+@pytest.mark.parametrize("input", (b"5", b'"Cleo"', b"null"))
+def test_rows_from_file_json_must_be_list_or_dict(input):
+    with pytest.raises(RowsFromFileBadJSON):
+        rows_from_file(BytesIO(input), format=Format.JSON)
+
+
+@pytest.mark.parametrize("compress", (gzip.compress, bz2.compress, lzma.compress))
+@pytest.mark.parametrize(
+    "input,format,expected_format",
+    (
+        (b"id,name\n1,Cleo", None, Format.CSV),
+        (b"id\tname\n1\tCleo", None, Format.TSV),
+        (b'[{"id": "1", "name": "Cleo"}]', None, Format.JSON),
+        (b'{"id": "1", "name": "Cleo"}\n{"id": "2", "name": "Bants"}', None, Format.NL),
+        (b"id,name\n1,Cleo", Format.CSV, Format.CSV),
+        (b'{"id": "1", "name": "Cleo"}', Format.NL, Format.NL),
+    ),
+)
+def test_rows_from_file_compressed(compress, input, format, expected_format):
+    rows, format_used = rows_from_file(BytesIO(compress(input)), format=format)
+    assert format_used == expected_format
+    assert list(rows)[0] == {"id": "1", "name": "Cleo"}
+
+
+def test_decompress_leaves_uncompressed_data_alone():
+    # Looks a bit like the bz2 magic number, but is a CSV header
+    assert decompress(BytesIO(b"BZh,name\n1,Cleo")).read() == b"BZh,name\n1,Cleo"
+
+
+def test_update_wrapper_counts_compressed_bytes(tmpdir):
+    path = str(tmpdir / "dogs.json.gz")
+    with open(path, "wb") as fp:
+        fp.write(gzip.compress(json.dumps([{"id": i} for i in range(1000)]).encode()))
+    updates = []
+    with open(path, "rb") as fp:
+        wrapper = UpdateWrapper(decompress(fp), updates.append, fp.fileno())
+        assert len(wrapper.read()) > os.path.getsize(path)
+    assert sum(updates) == os.path.getsize(path)
+
+
+@pytest.mark.parametrize("compressed", (False, True))
+def test_file_progress_uses_position_only_for_compressed(tmpdir, compressed):
+    path = str(tmpdir / "dogs.csv")
+    with open(path, "w") as fp:
+        fp.write("id,name\n1,Cleo\n")
+    with open(path, "rb") as fp:
+        with file_progress(fp, compressed=compressed) as wrapper:
+            assert isinstance(wrapper, UpdateWrapper)
+            assert (wrapper._fileno is not None) == compressed
@@ -0,0 +1,145 @@
+import sqlite3
+
+import pytest
+
+from sqlite_utils import Database
+from sqlite_utils.db import SchemaCacheInfo
+
+
+@pytest.fixture
+def db_path(tmpdir):
+    path = str(tmpdir / "test.db")
+    db = Database(path)
+    db.table("dogs").insert({"id": 1, "name": "Cleo"}, pk="id")
+    db.close()
+    return path
+
+
+def test_schema_cache_hits_and_misses(fresh_db):
+    fresh_db.table("dogs").insert({"id": 1, "name": "Cleo"}, pk="id")
+    fresh_db.clear_schema_cache()
+    assert fresh_db.schema_cache_info() == SchemaCacheInfo(0, 0, 0)
+    dogs = fresh_db.table("dogs")
+    assert dogs.pks == ["id"]
+    info = fresh_db.schema_cache_info()
+    assert info.hits == 0
+    assert info.misses == info.currsize > 0
+    collected = []
+    with fresh_db.tracer(lambda sql, params: collected.append(sql)):
+        assert dogs.pks == ["id"]
+        assert dogs.exists()
+        assert [c.name for c in dogs.columns] == ["id", "name"]
+    # Everything was answered from the cache
+    assert collected == []
+    new_info = fresh_db.schema_cache_info()
+    assert new_info.hits > 0
+    assert new_info.misses == info.misses
+    assert new_info.currsize == info.currsize
+
+
+def test_schema_cache_invalidated_by_schema_change(fresh_db):
+    dogs = fresh_db.table("dogs")
+    dogs.insert({"id": 1, "name": "Cleo"}, pk="id")
+    assert dogs.columns_dict == {"id": int, "name": str}
+    assert dogs.indexes == []
+    dogs.add_column("age", int)
+    dogs.create_index(["name"])
+    assert dogs.columns_dict == {"id": int, "name": str, "age": int}
+    assert [index.columns for index in dogs.indexes] == [["name"]]
+    fresh_db.execute("drop table dogs")
+    assert not dogs.exists()
+    assert dogs.columns == []
+
+
+def test_schema_cache_sees_changes_from_other_connections(db_path):
+    db = Database(db_path)
+    dogs = db.table("dogs")
+    assert [c.name for c in dogs.columns] == ["id", "name"]
+    assert db.table_names() == ["dogs"]
+    other = sqlite3.connect(db_path)
+    other.execute("alter table dogs add column age integer")
+    other.execute("create table cats (id integer primary key)")
+    other.commit()
+    other.close()
+    assert [c.name for c in dogs.columns] == ["id", "name", "age"]
+    assert db.table_names() == ["dogs", "cats"]
+    db.close()
+
+
+def test_schema_cache_temp_table_shadows(fresh_db):
+    fresh_db.table("dogs").insert({"id": 1, "name": "Cleo"}, pk="id")
+    assert [c.name for c in fresh_db.table("dogs").columns] == ["id", "name"]
+    fresh_db.execute("create temp table dogs (other text)")
+    assert [c.name for c in fresh_db.table("dogs").columns] == ["other"]
+
+
+def test_schema_cache_inside_transaction(fresh_db):
+    fresh_db.table("dogs").insert({"id": 1, "name": "Cleo"}, pk="id")
+    with fresh_db.atomic():
+        dogs = fresh_db.table("dogs")
+        assert dogs.pks == ["id"]
+        fresh_db.execute("alter table dogs add column age integer")
+        assert [c.name for c in dogs.columns] == ["id", "name", "age"]
+    with pytest.raises(ZeroDivisionError):
+        with fresh_db.atomic():
+            fresh_db.execute("alter table dogs add column weight integer")
+            assert "weight" in fresh_db.table("dogs").columns_dict
+            1 / 0
+    # The rolled back column must not be served from the cache
+    assert "weight" not in fresh_db.table("dogs").columns_dict
+
+
+def test_schema_cache_cleared_by_attach(fresh_db, tmpdir):
+    other_path = str(tmpdir / "other.db")
+    other = Database(other_path)
+    other.table("cats").insert({"name": "Pancakes"})
+    other.close()
+    assert not fresh_db.table("cats").exists()
+    assert fresh_db.table("cats").columns == []
+    fresh_db.attach("other", other_path)
+    assert fresh_db.schema_cache_info().currsize == 0
+
+
+def test_schema_cache_disabled(db_path):
+    db = Database(db_path, schema_cache=False)
+    dogs = db.table("dogs")
+    assert dogs.pks == ["id"]
+    assert dogs.pks == ["id"]
+    assert db.schema_cache_info() == SchemaCacheInfo(0, 0, 0)
+    db.close()
+
+
+def test_schema_cache_sees_ddl_not_issued_by_library(fresh_db):
+    fresh_db.table("t").insert({"a": 1})
+    with fresh_db.atomic():
+        assert fresh_db.table("t").columns_dict == {"a": int}
+        fresh_db.conn.execute("alter table t add column b text")
+        assert fresh_db.table("t").columns_dict == {"a": int, "b": str}
+
+
+def test_schema_cache_reads_version_once_per_operation(fresh_db):
+    dogs = fresh_db.table("dogs")
+    dogs.insert({"id": 1, "name": "Cleo", "age": 3}, pk="id")
+    dogs.create_index(["name"])
+    dogs.create_index(["age"])
+
+    def statements(fn):
+        executed = []
+        fresh_db.conn.set_trace_callback(executed.append)
+        try:
+            fn()
+        finally:
+            fresh_db.conn.set_trace_callback(None)
+        # Ignore nested statements run by table-valued PRAGMA functions
+        return [sql for sql in executed if not sql.startswith("--")]
+
+    uncached = Database(fresh_db.conn, schema_cache=False).table("dogs")
+    for name in ("indexes", "columns", "pks"):
+        expected = getattr(uncached, name)
+        # Populate the cache, then read it again
+        getattr(dogs, name)
+        executed = statements(lambda: getattr(dogs, name))
+        assert getattr(dogs, name) == expected
+        # A single statement checks the schema version for the whole operation
+        assert len(executed) == 1
+        assert len(executed) < len(statements(lambda: getattr(uncached, name)))
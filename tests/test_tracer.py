@@ -10,6 +10,36 @@ def test_tracer():
     dogs.insert({"name": "Cleopaws"})
     dogs.enable_fts(["name"])
     dogs.search("Cleopaws")
+    # Repeated introspection queries are answered by the schema cache
+    assert collected == [
+        ("PRAGMA recursive_triggers=on;", None),
+        ("select name from sqlite_master where type = 'view'", None),
+        ("select name from sqlite_master where type = 'table'", None),
+        ('CREATE TABLE "dogs" (\n   "name" TEXT\n);\n        ', None),
+        ("select name from sqlite_master where type = 'view'", None),
+        ('INSERT INTO "dogs" ("name") VALUES (?)', ["Cleopaws"]),
+        (
+            'CREATE VIRTUAL TABLE "dogs_fts" USING FTS5 (\n    "name",\n    content="dogs"\n)',
+            None,
+        ),
+        (
+            'INSERT INTO "dogs_fts" (rowid, "name")\n    SELECT rowid, "name" FROM "dogs";',
+            None,
+        ),
+    ]
+
+
+def test_tracer_schema_cache_disabled():
+    collected = []
+    db = Database(
+        memory=True,
+        tracer=lambda sql, params: collected.append((sql, params)),
+        schema_cache=False,
+    )
+    dogs = db.table("dogs")
+    dogs.insert({"name": "Cleopaws"})
+    dogs.enable_fts(["name"])
+    dogs.search("Cleopaws")
     assert collected == [
         ("PRAGMA recursive_triggers=on;", None),
         ("select name from sqlite_master where type = 'view'", None),
@@ -185,3 +185,165 @@ def test_upsert_compound_primary_key(fresh_db):
     # .upsert_all() with a single item should set .last_pk
     table.upsert_all([{"species": "cat", "id": 1, "age": 5}], pk=("species", "id"))
     assert ("cat", 1) == table.last_pk
+
+
+@pytest.mark.parametrize("use_old_upsert", (False, True))
+def test_upsert_all_staging(use_old_upsert):
+    db = Database(memory=True, use_old_upsert=use_old_upsert)
+    table = db.table("dogs")
+    table.insert_all(
+        [{"id": 1, "name": "Cleo", "age": 4}, {"id": 2, "name": "Pancakes", "age": 3}],
+        pk="id",
+    )
+    table.upsert_all(
+        [
+            {"id": 2, "name": "Pancakes", "age": 5},
+            {"id": 3, "name": "Lila", "age": None},
+            {"id": 3, "name": "Lila", "age": 1},
+            {"id": 4, "name": "Bants", "age": 2},
+        ],
+        pk="id",
+        batch_size=2,
+        staging=True,
+    )
+    assert list(table.rows) == [
+        {"id": 1, "name": "Cleo", "age": 4},
+        {"id": 2, "name": "Pancakes", "age": 5},
+        {"id": 3, "name": "Lila", "age": 1},
+        {"id": 4, "name": "Bants", "age": 2},
+    ]
+    # A record repeated in the input is only counted once
+    assert table.last_upsert_counts == (2, 1)
+    assert db.execute("select name from sqlite_temp_master").fetchall() == []
+    db.close()
+
+
+@pytest.mark.parametrize("use_old_upsert", (False, True))
+def test_upsert_all_staging_alter_conversions_list_mode(use_old_upsert):
+    db = Database(memory=True, use_old_upsert=use_old_upsert)
+    table = db.table("dogs")
+    table.upsert_all(
+        [{"id": 1, "name": "cleo"}, {"id": 2, "name": "pancakes"}],
+        pk="id",
+        staging=True,
+    )
+    assert table.last_upsert_counts == (2, 0)
+    table.upsert_all(
+        [{"id": 2, "name": "pancakes"}, {"id": 3, "name": "lila", "age": 1}],
+        pk="id",
+        batch_size=1,
+        alter=True,
+        conversions={"name": "upper(?)"},
+        staging=True,
+    )
+    table.upsert_all([["id", "age"], [1, 4], [5, 2]], pk="id", staging=True, alter=True)
+    assert list(table.rows) == [
+        {"id": 1, "name": "cleo", "age": 4},
+        {"id": 2, "name": "PANCAKES", "age": None},
+        {"id": 3, "name": "LILA", "age": 1},
+        {"id": 5, "name": None, "age": 2},
+    ]
+    assert table.last_upsert_counts == (1, 1)
+    db.close()
+
+
+def test_upsert_all_staging_rolls_back_on_error(fresh_db):
+    table = fresh_db.table("dogs")
+    table.insert({"id": 1, "name": "Cleo"}, pk="id")
+    with pytest.raises(PrimaryKeyRequired):
+        table.upsert_all(
+            [{"id": 1, "name": "Pancakes"}, {"id": 2, "name": "Lila"}, {"name": "Bo"}],
+            pk="id",
+            batch_size=2,
+            staging=True,
+        )
+    assert list(table.rows) == [{"id": 1, "name": "Cleo"}]
+    assert fresh_db.execute("select name from sqlite_temp_master").fetchall() == []
+
+
+def test_insert_all_staging_requires_upsert(fresh_db):
+    with pytest.raises(ValueError):
+        fresh_db.table("dogs").insert_all([{"id": 1}], pk="id", staging=True)
+
+
+@pytest.mark.parametrize("use_old_upsert", (False, True))
+@pytest.mark.parametrize(
+    "options", ({}, {"executemany": True}, {"staging": True}, {"batch_size": 1})
+)
+def test_upsert_all_only_changed(use_old_upsert, options):
+    db = Database(memory=True, use_old_upsert=use_old_upsert)
+    table = db.table("dogs")
+    table.insert_all(
+        [{"id": 1, "name": "Cleo", "age": 4}, {"id": 2, "name": "Pancakes", "age": 3}],
+        pk="id",
+    )
+    db.execute("create table updated (id integer)")
+    db.execute(
+        "create trigger dogs_au after update on dogs "
+        "begin insert into updated values (new.id); end"
+    )
+    table.upsert_all(
+        [
+            # age will be stored as 4, so this row is unchanged
+            {"id": 1, "name": "Cleo", "age": "4"},
+            {"id": 2, "name": "Pancakes", "age": 5},
+            {"id": 3, "name": "Lila", "age": None},
+            {"id": 3, "name": "Lila", "age": 1},
+        ],
+        pk="id",
+        only_changed=True,
+        **options,
+    )
+    assert list(table.rows) == [
+        {"id": 1, "name": "Cleo", "age": 4},
+        {"id": 2, "name": "Pancakes", "age": 5},
+        {"id": 3, "name": "Lila", "age": 1},
+    ]
+    if options.get("batch_size") == 1:
+        # The second record for id=3 updates the row inserted by the first
+        assert table.last_upsert_counts == (1, 2)
+        assert db.execute("select id from updated").fetchall() == [(2,), (3,)]
+    else:
+        assert table.last_upsert_counts == (1, 1)
+        assert db.execute("select id from updated").fetchall() == [(2,)]
+    db.close()
+
+
+@pytest.mark.parametrize("use_old_upsert", (False, True))
+def test_upsert_only_changed_compares_converted_values(use_old_upsert):
+    db = Database(memory=True, use_old_upsert=use_old_upsert)
+    table = db.table("dogs")
+    table.insert({"id": 1, "name": "CLEO"}, pk="id")
+    table.upsert(
+        {"id": 1, "name": "cleo"},
+        pk="id",
+        conversions={"name": "upper(?)"},
+        only_changed=True,
+    )
+    assert table.last_upsert_counts == (0, 0)
+    assert table.last_pk == 1
+    table.upsert({"id": 1, "name": None}, pk="id", only_changed=True)
+    assert table.last_upsert_counts == (0, 1)
+    assert table.get(1) == {"id": 1, "name": None}
+    db.close()
+
+
+def test_upsert_only_changed_skips_fts_triggers(fresh_db):
+    table = fresh_db.table("docs")
+    table.insert_all([{"id": 1, "title": "Cleo"}], pk="id")
+    table.enable_fts(["title"], create_triggers=True)
+    fresh_db.execute("create table fts_writes (id integer)")
+    fresh_db.execute(
+        "create trigger count_fts_writes after update on docs "
+        "begin insert into fts_writes values (new.id); end"
+    )
+    table.upsert_all([{"id": 1, "title": "Cleo"}], pk="id", only_changed=True)
+    assert fresh_db.execute("select count(*) from fts_writes").fetchone()[0] == 0
+    table.upsert_all([{"id": 1, "title": "Lila"}], pk="id", only_changed=True)
+    assert fresh_db.execute("select count(*) from fts_writes").fetchone()[0] == 1
+    assert [r["id"] for r in table.search("Lila")] == [1]
+
+
+def test_insert_all_only_changed_requires_upsert(fresh_db):
+    with pytest.raises(ValueError):
+        fresh_db.table("dogs").insert_all([{"id": 1}], pk="id", only_changed=True)
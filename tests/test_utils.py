@@ -102,3 +102,66 @@ def test_flatten(input, expected):
 )
 def test_dedupe_keys(input, expected):
     assert utils.dedupe_keys(input) == expected
+
+
+@pytest.mark.parametrize(
+    "values,expected",
+    (
+        (["1", "-2", "+3", ""], "integer"),
+        (["1", "2.5", "1e5", ".5"], "float"),
+        (["1", " 12 ", "1_000"], "integer"),
+        (["1.5", "nan", "inf"], "float"),
+        (["1", "1.5", "x"], "text"),
+        (["0x10"], "text"),
+        ([""], "integer"),
+    ),
+)
+def test_type_tracker(values, expected):
+    tracker = utils.TypeTracker()
+    list(tracker.wrap({"a": value} for value in values))
+    assert tracker.types == {"a": expected}
+
+
+def test_type_tracker_sample():
+    rows = [{"id": str(i), "score": str(i)} for i in range(10)]
+    rows.append({"id": "10", "score": "10.5", "name": "Cleo"})
+    tracker = utils.TypeTracker(sample=10)
+    assert list(tracker.wrap(rows)) == rows
+    # Rows after the first 10 do not affect the detected types
+    assert tracker.types == {"id": "integer", "score": "integer", "name": "text"}
+
+
+@pytest.mark.parametrize("count", (0, 3, 10))
+def test_spooled_rows(count):
+    seen = []
+
+    def rows():
+        for i in range(count):
+            seen.append(i)
+            yield {"id": i}
+
+    spooled = utils._SpooledRows(rows(), memory_rows=3)
+    # Everything is read straight away
+    assert seen == list(range(count))
+    assert (spooled._spool is not None) == (count > 3)
+    assert list(spooled) == [{"id": i} for i in range(count)]
+
+
+def test_read_ahead():
+    seen = []
+
+    def rows():
+        for i in range(5):
+            seen.append(i)
+            yield i
+
+    read = utils._read_ahead(rows(), 2)
+    assert seen == [0, 1]
+    assert list(read) == [0, 1, 2, 3, 4]
+
+
+def test_type_tracker_list_mode():
+    rows = [["id", "score", "name"], ["1", "2.5", "Cleo"], ["2", "3", ""]]
+    tracker = utils.TypeTracker()
+    assert list(tracker.wrap(rows)) == rows
+    assert tracker.types == {"id": "integer", "score": "float", "name": "text"}
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sqlite_utils import Database
+from sqlite_utils.db import NotFoundError, WriteQueue
+
+
+@pytest.fixture
+def db(tmpdir):
+    db = Database(str(tmpdir / "queue.db"))
+    db.table("dogs").create({"id": int, "name": str, "age": int}, pk="id")
+    yield db
+    db.close()
+
+
+def test_write_queue_groups_writes_from_many_threads(db):
+    with db.write_queue(max_delay=0.2) as writes:
+        assert isinstance(writes, WriteQueue)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = list(
+                executor.map(
+                    lambda i: writes.insert("dogs", {"id": i, "name": f"Dog {i}"}),
+                    range(1, 201),
+                )
+            )
+        assert sorted(future.result() for future in futures) == list(range(1, 201))
+        # Far fewer transactions than writes
+        assert writes.transactions < 20
+    assert db.table("dogs").count == 200
+
+
+def test_write_queue_max_operations(db):
+    with db.write_queue(max_delay=5, max_operations=10) as writes:
+        futures = [writes.insert("dogs", {"id": i}) for i in range(25)]
+        # A full group is committed without waiting for max_delay
+        assert futures[9].result(timeout=2) == 9
+    assert writes.transactions == 3
+
+
+def test_write_queue_upsert_and_update(db):
+    with db.write_queue() as writes:
+        assert writes.insert("dogs", {"id": 1, "name": "Cleo"}).result() == 1
+        upsert = writes.upsert("dogs", {"id": 1, "age": 4}, pk="id")
+        update = writes.update("dogs", 1, {"name": "Cleopaws"})
+        assert upsert.result() == 1
+        assert update.result() == 1
+        assert writes.insert("cats", {"name": "Rusty"}).result() == 1
+    assert db.table("dogs").get(1) == {"id": 1, "name": "Cleopaws", "age": 4}
+    assert list(db.table("cats").rows) == [{"name": "Rusty"}]
+
+
+def test_write_queue_failure_only_fails_its_own_future(db):
+    with db.write_queue(max_delay=0.2) as writes:
+        first = writes.insert("dogs", {"id": 1, "name": "Cleo"})
+        duplicate = writes.insert("dogs", {"id": 1, "name": "Duplicate"})
+        missing = writes.update("dogs", 5, {"name": "Nobody"})
+        last = writes.insert("dogs", {"id": 2, "name": "Pancakes"})
+        assert first.result() == 1
+        assert isinstance(duplicate.exception(), Exception)
+        assert isinstance(missing.exception(), NotFoundError)
+        assert last.result() == 2
+        assert writes.transactions == 1
+    assert list(db.query("select name from dogs")) == [
+        {"name": "Cleo"},
+        {"name": "Pancakes"},
+    ]
+
+
+def test_write_queue_flush_and_close(db):
+    writes = db.write_queue(max_delay=5)
+    writes.insert("dogs", {"id": 1})
+    writes.flush()
+    assert db.table("dogs").count == 1
+    writes.insert("dogs", {"id": 2})
+    writes.close()
+    assert db.table("dogs").count == 2
+    writes.close()
+    with pytest.raises(RuntimeError):
+        writes.insert("dogs", {"id": 3})
+
+
+def test_write_queue_requires_file():
+    with pytest.raises(ValueError):
+        Database(memory=True).write_queue()